@@ -0,0 +1,18 @@
+"""
+Celery application for alx_travel_app project.
+
+Configuration is read from the ``CELERY_*`` Django settings and tasks are
+discovered in each installed app's ``tasks`` module. Start a worker with::
+
+    celery -A alx_travel_app worker
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "alx_travel_app.settings")
+
+app = Celery("alx_travel_app")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
@@ -0,0 +1,134 @@
+"""Async read endpoints for listings and bookings.
+
+Under ASGI the DRF viewsets in ``views`` run in a worker thread per
+request. These views run on the event loop instead: rows come from the
+async ORM (``aget`` and ``async for``) and are serialized with the same
+precompiled plans and serializers, so the JSON matches the sync endpoints.
+Only reads are served here; writes stay on the viewsets. Requests are
+throttled per IP address against the same budgets as the viewsets'.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import APIException, NotFound, Throttled
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from listings.fastpath import compile_plan
+from listings.models import Booking, Listing
+from listings.pagination import KeysetPagination
+from listings.serializers import (
+    BookingDetailSerializer,
+    BookingSerializer,
+    ListingSerializer,
+)
+from listings.views import BookingViewSet
+
+
+class AsyncReadView(View):
+    """``GET`` list (keyset-paginated) and detail for one model."""
+
+    http_method_names = ["get", "head", "options"]
+    model = None
+    serializer_class = None
+    pagination_class = KeysetPagination
+    renderer = JSONRenderer()
+
+    async def get(self, request, pk=None):
+        request = Request(request)
+        self.action = "list" if pk is None else "retrieve"
+        try:
+            await self.check_throttles(request)
+            if pk is None:
+                payload = await self.list(request)
+            else:
+                payload = await self.retrieve(pk)
+        except APIException as exc:
+            response = self.render({"detail": exc.detail}, status=exc.status_code)
+            if isinstance(exc, Throttled) and exc.wait is not None:
+                response["Retry-After"] = str(exc.wait)
+            return response
+        return self.render(payload)
+
+    async def check_throttles(self, request):
+        # No authenticators run here, so every client is throttled as
+        # anonymous, by IP address.
+        for throttle_class in api_settings.DEFAULT_THROTTLE_CLASSES:
+            throttle = throttle_class()
+            if not await sync_to_async(throttle.allow_request)(request, self):
+                raise Throttled(throttle.wait())
+
+    def get_queryset(self):
+        return self.model.objects.all()
+
+    async def list(self, request):
+        plan = compile_plan(self.serializer_class)
+        paginator = self.pagination_class()
+        columns = [*plan.columns, *paginator.get_ordering(self)]
+        queryset = self.get_queryset().values(
+            *dict.fromkeys(column.lstrip("-") for column in columns)
+        )
+        rows = await paginator.apaginate_queryset(queryset, request, self)
+        return paginator.get_paginated_data(plan.serialize(rows))
+
+    async def retrieve(self, pk):
+        plan = compile_plan(self.serializer_class)
+        try:
+            row = await self.get_queryset().values(*plan.columns).aget(pk=pk)
+        except self.model.DoesNotExist:
+            raise self.not_found()
+        return plan.serialize([row])[0]
+
+    def not_found(self):
+        return NotFound(f"No {self.model._meta.object_name} matches the given query.")
+
+    def render(self, data, status=200):
+        return HttpResponse(
+            self.renderer.render(data),
+            content_type="application/json",
+            status=status,
+        )
+
+
+class AsyncListingView(AsyncReadView):
+    model = Listing
+    basename = "listing"
+    serializer_class = ListingSerializer
+
+
+class AsyncBookingView(AsyncReadView):
+    """Flat booking rows; detail and ``?expand=true`` lists are nested.
+
+    Nested responses load both relations in the same query as
+    ``BookingViewSet`` does, so serializing them does no further I/O.
+    """
+
+    model = Booking
+    basename = "booking"
+    serializer_class = BookingSerializer
+
+    def get_nested_queryset(self):
+        return (
+            self.get_queryset()
+            .select_related("property", "user")
+            .only(*BookingViewSet.summary_fields)
+        )
+
+    async def list(self, request):
+        if request.query_params.get("expand") not in ("1", "true"):
+            return await super().list(request)
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(
+            self.get_nested_queryset(), request, self
+        )
+        data = BookingDetailSerializer(rows, many=True).data
+        return paginator.get_paginated_data(data)
+
+    async def retrieve(self, pk):
+        try:
+            booking = await self.get_nested_queryset().aget(pk=pk)
+        except Booking.DoesNotExist:
+            raise self.not_found()
+        return BookingDetailSerializer(booking).data
@@ -0,0 +1,227 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from listings.models import Booking, BookingNight, Property, PropertyCalendar
+
+ACTIVE_STATUSES = (Booking.Status.PENDING, Booking.Status.CONFIRMED)
+WINDOW_DAYS = PropertyCalendar.WINDOW_DAYS
+WINDOW_BYTES = (WINDOW_DAYS + 7) // 8
+
+
+class BookingConflict(Exception):
+    """Raised when a booking overlaps nights already held on the property."""
+
+
+def nights(start_date, end_date):
+    """Yield every night of a stay; the checkout day is not a night."""
+    for offset in range((end_date - start_date).days):
+        yield start_date + timedelta(days=offset)
+
+
+def is_available(property_id, start_date, end_date):
+    """Return True when no active booking holds a night in the range."""
+    return not BookingNight.objects.filter(
+        property_id=property_id, date__gte=start_date, date__lt=end_date
+    ).exists()
+
+
+def sync_nights(booking):
+    """Make the booking's night rows and calendars match its dates and status.
+
+    Must run in the same transaction that saved the booking so a conflict
+    rolls the booking back as well.
+    """
+    stale = set(booking.nights.values_list("property_id", flat=True).distinct())
+    try:
+        with transaction.atomic():
+            BookingNight.objects.filter(booking=booking).delete()
+            if booking.status in ACTIVE_STATUSES:
+                BookingNight.objects.bulk_create(
+                    BookingNight(
+                        property_id=booking.property_id, booking=booking, date=night
+                    )
+                    for night in nights(booking.start_date, booking.end_date)
+                )
+    except IntegrityError as exc:
+        raise BookingConflict(
+            f"Property {booking.property_id} is not available "
+            f"from {booking.start_date} to {booking.end_date}."
+        ) from exc
+    for property_id in stale | {booking.property_id}:
+        refresh_calendar(property_id)
+
+
+def batch_conflicts(stays, exclude=()):
+    """Return the indexes of ``stays`` that cannot all be booked together.
+
+    ``stays`` are ``(property_id, start_date, end_date)`` tuples in request
+    order. A stay conflicts when a night is already held, ignoring nights
+    of the bookings in ``exclude`` (they are being rewritten), or is
+    claimed by an earlier stay of the batch. Held nights are read with one
+    query.
+    """
+    if not stays:
+        return set()
+    taken = set(
+        BookingNight.objects.filter(
+            property_id__in={stay[0] for stay in stays},
+            date__gte=min(stay[1] for stay in stays),
+            date__lt=max(stay[2] for stay in stays),
+        )
+        .exclude(booking_id__in=exclude)
+        .values_list("property_id", "date")
+    )
+    conflicts = set()
+    for index, (property_id, start_date, end_date) in enumerate(stays):
+        wanted = {(property_id, night) for night in nights(start_date, end_date)}
+        if wanted & taken:
+            conflicts.add(index)
+        else:
+            taken |= wanted
+    return conflicts
+
+
+def sync_batch_nights(bookings):
+    """``sync_nights`` for many bookings: one delete and one insert.
+
+    Must run in the transaction that saved the bookings; raises
+    ``BookingConflict`` if a concurrent writer took one of the nights.
+    """
+    stale = set(
+        BookingNight.objects.filter(booking__in=bookings)
+        .values_list("property_id", flat=True)
+        .distinct()
+    )
+    try:
+        with transaction.atomic():
+            BookingNight.objects.filter(booking__in=bookings).delete()
+            BookingNight.objects.bulk_create(
+                (
+                    BookingNight(
+                        property_id=booking.property_id, booking=booking, date=night
+                    )
+                    for booking in bookings
+                    if booking.status in ACTIVE_STATUSES
+                    for night in nights(booking.start_date, booking.end_date)
+                ),
+                batch_size=5000,
+            )
+    except IntegrityError as exc:
+        raise BookingConflict(
+            "Some of the requested nights were booked meanwhile."
+        ) from exc
+    for property_id in stale | {booking.property_id for booking in bookings}:
+        refresh_calendar(property_id)
+
+
+def occupancy_bitmap(window_start, stays):
+    """Encode (start_date, end_date) stays as a window-sized bitmap."""
+    bits = 0
+    for start_date, end_date in stays:
+        first = max((start_date - window_start).days, 0)
+        last = min((end_date - window_start).days, WINDOW_DAYS)
+        if last > first:
+            bits |= ((1 << (last - first)) - 1) << first
+    return bits.to_bytes(WINDOW_BYTES, "little")
+
+
+def _active_stays(window_start):
+    window_end = window_start + timedelta(days=WINDOW_DAYS)
+    return Booking.objects.filter(
+        status__in=ACTIVE_STATUSES,
+        start_date__lt=window_end,
+        end_date__gt=window_start,
+    )
+
+
+def refresh_calendar(property_id, window_start=None):
+    """Recompute one property's bitmap, rolling its window to today.
+
+    The calendar row is locked before the bookings are read, so two
+    concurrent refreshes of a property cannot write bitmaps computed from
+    reads that each missed the other's booking.
+    """
+    window_start = window_start or timezone.localdate()
+    stays = _active_stays(window_start).filter(property_id=property_id)
+    with transaction.atomic():
+        calendar = (
+            PropertyCalendar.objects.select_for_update()
+            .filter(property_id=property_id)
+            .first()
+        )
+        occupancy = occupancy_bitmap(
+            window_start, stays.values_list("start_date", "end_date")
+        )
+        if calendar is None:
+            PropertyCalendar.objects.create(
+                property_id=property_id,
+                window_start=window_start,
+                occupancy=occupancy,
+            )
+        else:
+            calendar.window_start = window_start
+            calendar.occupancy = occupancy
+            calendar.save(update_fields=["window_start", "occupancy"])
+
+
+def rebuild_calendars(window_start=None, batch_size=5000):
+    """Rebuild every property's bitmap in one pass over active bookings."""
+    window_start = window_start or timezone.localdate()
+    stays = {}
+    rows = _active_stays(window_start).values_list(
+        "property_id", "start_date", "end_date"
+    )
+    for property_id, start_date, end_date in rows.iterator(chunk_size=batch_size):
+        stays.setdefault(property_id, []).append((start_date, end_date))
+    calendars = (
+        PropertyCalendar(
+            property_id=property_id,
+            window_start=window_start,
+            occupancy=occupancy_bitmap(window_start, stays.get(property_id, ())),
+        )
+        for property_id in Property.objects.values_list("pk", flat=True).iterator()
+    )
+    with transaction.atomic():
+        PropertyCalendar.objects.all().delete()
+        PropertyCalendar.objects.bulk_create(calendars, batch_size=batch_size)
+    return len(stays)
+
+
+def available_properties(queryset, start_date, end_date, limit=None):
+    """Return ids of properties in ``queryset`` free for the whole stay.
+
+    Candidates and their bitmaps come back in a single query, in queryset
+    order. Properties whose calendar is missing or does not cover the stay
+    are settled with one set-based query against the night index.
+    """
+    rows = queryset.values_list(
+        "pk", "calendar__window_start", "calendar__occupancy"
+    ).iterator(chunk_size=5000)
+    length = (end_date - start_date).days
+    masks = {}
+    candidates, unknown = [], []
+    for property_id, window_start, occupancy in rows:
+        offset = (start_date - window_start).days if window_start else -1
+        if offset < 0 or offset + length > WINDOW_DAYS:
+            unknown.append(property_id)
+            candidates.append(property_id)
+            continue
+        if offset not in masks:
+            masks[offset] = ((1 << length) - 1) << offset
+        if not int.from_bytes(occupancy, "little") & masks[offset]:
+            candidates.append(property_id)
+            if limit and not unknown and len(candidates) >= limit:
+                break
+    if unknown:
+        scope = unknown if len(unknown) <= 500 else queryset.order_by().values("pk")
+        busy = set(
+            BookingNight.objects.filter(
+                property__in=scope, date__gte=start_date, date__lt=end_date
+            )
+            .values_list("property_id", flat=True)
+            .distinct()
+        )
+        candidates = [pk for pk in candidates if pk not in busy]
+    return candidates[:limit] if limit else candidates
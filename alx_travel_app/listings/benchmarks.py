@@ -0,0 +1,926 @@
+"""Benchmark scenarios run by ``manage.py benchmark``.
+
+Each scenario builds its own synthetic data in the throwaway database the
+command creates, then prints timings for the optimized path next to the
+baseline it replaces.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.asgi import get_asgi_application
+from django.core.wsgi import get_wsgi_application
+from django.conf import settings
+from django.core.cache import cache
+from django.db import OperationalError, connection, transaction
+from django.test import Client, RequestFactory, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from listings import availability, pricing, rollups
+from listings import reports as reports_module
+from listings import schema as openapi_schema
+from listings import search as fts
+from listings.exports import export_rows
+from listings.fastpath import compile_plan
+from listings.models import (
+    User,
+    Listing,
+    Property,
+    Booking,
+    BookingNight,
+    Payment,
+    RateOverride,
+)
+from listings.renderers import NDJSONRenderer
+from listings.serializers import ListingSerializer, BookingSerializer
+from listings.views import BookingViewSet
+
+SCENARIOS = {}
+LOCATIONS = [f"City {index}" for index in range(20)]
+
+
+def scenario(func):
+    SCENARIOS[func.__name__] = func
+    return func
+
+
+def best_of(func, repeat):
+    """Return the fastest of ``repeat`` runs of ``func`` in seconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def report(stdout, label, seconds, count=None, unit="rows"):
+    line = f"{label:<40} {seconds * 1000:>10.2f} ms"
+    if count:
+        line += f" {count / seconds:>14,.0f} {unit}/s"
+    stdout.write(line)
+
+
+def make_properties(count, rng, batch_size=5000):
+    host = User.objects.create_user(
+        username="bench-host", email="bench-host@example.com", password="x"
+    )
+    Property.objects.bulk_create(
+        (
+            Property(
+                host=host,
+                name=f"Property {index}",
+                description="Synthetic benchmark property",
+                location=rng.choice(LOCATIONS),
+                price_per_night=Decimal(rng.randrange(5000, 50000)) / 100,
+            )
+            for index in range(count)
+        ),
+        batch_size=batch_size,
+    )
+    return host
+
+
+def make_bookings(total, rng, batch_size=10000):
+    """Lay ``total`` back-to-back stays across all properties, without overlaps."""
+    guest = User.objects.create_user(
+        username="bench-guest", email="bench-guest@example.com", password="x"
+    )
+    properties = list(Property.objects.values_list("pk", "price_per_night"))
+    per_property, extra = divmod(total, len(properties))
+    today = timezone.localdate()
+    statuses = list(availability.ACTIVE_STATUSES) + [Booking.Status.CANCELLED]
+
+    def stays():
+        for index, (property_id, price) in enumerate(properties):
+            cursor = today - timedelta(days=30)
+            for _ in range(per_property + (index < extra)):
+                cursor += timedelta(days=rng.randrange(0, 4))
+                length = rng.randrange(1, 5)
+                yield Booking(
+                    property_id=property_id,
+                    user=guest,
+                    start_date=cursor,
+                    end_date=cursor + timedelta(days=length),
+                    total_price=price * length,
+                    status=rng.choice(statuses),
+                )
+                cursor += timedelta(days=length)
+
+    Booking.objects.bulk_create(stays(), batch_size=batch_size)
+
+
+@scenario
+def search(stdout, properties, bookings, repeat, seed, **options):
+    """Date-range availability over every property: bitmaps vs booking scan."""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    make_properties(properties, rng)
+    make_bookings(bookings, rng)
+    report(
+        stdout,
+        f"generate {properties} properties/{bookings} bookings",
+        time.perf_counter() - started,
+    )
+    report(stdout, "rebuild calendars", best_of(availability.rebuild_calendars, 1))
+
+    start_date = timezone.localdate() + timedelta(days=60)
+    end_date = start_date + timedelta(days=7)
+    candidates = Property.objects.order_by("price_per_night", "pk")
+
+    def bitmap():
+        return availability.available_properties(candidates, start_date, end_date)
+
+    def scan():
+        busy = Booking.objects.filter(
+            status__in=availability.ACTIVE_STATUSES,
+            start_date__lt=end_date,
+            end_date__gt=start_date,
+        ).values("property_id")
+        return list(candidates.exclude(pk__in=busy).values_list("pk", flat=True))
+
+    assert bitmap() == scan()
+    report(
+        stdout,
+        "search all properties (bitmap)",
+        best_of(bitmap, repeat),
+        properties,
+        "properties",
+    )
+    report(
+        stdout,
+        "search all properties (booking scan)",
+        best_of(scan, repeat),
+        properties,
+        "properties",
+    )
+    located = candidates.filter(location=LOCATIONS[0])
+    report(
+        stdout,
+        "search one location (bitmap)",
+        best_of(
+            lambda: availability.available_properties(located, start_date, end_date),
+            repeat,
+        ),
+    )
+
+
+@scenario
+def export(stdout, properties, bookings, seed, **options):
+    """Booking export: streamed NDJSON vs serializing the whole list."""
+    rng = random.Random(seed)
+    make_properties(properties, rng)
+    make_bookings(bookings, rng)
+    fields = BookingViewSet.export_fields
+    renderer = NDJSONRenderer()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    chunks = renderer.stream(fields, export_rows(Booking.objects.all(), fields))
+    next(chunks)
+    first_byte = time.perf_counter() - started
+    for _ in chunks:
+        pass
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    report(stdout, "streamed: first byte", first_byte)
+    report(stdout, "streamed: all rows", elapsed, bookings)
+    stdout.write(f"{'streamed: peak memory':<40} {peak / 2**20:>10.2f} MiB")
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    data = BookingSerializer(Booking.objects.all(), many=True).data
+    renderer.render(list(data))
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    report(stdout, "list serializer: all rows", elapsed, bookings)
+    stdout.write(f"{'list serializer: peak memory':<40} {peak / 2**20:>10.2f} MiB")
+
+
+@scenario
+def serializers(stdout, rows, repeat, seed, **options):
+    """List serialization: ModelSerializer vs precompiled .values() plan."""
+    rng = random.Random(seed)
+    Listing.objects.bulk_create(
+        Listing(
+            title=f"Listing {index}",
+            description="Synthetic benchmark listing",
+            price=Decimal(rng.randrange(1000, 100000)) / 100,
+        )
+        for index in range(rows)
+    )
+    make_properties(max(rows // 100, 1), rng)
+    make_bookings(rows, rng)
+    for model, serializer_class in (
+        (Listing, ListingSerializer),
+        (Booking, BookingSerializer),
+    ):
+        plan = compile_plan(serializer_class)
+        queryset = model.objects.order_by("pk")
+        name = model.__name__.lower()
+        report(
+            stdout,
+            f"{name}: ModelSerializer",
+            best_of(lambda: serializer_class(queryset.all(), many=True).data, repeat),
+            rows,
+            "objects",
+        )
+        report(
+            stdout,
+            f"{name}: values() plan",
+            best_of(lambda: plan.serialize(queryset.values(*plan.columns)), repeat),
+            rows,
+            "objects",
+        )
+
+
+@scenario
+def profiling(stdout, rows, repeat, seed, **options):
+    """Request profiling middleware overhead on a paginated list endpoint.
+
+    Runs with the default ``PROFILING_LOG_LEVEL``, which logs no record
+    for an ordinary request.
+    """
+    Listing.objects.bulk_create(
+        Listing(title=f"Listing {index}", description="", price=Decimal("10.00"))
+        for index in range(rows)
+    )
+    clients = {}
+    for enabled in (False, True):
+        with override_settings(PROFILING_ENABLED=enabled):
+            clients[enabled] = Client()
+            clients[enabled].get("/api/listings/")
+    # Short blocks of requests, interleaved so drift in the machine's speed
+    # hits both sides and neither always goes first; the median block is
+    # reported.
+    block, rounds = 50, 20 * repeat
+    blocks = {False: [], True: []}
+    for round_ in range(rounds):
+        for enabled in (False, True) if round_ % 2 else (True, False):
+            client = clients[enabled]
+            started = time.perf_counter()
+            for _ in range(block):
+                client.get("/api/listings/")
+            blocks[enabled].append(time.perf_counter() - started)
+    timings = {enabled: statistics.median(runs) for enabled, runs in blocks.items()}
+    for enabled, label in ((False, "disabled"), (True, "enabled")):
+        report(
+            stdout,
+            f"{block} requests, profiling {label} (median)",
+            timings[enabled],
+            block,
+            "requests",
+        )
+    overhead = timings[True] / timings[False] - 1
+    stdout.write(f"{'overhead':<40} {overhead * 100:>10.2f} %")
+
+
+def asgi_get(application, path):
+    """Send one GET straight to an ASGI application; return its latency."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 0),
+        "server": ("testserver", 80),
+    }
+    done = asyncio.Event()
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message["status"]
+        elif not message.get("more_body"):
+            done.set()
+
+    async def run():
+        started = time.perf_counter()
+        await application(scope, receive, send)
+        return time.perf_counter() - started
+
+    return run()
+
+
+def wsgi_get(application, path):
+    """Run one GET through a WSGI application; return its latency."""
+    path, _, query = path.partition("?")
+    environ = RequestFactory()._base_environ(PATH_INFO=path, QUERY_STRING=query)
+    status = []
+    started = time.perf_counter()
+    body = application(environ, lambda line, headers: status.append(line))
+    try:
+        b"".join(body)
+    finally:
+        body.close()
+    assert status[0].startswith("200"), status[0]
+    return time.perf_counter() - started
+
+
+def load_asgi(application, path, requests, concurrency):
+    """``concurrency`` connections on one event loop sharing ``requests`` GETs."""
+
+    async def connection(count):
+        return [await asgi_get(application, path) for _ in range(count)]
+
+    async def run():
+        share, extra = divmod(requests, concurrency)
+        batches = await asyncio.gather(
+            *(connection(share + (index < extra)) for index in range(concurrency))
+        )
+        return [latency for batch in batches for latency in batch]
+
+    return asyncio.run(run())
+
+
+def load_wsgi(application, path, requests, concurrency):
+    """``concurrency`` worker threads sharing ``requests`` GETs."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(lambda _: wsgi_get(application, path), range(requests)))
+
+
+def report_load(stdout, label, elapsed, latencies):
+    percentiles = statistics.quantiles(latencies, n=100)
+    stdout.write(
+        f"{label:<40} {len(latencies) / elapsed:>10,.0f} req/s"
+        f" p50 {percentiles[49] * 1000:>8.1f} ms"
+        f" p99 {percentiles[98] * 1000:>8.1f} ms"
+    )
+
+
+@scenario
+def asgi(stdout, rows, concurrency, seed, **options):
+    """Booking reads at high concurrency: async views vs sync viewsets.
+
+    Requests are handed to the ASGI and WSGI handlers in process, so the
+    numbers cover Django, DRF and the database but no HTTP server. Under
+    ASGI the sync viewset pays a thread hop per request; under WSGI it gets
+    one thread per concurrent connection.
+    """
+    logging.getLogger("django.request").setLevel(logging.ERROR)
+    rng = random.Random(seed)
+    make_properties(max(rows // 100, 1), rng)
+    make_bookings(rows, rng)
+    requests = concurrency * 4
+    asgi_application = get_asgi_application()
+    wsgi_application = get_wsgi_application()
+    runs = (
+        ("async view, ASGI", load_asgi, asgi_application, "/api/async/bookings/"),
+        ("sync viewset, ASGI", load_asgi, asgi_application, "/api/bookings/"),
+        ("sync viewset, WSGI threads", load_wsgi, wsgi_application, "/api/bookings/"),
+    )
+    stdout.write(f"{requests} requests over {concurrency} concurrent connections")
+    for label, load, application, path in runs:
+        load(application, path, concurrency, concurrency)
+        started = time.perf_counter()
+        latencies = load(application, path, requests, concurrency)
+        report_load(stdout, label, time.perf_counter() - started, latencies)
+
+
+@scenario
+def connections(stdout, repeat, seed, **options):
+    """Per-request connection setup: CONN_MAX_AGE=0 vs persistent connections.
+
+    Runs sequential requests through the WSGI handler, which closes or keeps
+    the connection at the end of each request according to CONN_MAX_AGE.
+    Against SQLite the setup is a file open plus Django's per-connection
+    initialization; a networked MySQL connection adds the TCP and auth
+    round trips on top.
+    """
+    rng = random.Random(seed)
+    make_properties(10, rng)
+    make_bookings(100, rng)
+    application = get_wsgi_application()
+    requests = 500
+    path = "/api/bookings/?page_size=1"
+    max_age = connection.settings_dict["CONN_MAX_AGE"]
+
+    timings = {}
+    try:
+        for age in (0, 60):
+            connection.close()
+            connection.settings_dict["CONN_MAX_AGE"] = age
+
+            def run():
+                for _ in range(requests):
+                    wsgi_get(application, path)
+
+            timings[age] = best_of(run, repeat)
+            report(
+                stdout,
+                f"{requests} requests, CONN_MAX_AGE={age}",
+                timings[age],
+                requests,
+                "requests",
+            )
+        report(
+            stdout,
+            "connection setup per request",
+            (timings[0] - timings[60]) / requests,
+        )
+    finally:
+        connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+
+def contention_worker(options, seed, operations, barrier, results):
+    """Mixed booking writes and availability reads from one process."""
+    connection.settings_dict["OPTIONS"] = options
+    rng = random.Random(seed)
+    properties = list(Property.objects.values_list("pk", "price_per_night"))
+    guest_id = User.objects.values_list("pk", flat=True).get(username="bench-guest")
+    today = timezone.localdate()
+    done = locked = 0
+    barrier.wait()
+    for _ in range(operations):
+        property_id, price = rng.choice(properties)
+        start_date = today + timedelta(days=rng.randrange(365))
+        end_date = start_date + timedelta(days=rng.randrange(1, 5))
+        try:
+            if rng.random() < 0.2:
+                with transaction.atomic():
+                    booking = Booking.objects.create(
+                        property_id=property_id,
+                        user_id=guest_id,
+                        start_date=start_date,
+                        end_date=end_date,
+                        total_price=price * (end_date - start_date).days,
+                    )
+                    availability.sync_nights(booking)
+            else:
+                availability.is_available(property_id, start_date, end_date)
+            done += 1
+        except availability.BookingConflict:
+            done += 1
+        except OperationalError:
+            locked += 1
+    connection.close()
+    results.put((done, locked))
+
+
+@scenario
+def contention(stdout, rows, processes, seed, **options):
+    """Multi-process SQLite contention: default settings vs SQLITE_TUNING.
+
+    Every process runs the same mix of 80% availability reads and 20%
+    booking writes (booking plus night rows in one transaction). Failed
+    operations are the "database is locked" errors clients would see.
+    """
+    if connection.vendor != "sqlite":
+        stdout.write("contention only applies to SQLite databases")
+        return
+    rng = random.Random(seed)
+    make_properties(max(rows // 100, 1), rng)
+    make_bookings(rows, rng)
+    availability.rebuild_calendars()
+    default_options = dict(connection.settings_dict["OPTIONS"])
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = DELETE")
+    connection.close()
+
+    operations = 500
+    context = multiprocessing.get_context("fork")
+    profiles = (
+        ("default", {"timeout": 5}),
+        ("SQLITE_TUNING", {**default_options, **settings.SQLITE_TUNED_OPTIONS}),
+    )
+    stdout.write(f"{processes} processes x {operations} operations")
+    for label, profile in profiles:
+        barrier = context.Barrier(processes + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(
+                target=contention_worker,
+                args=(profile, seed + index, operations, barrier, results),
+            )
+            for index in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        started = time.perf_counter()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+        done = sum(completed for completed, _ in outcomes)
+        failed = sum(locked for _, locked in outcomes)
+        report(stdout, f"{label}: completed", elapsed, done, "ops")
+        stdout.write(f"{label + ': database is locked':<40} {failed:>10}")
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode = DELETE")
+
+
+@scenario
+@override_settings(
+    CACHES={
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "OPTIONS": {"MAX_ENTRIES": 10_000},
+        }
+    }
+)
+def quotes(stdout, properties, rows, repeat, seed, **options):
+    """30-night quotes: cached prefix-sum calendars vs per-night rate queries.
+
+    The cache holds every property's calendar, as a shared cache would; the
+    default local-memory cache culls at 300 entries.
+    """
+    rng = random.Random(seed)
+    properties = min(properties, 2000)
+    make_properties(properties, rng)
+    today = timezone.localdate()
+    RateOverride.objects.bulk_create(
+        RateOverride(
+            property_id=property_id,
+            start_date=today + timedelta(days=rng.randrange(0, 200)),
+            end_date=today + timedelta(days=rng.randrange(200, 365)),
+            weekdays=weekdays,
+            price_per_night=Decimal(rng.randrange(5000, 50000)) / 100,
+        )
+        for property_id in Property.objects.values_list("pk", flat=True)
+        for weekdays in (RateOverride.ALL_NIGHTS, RateOverride.WEEKEND_NIGHTS)
+    )
+    property_ids = list(Property.objects.values_list("pk", flat=True))
+    stays = []
+    for _ in range(rows):
+        start_date = today + timedelta(days=rng.randrange(0, 300))
+        stays.append(
+            (rng.choice(property_ids), start_date, start_date + timedelta(days=30))
+        )
+    batches = [stays[index : index + 500] for index in range(0, rows, 500)]
+
+    def batched():
+        for batch in batches:
+            pricing.quote_many(batch)
+
+    def per_night():
+        totals = []
+        for property_id, start_date, end_date in stays[:500]:
+            base = Property.objects.values_list("price_per_night", flat=True).get(
+                pk=property_id
+            )
+            total = 0
+            for night in availability.nights(start_date, end_date):
+                rates = RateOverride.objects.filter(
+                    property_id=property_id, start_date__lte=night, end_date__gt=night
+                ).order_by("pk")
+                total += pricing.nightly_rates(base, rates, night, 1)[0]
+            totals.append(Decimal(total).scaleb(-2))
+        return totals
+
+    assert per_night() == pricing.quote_many(stays[:500])
+    cache.clear()
+    report(stdout, "batched quotes (cold cache)", best_of(batched, 1), rows, "quotes")
+    report(
+        stdout, "batched quotes (warm cache)", best_of(batched, repeat), rows, "quotes"
+    )
+    report(stdout, "per-night queries", best_of(per_night, 1), 500, "quotes")
+
+
+@scenario
+def fulltext(stdout, rows, repeat, seed, **options):
+    """Listing search: FTS5 index vs icontains scan over titles and descriptions.
+
+    Descriptions are drawn from a Zipf-like vocabulary, so queries can ask
+    for frequent words, rare words and bare prefixes. The scan stops at the
+    first 20 matches in id order, which is cheap for frequent words but
+    reads the whole table when little or nothing matches.
+    """
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz"
+    vocabulary = sorted(
+        {"".join(rng.choices(alphabet, k=rng.randrange(4, 10))) for _ in range(20000)}
+    )
+    cum_weights = list(accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    def text(words):
+        return " ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=words))
+
+    started = time.perf_counter()
+    for start in range(0, rows, 10000):
+        Listing.objects.bulk_create(
+            Listing(title=text(4), description=text(40), price=Decimal("10.00"))
+            for _ in range(start, min(start + 10000, rows))
+        )
+    report(stdout, f"insert {rows} listings (indexed)", time.perf_counter() - started)
+
+    # The vocabulary is drawn by rank, so vocabulary[n] is the n-th most
+    # frequent word.
+    queries = {
+        "frequent word": vocabulary[50],
+        "two words": f"{vocabulary[200]} {vocabulary[300]}",
+        "rare word": vocabulary[15000],
+        "prefix": vocabulary[100][:4],
+        "no match": "zzzzzzzzzz",
+    }
+    for label, query in queries.items():
+        words = fts.terms(query)
+        report(
+            stdout,
+            f"{label}: FTS5 (ranked)",
+            best_of(lambda: fts.search(query), repeat),
+        )
+        report(
+            stdout,
+            f"{label}: icontains (unranked)",
+            best_of(lambda: fts._scanned_matches(words, 20), repeat),
+        )
+
+
+@scenario
+def bulk(stdout, seed, **options):
+    """1,000 listings and bookings: one bulk request vs sequential POSTs.
+
+    Measures the request path: confirmations and rollup refreshes are
+    published to the command's in-memory broker but not run, so both
+    paths pay for enqueueing and neither for the tasks. The target is a
+    10x speedup.
+    """
+    rng = random.Random(seed)
+    count = 1000
+    make_properties(100, rng)
+    client = APIClient()
+    client.force_authenticate(
+        User.objects.create_user(
+            username="bench-guest", email="bench-guest@example.com", password="x"
+        )
+    )
+    listings = [
+        {"title": f"Listing {index}", "description": "Bulk", "price": "10.00"}
+        for index in range(2 * count)
+    ]
+    # One night per stay, every stay free and inside the cached rate window.
+    today = timezone.localdate()
+    stays = [
+        {
+            "property": property_id,
+            "start_date": (today + timedelta(days=day)).isoformat(),
+            "end_date": (today + timedelta(days=day + 1)).isoformat(),
+        }
+        for property_id in Property.objects.values_list("pk", flat=True)
+        for day in range(2 * count // 100)
+    ]
+    rng.shuffle(stays)
+    pricing.rate_tables(Property.objects.values_list("pk", flat=True))
+
+    for label, url, items in (
+        ("listings", "/api/listings/", listings),
+        ("bookings", "/api/bookings/", stays),
+    ):
+        sequential, batch = items[:count], items[count:]
+
+        def post_each():
+            for item in sequential:
+                assert client.post(url, item, format="json").status_code == 201
+
+        def post_bulk():
+            response = client.post(f"{url}bulk/", batch, format="json")
+            assert all(result["status"] == 201 for result in response.data["results"])
+
+        with override_settings(CELERY_TASK_ALWAYS_EAGER=False):
+            one_by_one = best_of(post_each, 1)
+            together = best_of(post_bulk, 1)
+        report(stdout, f"{label}: sequential POSTs", one_by_one, count, "items")
+        report(stdout, f"{label}: one bulk POST", together, count, "items")
+        speedup = one_by_one / together
+        stdout.write(
+            f"{label}: speedup {speedup:.1f}x "
+            f"({'meets' if speedup >= 10 else 'misses'} the 10x target)"
+        )
+
+
+@scenario
+def occupancy(stdout, properties, bookings, repeat, seed, **options):
+    """30-day occupancy per location: rollup tables vs expanding bookings."""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    make_properties(properties, rng)
+    make_bookings(bookings, rng)
+    active = Booking.objects.filter(status__in=availability.ACTIVE_STATUSES)
+    rows = active.values_list("pk", "property_id", "start_date", "end_date")
+    BookingNight.objects.bulk_create(
+        (
+            BookingNight(booking_id=pk, property_id=property_id, date=night)
+            for pk, property_id, start_date, end_date in rows.iterator(10000)
+            for night in availability.nights(start_date, end_date)
+        ),
+        batch_size=10000,
+    )
+    Payment.objects.bulk_create(
+        (
+            Payment(booking_id=pk, amount=total)
+            for pk, total in active.filter(status=Booking.Status.CONFIRMED)
+            .values_list("pk", "total_price")
+            .iterator(10000)
+        ),
+        batch_size=10000,
+    )
+    report(
+        stdout,
+        f"generate {properties} properties/{bookings} bookings",
+        time.perf_counter() - started,
+    )
+    report(stdout, "rebuild rollups", best_of(rollups.rebuild, 1))
+
+    start_date = timezone.localdate()
+    end_date = start_date + timedelta(days=30)
+
+    def rolled_up():
+        return rollups.occupancy(start_date, end_date)
+
+    def expanded():
+        booked = {}
+        stays = active.filter(start_date__lt=end_date, end_date__gt=start_date)
+        for location, first, last in stays.values_list(
+            "property__location", "start_date", "end_date"
+        ):
+            nights = (min(last, end_date) - max(first, start_date)).days
+            booked[location] = booked.get(location, 0) + nights
+        return booked
+
+    assert {row["location"]: row["nights_booked"] for row in rolled_up()} == {
+        location: expanded().get(location, 0) for location in LOCATIONS
+    }
+    report(stdout, "occupancy by location (rollups)", best_of(rolled_up, repeat))
+    report(stdout, "occupancy by location (bookings)", best_of(expanded, repeat))
+    report(
+        stdout,
+        "occupancy by day (rollups)",
+        best_of(
+            lambda: rollups.occupancy(start_date, end_date, group_by="date"), repeat
+        ),
+    )
+
+
+@scenario
+def reports(stdout, properties, bookings, repeat, seed, **options):
+    """Monthly booking report: columnar batches vs model instances."""
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    make_properties(properties, rng)
+    make_bookings(bookings, rng)
+    methods = Payment.PaymentMethod.values
+    Payment.objects.bulk_create(
+        (
+            Payment(booking_id=pk, amount=total, payment_method=rng.choice(methods))
+            for pk, total in Booking.objects.filter(
+                status__in=availability.ACTIVE_STATUSES
+            )
+            .values_list("pk", "total_price")
+            .iterator(10000)
+        ),
+        batch_size=10000,
+    )
+    report(
+        stdout,
+        f"generate {properties} properties/{bookings} bookings",
+        time.perf_counter() - started,
+    )
+
+    start_date = timezone.localdate() - timedelta(days=60)
+    end_date = start_date + timedelta(days=3650)
+
+    def instances():
+        months, revenue = {}, {}
+        stays = Booking.objects.filter(
+            start_date__gte=start_date, start_date__lt=end_date
+        )
+        for booking in stays.iterator(10000):
+            key = f"{booking.start_date:%Y-%m}"
+            sums = months.setdefault(key, [0, 0, 0, 0])
+            sums[0] += 1
+            if booking.status == Booking.Status.CANCELLED:
+                sums[1] += 1
+            else:
+                sums[2] += 1
+                sums[3] += (booking.end_date - booking.start_date).days
+        paid = Payment.objects.filter(
+            booking__in=stays.filter(status__in=availability.ACTIVE_STATUSES)
+        ).select_related("booking")
+        for payment in paid.iterator(10000):
+            key = (payment.booking.property_id, f"{payment.booking.start_date:%Y-%m}")
+            revenue[key] = revenue.get(key, Decimal("0.00")) + payment.amount
+        return months, revenue
+
+    def columnar(engine):
+        return reports_module.build_report(
+            start_date, end_date, by_property=True, engine=engine
+        )
+
+    months, revenue = instances()
+    engines = ["array"] + (["numpy"] if reports_module.numpy else [])
+    for engine in engines:
+        result = columnar(engine)
+        assert {
+            row["month"]: [row["bookings"], row["cancelled"]]
+            for row in result["months"]
+        } == {month: sums[:2] for month, sums in months.items()}
+        assert {
+            (row["property"], row["month"]): row["revenue"]
+            for row in result["properties"]
+        } == revenue
+
+    count = Booking.objects.count() + Payment.objects.count()
+    report(stdout, "model instances", best_of(instances, repeat), count)
+    for engine in engines:
+        report(
+            stdout,
+            f"columnar ({engine})",
+            best_of(lambda: columnar(engine), repeat),
+            count,
+        )
+
+
+@scenario
+def schema(stdout, repeat, seed, **options):
+    """OpenAPI schema: pre-generated artifact vs drf-yasg per request."""
+    from alx_travel_app.urls import schema_view
+
+    factory = RequestFactory()
+    generated = schema_view.without_ui(cache_timeout=0)
+
+    def per_request():
+        response = generated(factory.get("/swagger.json/"), format="json")
+        response.render()
+        return response
+
+    with tempfile.TemporaryDirectory() as directory:
+        report(
+            stdout,
+            "generate_schema",
+            best_of(lambda: openapi_schema.write_schema(directory), 1),
+        )
+        with override_settings(OPENAPI_SCHEMA_DIR=directory):
+            openapi_schema.load_schema.cache_clear()
+            served = openapi_schema.SchemaView.as_view()
+            report(
+                stdout,
+                "first request (load + fingerprint)",
+                best_of(lambda: served(factory.get("/"), format="json"), 1),
+            )
+            gzipped = served(
+                factory.get("/", HTTP_ACCEPT_ENCODING="gzip"), format="json"
+            )
+            plain = served(factory.get("/"), format="json")
+            # Generated without a request, the artifact leaves out the host.
+            expected = json.loads(per_request().content)
+            del expected["host"], expected["schemes"]
+            assert json.loads(plain.content) == expected
+            stdout.write(
+                f"{len(plain.content):,} bytes, {len(gzipped.content):,} gzipped"
+            )
+            rounds = max(repeat, 1) * 20
+            report(
+                stdout,
+                "drf-yasg per request",
+                best_of(per_request, repeat),
+            )
+            report(
+                stdout,
+                "artifact (gzip)",
+                best_of(
+                    lambda: served(
+                        factory.get("/", HTTP_ACCEPT_ENCODING="gzip"), format="json"
+                    ),
+                    rounds,
+                ),
+            )
+            report(
+                stdout,
+                "artifact (If-None-Match, 304)",
+                best_of(
+                    lambda: served(
+                        factory.get("/", HTTP_IF_NONE_MATCH=plain["ETag"]),
+                        format="json",
+                    ),
+                    rounds,
+                ),
+            )
+        openapi_schema.load_schema.cache_clear()
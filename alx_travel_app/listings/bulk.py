@@ -0,0 +1,149 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.serializers import as_serializer_error
+
+
+class BulkWriteMixin:
+    """Adds a ``bulk`` action writing a whole batch in one request.
+
+    The body is a JSON array: objects to create (``POST``), partial objects
+    with their ``id`` to update (``PATCH``) or ids to delete (``DELETE``).
+    Every item is validated first, then the valid ones are written together
+    in one transaction with ``bulk_create``/``bulk_update``; invalid items
+    are skipped. The response has one result per item, in request order,
+    with the item's ``status`` and its ``data`` or ``errors``.
+
+    Viewsets preload related rows in ``get_bulk_context``, check the batch
+    as a whole in ``validate_batch`` and extend the write in ``bulk_write``.
+    """
+
+    bulk_max_items = 1000
+    bulk_batch_size = 500
+
+    @action(detail=False, methods=["post", "patch", "delete"])
+    def bulk(self, request):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError({"non_field_errors": ["Expected a non-empty list."]})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                {"non_field_errors": [f"At most {self.bulk_max_items} items."]}
+            )
+        if request.method == "DELETE":
+            results = self.bulk_destroy(items)
+        else:
+            results = self.bulk_save(items, partial=request.method == "PATCH")
+        return Response({"results": results})
+
+    def get_bulk_context(self, items):
+        return {}
+
+    def get_bulk_create_kwargs(self):
+        return {}
+
+    def validate_batch(self, validated):
+        """Check ``{index: (instance, attrs)}`` items as a batch.
+
+        ``attrs`` may be amended in place. Returns ``{index: errors}`` for
+        the items that must not be written.
+        """
+        return {}
+
+    def bulk_save(self, items, partial):
+        results = [None] * len(items)
+        instances = {}
+        if partial:
+            ids = [item.get("id") for item in items if isinstance(item, dict)]
+            instances = self.get_queryset().in_bulk(
+                [pk for pk in ids if isinstance(pk, int)]
+            )
+        context = {**self.get_serializer_context(), **self.get_bulk_context(items)}
+        serializer_class = self.get_serializer_class()
+        # One serializer validates every item: building a serializer's
+        # fields costs more than validating an item with them.
+        serializer = serializer_class(partial=partial, context=context)
+        validated = {}
+        for index, item in enumerate(items):
+            instance = None
+            if partial:
+                instance = (
+                    instances.get(item.get("id")) if isinstance(item, dict) else None
+                )
+                if instance is None:
+                    results[index] = self.bulk_not_found()
+                    continue
+            serializer.instance = instance
+            try:
+                validated[index] = (instance, serializer.run_validation(item))
+            except ValidationError as exc:
+                results[index] = self.bulk_error(as_serializer_error(exc))
+        for index, errors in self.validate_batch(validated).items():
+            results[index] = self.bulk_error(errors)
+            del validated[index]
+
+        saved = {}
+        for index, (instance, attrs) in validated.items():
+            if partial:
+                for name, value in attrs.items():
+                    setattr(instance, name, value)
+                saved[index] = instance
+            else:
+                saved[index] = self.queryset.model(
+                    **attrs, **self.get_bulk_create_kwargs()
+                )
+        if saved:
+            fields = set().union(*(attrs for _, attrs in validated.values()))
+            with transaction.atomic():
+                self.bulk_write(list(saved.values()), fields if partial else None)
+        code = status.HTTP_200_OK if partial else status.HTTP_201_CREATED
+        data = serializer_class(list(saved.values()), many=True, context=context).data
+        for index, item in zip(saved, data):
+            results[index] = {"status": code, "data": item}
+        return results
+
+    def bulk_write(self, instances, fields=None):
+        """Insert ``instances``, or update ``fields`` of them when given."""
+        manager = self.queryset.model._default_manager
+        if fields is None:
+            if connection.features.can_return_rows_from_bulk_insert:
+                manager.bulk_create(instances, batch_size=self.bulk_batch_size)
+            else:
+                for instance in instances:
+                    instance.save(force_insert=True)
+            return
+        now = timezone.now()
+        for field in self.queryset.model._meta.concrete_fields:
+            if getattr(field, "auto_now", False):
+                fields = {*fields, field.name}
+                for instance in instances:
+                    setattr(instance, field.attname, now)
+        manager.bulk_update(instances, fields, batch_size=self.bulk_batch_size)
+
+    def bulk_destroy(self, ids):
+        found = self.get_queryset().in_bulk([pk for pk in ids if isinstance(pk, int)])
+        if found:
+            with transaction.atomic():
+                self.bulk_delete(list(found.values()))
+        return [
+            (
+                {"status": status.HTTP_204_NO_CONTENT}
+                if isinstance(pk, int) and pk in found
+                else self.bulk_not_found()
+            )
+            for pk in ids
+        ]
+
+    def bulk_delete(self, instances):
+        self.queryset.model._default_manager.filter(
+            pk__in=[instance.pk for instance in instances]
+        ).delete()
+
+    def bulk_not_found(self):
+        return {"status": status.HTTP_404_NOT_FOUND, "errors": {"detail": "Not found."}}
+
+    def bulk_error(self, errors):
+        return {"status": status.HTTP_400_BAD_REQUEST, "errors": errors}
@@ -0,0 +1,133 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from listings.routers import reads_pinned
+
+LIST_VERSION_KEY = "listings:list:version"
+
+
+def _fresh_version():
+    # Seeded from the clock so a version key lost to eviction can never
+    # come back with a number that older, still-cached entries used.
+    return int(time.time() * 1000)
+
+
+def current_version(version_key):
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _fresh_version(), timeout=None)
+        version = cache.get(version_key)
+    return version
+
+
+def bump_version(version_key):
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.add(version_key, _fresh_version(), timeout=None)
+    if getattr(settings, "DATABASE_REPLICAS", None):
+        cache.set(settling_key(version_key), 1, settings.REPLICA_PIN_SECONDS)
+
+
+def settling_key(version_key):
+    return f"{version_key}:settling"
+
+
+def replicas_settling(version_key):
+    """True while replicas may still lag behind the last bump of the key."""
+    return bool(
+        getattr(settings, "DATABASE_REPLICAS", None)
+        and cache.get(settling_key(version_key))
+    )
+
+
+def detail_version_key(pk):
+    return f"listings:detail:{pk}:version"
+
+
+def list_key(request):
+    query = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f"listings:list:{current_version(LIST_VERSION_KEY)}:{query}"
+
+
+def detail_key(pk):
+    return f"listings:detail:{pk}:{current_version(detail_version_key(pk))}"
+
+
+def invalidate_listing(pk):
+    """Retire the listing's detail payload and every cached list page."""
+    bump_version(detail_version_key(pk))
+    bump_version(LIST_VERSION_KEY)
+
+
+class CachedReadMixin:
+    """Read-through cache for ``list`` and ``retrieve`` with ETag support.
+
+    Serialized payloads are stored under versioned keys together with the
+    validators of the response that produced them (or an ETag of their
+    JSON encoding if it had none). A request whose validators match the
+    cached ones gets a 304 without touching the database.
+    """
+
+    cache_timeout = getattr(settings, "LISTING_CACHE_TIMEOUT", 300)
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            list_key(request),
+            LIST_VERSION_KEY,
+            lambda: super(CachedReadMixin, self).list(request, *args, **kwargs),
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            return super().retrieve(request, *args, **kwargs)
+        return self.cached_response(
+            request,
+            detail_key(pk),
+            detail_version_key(pk),
+            lambda: super(CachedReadMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def cached_response(self, request, key, version_key, compute):
+        # A client pinned to the primary after its own write must not be
+        # served an entry another client filled from a lagging replica; its
+        # fresh result replaces the entry instead.
+        pinned = reads_pinned()
+        entry = None if pinned else cache.get(key)
+        if entry is None:
+            response = compute()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+            # Nor is a replica read stored under the new version while the
+            # replicas may still lag behind the write that bumped it.
+            store = pinned or not replicas_settling(version_key)
+            etag = response.get("ETag")
+            if etag is None:
+                body = JSONRenderer().render(response.data)
+                etag = quote_etag(hashlib.md5(body).hexdigest())
+            last_modified = response.get("Last-Modified")
+            entry = {
+                "etag": etag,
+                "last_modified": last_modified and parse_http_date(last_modified),
+                "data": response.data,
+            }
+            if store:
+                cache.set(key, entry, self.cache_timeout)
+        response = get_conditional_response(
+            request, etag=entry["etag"], last_modified=entry["last_modified"]
+        ) or Response(entry["data"])
+        response["ETag"] = entry["etag"]
+        if entry["last_modified"] is not None:
+            response["Last-Modified"] = http_date(entry["last_modified"])
+        return response
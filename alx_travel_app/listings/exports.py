@@ -0,0 +1,58 @@
+from django.db import connections, models
+
+
+def _iso(value):
+    if value is None:
+        return None
+    value = value.isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def converters(model, fields):
+    """Return one function per column turning DB values into export values."""
+    result = []
+    for name in fields:
+        field = model._meta.get_field(name)
+        if isinstance(field, (models.DateTimeField, models.DateField)):
+            result.append(_iso)
+        elif isinstance(field, models.DecimalField):
+            result.append(_text)
+        else:
+            result.append(None)
+    return result
+
+
+def export_rows(queryset, fields, chunk_size=2000):
+    """Yield converted value tuples for ``fields`` in primary key order.
+
+    Rows are read with a server-side iterator so memory stays flat. MySQL
+    drivers buffer whole result sets, so there the table is walked in
+    primary key ranges of ``chunk_size`` instead.
+    """
+    convert = list(enumerate(converters(queryset.model, fields)))
+    convert = [(index, func) for index, func in convert if func]
+    queryset = queryset.order_by("pk").values_list("pk", *fields)
+    if connections[queryset.db].vendor == "mysql":
+        rows = _keyset_chunks(queryset, chunk_size)
+    else:
+        rows = queryset.iterator(chunk_size=chunk_size)
+    for row in rows:
+        row = list(row[1:])
+        for index, func in convert:
+            row[index] = func(row[index])
+        yield row
+
+
+def _keyset_chunks(queryset, chunk_size):
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+        yield from chunk
+        last = chunk[-1][0]
@@ -0,0 +1,166 @@
+"""Read-only serialization of ``.values()`` rows for list endpoints.
+
+``ModelSerializer`` walks every field of every instance through attribute
+lookups and ``to_representation`` dispatch. For list responses the same
+output can be produced from plain ``.values()`` dicts with one converter
+per column, chosen once per serializer class. Fields the plan does not
+understand make ``compile_plan`` return ``None`` and callers fall back to
+the regular serializer, so output is always identical to DRF's.
+"""
+
+import datetime
+import decimal
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import fields as drf_fields
+from rest_framework import relations
+from rest_framework.settings import api_settings
+
+# Field classes whose to_representation is the identity on values read
+# from a matching model column.
+PASSTHROUGH = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.ChoiceField,
+    drf_fields.IntegerField,
+    drf_fields.ReadOnlyField,
+    relations.PrimaryKeyRelatedField,
+)
+
+
+def _column(model, field):
+    """Return the ``.values()`` column backing a serializer field, if any."""
+    source_attrs = field.source_attrs
+    if not source_attrs or isinstance(field, relations.ManyRelatedField):
+        return None
+    if getattr(field, "pk_field", None) is not None:
+        return None
+    try:
+        model_field = model._meta.get_field(source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete or model_field.many_to_many:
+        return None
+    if model_field.many_to_one and not isinstance(
+        field, (relations.PrimaryKeyRelatedField, drf_fields.ReadOnlyField)
+    ):
+        return None
+    if len(source_attrs) == 1:
+        return model_field.attname
+    if (
+        len(source_attrs) == 2
+        and model_field.many_to_one
+        and model_field.target_field.name == source_attrs[1]
+    ):
+        return model_field.attname
+    return None
+
+
+# Converter factories take the request's timezone and decimal context and
+# return a one-argument function applied to every non-null value.
+
+
+def _fallback(field):
+    return lambda tz, context: field.to_representation
+
+
+def _datetime_converter(field):
+    if getattr(field, "format", api_settings.DATETIME_FORMAT) != drf_fields.ISO_8601:
+        return _fallback(field)
+
+    def build(tz, context):
+        def convert(value):
+            if tz is None or value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(tz).isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+        return convert
+
+    return build
+
+
+def _date_converter(field):
+    if getattr(field, "format", api_settings.DATE_FORMAT) != drf_fields.ISO_8601:
+        return _fallback(field)
+    return lambda tz, context: datetime.date.isoformat
+
+
+def _decimal_converter(field):
+    coerce = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce or field.localize or field.normalize_output:
+        return _fallback(field)
+    if field.decimal_places is None:
+        return lambda tz, context: "{:f}".format
+    exponent = decimal.Decimal(".1") ** field.decimal_places
+    rounding = field.rounding
+
+    def build(tz, context):
+        context = context.copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+
+        def convert(value):
+            return f"{value.quantize(exponent, rounding=rounding, context=context):f}"
+
+        return convert
+
+    return build
+
+
+def _converter(field):
+    if isinstance(field, drf_fields.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, drf_fields.DateField):
+        return _date_converter(field)
+    if isinstance(field, drf_fields.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, PASSTHROUGH):
+        return None
+    return _fallback(field)
+
+
+class RowPlan:
+    """Precompiled column-to-output mapping for one serializer class."""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.columns = list(dict.fromkeys(column for _, column, _ in fields))
+
+    def serialize(self, rows):
+        """Return the list DRF would produce for the given ``.values()`` rows."""
+        tz = drf_fields.DateTimeField().default_timezone()
+        context = decimal.getcontext()
+        steps = [
+            (name, column, build(tz, context) if build else None)
+            for name, column, build in self.fields
+        ]
+        result = []
+        append = result.append
+        for row in rows:
+            item = {}
+            for name, column, convert in steps:
+                value = row[column]
+                if value is None or convert is None:
+                    item[name] = value
+                else:
+                    item[name] = convert(value)
+            append(item)
+        return result
+
+
+@lru_cache(maxsize=None)
+def compile_plan(serializer_class):
+    """Return a ``RowPlan`` for ``serializer_class`` or ``None`` if unsupported."""
+    serializer = serializer_class()
+    model = getattr(getattr(serializer, "Meta", None), "model", None)
+    if model is None:
+        return None
+    fields = []
+    for field in serializer._readable_fields:
+        column = _column(model, field)
+        if column is None:
+            return None
+        fields.append((field.field_name, column, _converter(field)))
+    return RowPlan(fields)
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from listings.benchmarks import SCENARIOS
+
+
+class Command(BaseCommand):
+    help = "Run a benchmark scenario against a throwaway copy of the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument("scenario", choices=sorted(SCENARIOS))
+        parser.add_argument("--properties", type=int, default=50_000)
+        parser.add_argument("--bookings", type=int, default=5_000_000)
+        parser.add_argument("--rows", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--concurrency", type=int, default=500)
+        parser.add_argument("--processes", type=int, default=8)
+
+    def handle(self, *args, **options):
+        scenario = SCENARIOS[options.pop("scenario")]
+        self.stdout.write(scenario.__doc__.strip().splitlines()[0])
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False
+        )
+        # Load generated here must measure the endpoints, not the throttle,
+        # and tasks the endpoints queue run inline instead of waiting on a
+        # broker that may not be running.
+        isolated = override_settings(
+            REST_FRAMEWORK={
+                **settings.REST_FRAMEWORK,
+                "DEFAULT_THROTTLE_RATES": {"anon": None, "user": None},
+            },
+            CELERY_BROKER_URL="memory://",
+            CELERY_TASK_ALWAYS_EAGER=True,
+        )
+        try:
+            with isolated:
+                scenario(self.stdout, **options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
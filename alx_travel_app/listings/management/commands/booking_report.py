@@ -0,0 +1,39 @@
+import json
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from listings import reports
+
+
+class Command(BaseCommand):
+    help = "Print the monthly booking and revenue report as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument("start_date", type=date.fromisoformat)
+        parser.add_argument("end_date", type=date.fromisoformat)
+        parser.add_argument(
+            "--by-property",
+            action="store_true",
+            help="Include revenue per property and month",
+        )
+        parser.add_argument(
+            "--engine",
+            choices=reports.ENGINES,
+            help="Force the NumPy or stdlib array implementation",
+        )
+
+    def handle(self, *args, **options):
+        if options["end_date"] <= options["start_date"]:
+            raise CommandError("The end date must be after the start date.")
+        try:
+            report = reports.build_report(
+                options["start_date"],
+                options["end_date"],
+                by_property=options["by_property"],
+                engine=options["engine"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from listings.schema import write_schema
+
+
+class Command(BaseCommand):
+    help = "Render the OpenAPI schema into the static artifact the API serves"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default=settings.OPENAPI_SCHEMA_DIR,
+            help="Directory to write the schema files into",
+        )
+
+    def handle(self, *args, **options):
+        fingerprint = write_schema(options["output"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote OpenAPI schema to {options['output']} ({fingerprint[:12]})"
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from listings.availability import rebuild_calendars
+
+
+class Command(BaseCommand):
+    help = "Roll every property's occupancy bitmap forward to start today"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows read and written per database round trip",
+        )
+
+    def handle(self, *args, **options):
+        booked = rebuild_calendars(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt calendars ({booked} properties with bookings)")
+        )
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from listings.ratings import drifted_properties, refresh_ratings
+
+
+class Command(BaseCommand):
+    help = "Recount every property's rating aggregates from its reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only report properties whose aggregates have drifted",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows read and written per database round trip",
+        )
+
+    def handle(self, *args, **options):
+        drifted = list(drifted_properties(batch_size=options["batch_size"]))
+        if options["check"]:
+            if drifted:
+                raise CommandError(
+                    f"{len(drifted)} properties have drifted rating aggregates, "
+                    f"e.g. {drifted[:10]}."
+                )
+            self.stdout.write(self.style.SUCCESS("Rating aggregates are in sync"))
+            return
+        refresh_ratings(drifted, batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Recounted ratings ({len(drifted)} had drifted)")
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from listings.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily occupancy and revenue rollups from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Properties read per round trip",
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt rollups ({written} property days)")
+        )
@@ -1,352 +1,432 @@
 import random
+from itertools import islice
+from datetime import date, timedelta
 from decimal import Decimal
-from datetime import datetime, timedelta, date
 
-from django.core.management.base import BaseCommand
 from django.contrib.auth.hashers import make_password
-from django.utils import lorem_ipsum
-from listings.models import User, Property, Booking, Review, Payment, Message, Listing
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from listings.availability import ACTIVE_STATUSES, rebuild_calendars
+from listings.cache import LIST_VERSION_KEY, bump_version
+from listings.messaging import rebuild_threads
+from listings.models import (
+    User,
+    Property,
+    Booking,
+    BookingNight,
+    Review,
+    Payment,
+    Message,
+    Listing,
+    PropertyCalendar,
+    RateOverride,
+    Conversation,
+    ConversationMember,
+    DailyLocationStats,
+    DailyPropertyStats,
+)
+from listings.ratings import refresh_ratings
+from listings.rollups import rebuild as rebuild_rollups
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "Daniel", "Emma", "Frank", "Grace", "Henry",
+    "John", "Sarah", "Mike", "Eva", "David", "Olivia", "Liam", "Zara",
+]  # fmt: skip
+LAST_NAMES = [
+    "Smith", "Johnson", "Wilson", "Brown", "Davis", "Miller", "Taylor",
+    "Anderson", "Thomas", "Jackson", "White", "Harris", "Martin", "Clark",
+]  # fmt: skip
+LOCATIONS = [
+    "Miami, FL", "Aspen, CO", "New York, NY", "Boston, MA", "Lake Tahoe, CA",
+    "Phoenix, AZ", "Napa Valley, CA", "Hawaii, HI", "Park City, UT",
+    "Sonoma, CA", "Austin, TX", "Seattle, WA", "Denver, CO", "Chicago, IL",
+]  # fmt: skip
+PROPERTY_KINDS = [
+    "Beach House", "Mountain Cabin", "Urban Loft", "Historic Townhouse",
+    "Lakefront Villa", "Desert Oasis", "Farmhouse", "Bungalow", "Ski Lodge",
+    "Estate",
+]  # fmt: skip
+REVIEW_COMMENTS = [
+    "Excellent property with amazing views!",
+    "Perfect location and very clean accommodations.",
+    "Great host, very responsive and helpful.",
+    "Good value for money, comfortable stay.",
+    "Nice property but could use some improvements.",
+]
+MESSAGE_TEMPLATES = [
+    "Hi! Is the property available for the dates I selected?",
+    "Could you provide more information about the amenities?",
+    "Is there a late check-in option available?",
+    "Could you recommend some good restaurants in the area?",
+    "Thank you for hosting us! We had a wonderful time.",
+]
+REPLIES = [
+    "Thank you for your message! I will get back to you soon.",
+    "The property is available.",
+    "Looking forward to hosting you!",
+]
 
 
 class Command(BaseCommand):
-    help = 'Seed the database with sample data for the travel app'
+    help = "Seed the database with a reproducible synthetic dataset"
 
     def add_arguments(self, parser):
         parser.add_argument(
-            '--clear',
-            action='store_true',
-            help='Clear existing data before seeding',
+            "--clear",
+            action="store_true",
+            help="Clear existing data before seeding",
+        )
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--properties", type=int, default=200)
+        parser.add_argument("--bookings-per-property", type=int, default=20)
+        parser.add_argument("--listings", type=int, default=50)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed; the same seed and start date give the same data",
+        )
+        parser.add_argument(
+            "--start-date",
+            type=date.fromisoformat,
+            default=None,
+            help="Day the generated booking history is centred on (default today)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows written per INSERT",
+        )
+        parser.add_argument(
+            "--skip-rollups",
+            action="store_true",
+            help="Leave the report rollups empty; run rebuild_rollups later",
         )
 
     def handle(self, *args, **options):
-        if options['clear']:
-            self.stdout.write('Clearing existing data...')
-            self.clear_data()
+        if options["users"] < 2:
+            raise CommandError("--users must be at least 2 (one host, one guest).")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.start_date = options["start_date"] or timezone.localdate()
+
+        with transaction.atomic():
+            if options["clear"]:
+                self.stdout.write("Clearing existing data...")
+                self.clear_data()
+            if User.objects.filter(username__in=["host0", "guest0"]).exists():
+                raise CommandError("Database is already seeded; pass --clear.")
+
+            self.stdout.write("Starting to seed database...")
+            hosts, guests = self.seed_users(options["users"])
+            properties = self.seed_properties(hosts, options["properties"])
+            self.seed_listings(options["listings"])
+            self.seed_bookings(properties, guests, options["bookings_per_property"])
+            self.seed_messages(hosts, guests)
+            self.reset_sequences()
+            booked = rebuild_calendars(batch_size=self.batch_size)
+            self.stdout.write(f"Rebuilt calendars for {booked} booked properties")
+            refresh_ratings()
+            if not options["skip_rollups"]:
+                days = rebuild_rollups()
+                self.stdout.write(f"Rolled up {days} property days")
+        bump_version(LIST_VERSION_KEY)
 
-        self.stdout.write('Starting to seed database...')
-        
-        # Create users first (required for other models)
-        users = self.seed_users()
-        
-        # Create properties and listings
-        properties = self.seed_properties(users)
-        listings = self.seed_listings()
-        
-        # Create bookings
-        bookings = self.seed_bookings(properties, users)
-        
-        # Create reviews
-        self.seed_reviews(properties, users)
-        
-        # Create payments
-        self.seed_payments(bookings)
-        
-        # Create messages
-        self.seed_messages(users)
-        
         self.stdout.write(
-            self.style.SUCCESS('Successfully seeded database with sample data!')
+            self.style.SUCCESS("Successfully seeded database with sample data!")
         )
 
     def clear_data(self):
-        """Clear all existing data"""
-        Message.objects.all().delete()
-        Payment.objects.all().delete()
-        Review.objects.all().delete()
-        Booking.objects.all().delete()
-        Property.objects.all().delete()
+        """Clear all existing data.
+
+        The large tables are emptied children first with plain DELETEs;
+        going through the ORM would load every booking to collect cascades.
+        """
+        with connection.cursor() as cursor:
+            for model in (
+                DailyPropertyStats,
+                DailyLocationStats,
+                BookingNight,
+                PropertyCalendar,
+                RateOverride,
+                Payment,
+                Review,
+                ConversationMember,
+                Message,
+                Conversation,
+                Booking,
+                Property,
+            ):
+                cursor.execute(
+                    "DELETE FROM %s" % connection.ops.quote_name(model._meta.db_table)
+                )
         Listing.objects.all().delete()
         User.objects.filter(is_superuser=False).delete()
-        self.stdout.write('Existing data cleared.')
+        self.stdout.write("Existing data cleared.")
+
+    def next_pk(self, model):
+        return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+    def insert(self, model, objs):
+        """Bulk insert model instances with primary keys assigned up front.
+
+        Assigning keys here instead of reading them back lets related rows
+        reference them on every backend.
+        """
+        for pk, obj in enumerate(objs, start=self.next_pk(model)):
+            obj.pk = pk
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        return len(objs)
 
-    def seed_users(self):
-        """Create sample users"""
-        self.stdout.write('Creating users...')
-        
-        # Create admin user
-        admin_user = User.objects.create_user(
-            username='admin',
-            email='admin@travelapp.com',
-            password='admin123',
-            first_name='Admin',
-            last_name='User',
-            phone_number='+1234567890',
-            role=User.Role.ADMIN,
-            is_staff=True,
-            is_superuser=True
+    def insert_rows(self, model, fields, rows, after=None):
+        """Insert plain value tuples for ``fields`` with ``executemany``.
+
+        Used for the tables that grow with the dataset: skipping model
+        instances and per-value SQL compilation is most of the cost of a
+        million-row seed. Values must already be in a form the driver
+        accepts. The primary key is prepended to each row, and ``after`` is
+        called with every inserted batch so dependent rows can be written
+        while it is still in memory.
+        """
+        opts = model._meta
+        quote = connection.ops.quote_name
+        columns = [opts.pk.column] + [opts.get_field(name).column for name in fields]
+        sql = "INSERT INTO %s (%s) VALUES (%s)" % (
+            quote(opts.db_table),
+            ", ".join(map(quote, columns)),
+            ", ".join(["%s"] * len(columns)),
         )
-        
-        # Create host users
-        hosts = []
-        host_names = [
-            ('John', 'Smith', 'john.smith@email.com', '+1111111111'),
-            ('Sarah', 'Johnson', 'sarah.johnson@email.com', '+2222222222'),
-            ('Mike', 'Wilson', 'mike.wilson@email.com', '+3333333333'),
-            ('Emma', 'Brown', 'emma.brown@email.com', '+4444444444'),
-            ('David', 'Davis', 'david.davis@email.com', '+5555555555'),
+        next_pk = self.next_pk(model)
+        rows = iter(rows)
+        count = 0
+        with connection.cursor() as cursor:
+            while batch := list(islice(rows, self.batch_size)):
+                batch = [(next_pk + index, *row) for index, row in enumerate(batch)]
+                next_pk += len(batch)
+                cursor.executemany(sql, batch)
+                if after:
+                    after(batch)
+                count += len(batch)
+        return count
+
+    def created(self, label, count):
+        self.stdout.write(f"Created {count} {label}")
+
+    def reset_sequences(self):
+        """Move autoincrement sequences past the explicitly assigned keys."""
+        models = [
+            User,
+            Property,
+            Listing,
+            Booking,
+            BookingNight,
+            Review,
+            Payment,
+            Message,
         ]
-        
-        for first_name, last_name, email, phone in host_names:
-            host = User.objects.create_user(
-                username=f"{first_name.lower()}.{last_name.lower()}",
-                email=email,
-                password='password123',
-                first_name=first_name,
-                last_name=last_name,
-                phone_number=phone,
-                role=User.Role.HOST
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    def seed_users(self, count):
+        """Create the admin plus hosts and guests sharing one password hash."""
+        if not User.objects.filter(username="admin").exists():
+            User.objects.create_superuser(
+                username="admin",
+                email="admin@travelapp.com",
+                password="admin123",
+                first_name="Admin",
+                last_name="User",
+                phone_number="+1234567890",
+                role=User.Role.ADMIN,
             )
-            hosts.append(host)
-        
-        # Create guest users
-        guests = []
-        guest_names = [
-            ('Alice', 'Williams', 'alice.williams@email.com', '+6666666666'),
-            ('Bob', 'Miller', 'bob.miller@email.com', '+7777777777'),
-            ('Carol', 'Taylor', 'carol.taylor@email.com', '+8888888888'),
-            ('Daniel', 'Anderson', 'daniel.anderson@email.com', '+9999999999'),
-            ('Eva', 'Thomas', 'eva.thomas@email.com', '+1010101010'),
-            ('Frank', 'Jackson', 'frank.jackson@email.com', '+1212121212'),
-            ('Grace', 'White', 'grace.white@email.com', '+1313131313'),
-            ('Henry', 'Harris', 'henry.harris@email.com', '+1414141414'),
-        ]
-        
-        for first_name, last_name, email, phone in guest_names:
-            guest = User.objects.create_user(
-                username=f"{first_name.lower()}.{last_name.lower()}",
-                email=email,
-                password='password123',
-                first_name=first_name,
-                last_name=last_name,
-                phone_number=phone,
-                role=User.Role.GUEST
+        password = make_password("password123")
+        host_count = max(count // 5, 1)
+        users = []
+        for index in range(count):
+            if index < host_count:
+                username = f"host{index}"
+            else:
+                username = f"guest{index - host_count}"
+            users.append(
+                User(
+                    username=username,
+                    email=f"{username}@example.com",
+                    password=password,
+                    first_name=self.rng.choice(FIRST_NAMES),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    phone_number=f"+1{self.rng.randrange(10**9, 10**10)}",
+                    role=User.Role.HOST if index < host_count else User.Role.GUEST,
+                )
             )
-            guests.append(guest)
-        
-        self.stdout.write(f'Created {len(hosts) + len(guests) + 1} users')
-        return {'admin': admin_user, 'hosts': hosts, 'guests': guests}
+        self.created("users", self.insert(User, users))
+        return users[:host_count], users[host_count:]
 
-    def seed_properties(self, users):
-        """Create sample properties"""
-        self.stdout.write('Creating properties...')
-        
-        properties = []
-        property_data = [
-            ('Cozy Beach House', 'A beautiful beachfront property with stunning ocean views', 'Miami, FL', 150.00),
-            ('Mountain Cabin Retreat', 'Peaceful cabin nestled in the mountains with hiking trails nearby', 'Aspen, CO', 200.00),
-            ('Urban Loft', 'Modern loft in the heart of downtown with city skyline views', 'New York, NY', 180.00),
-            ('Historic Townhouse', 'Charming historic townhouse with original architectural details', 'Boston, MA', 220.00),
-            ('Lakefront Villa', 'Luxurious villa on the lake with private dock and boat access', 'Lake Tahoe, CA', 350.00),
-            ('Desert Oasis', 'Unique desert property with swimming pool and cactus garden', 'Phoenix, AZ', 120.00),
-            ('Countryside Farmhouse', 'Rustic farmhouse surrounded by rolling hills and farmland', 'Napa Valley, CA', 160.00),
-            ('Tropical Paradise', 'Beachside bungalow with palm trees and tropical gardens', 'Hawaii, HI', 280.00),
-            ('Ski Lodge', 'Cozy lodge near ski slopes with fireplace and hot tub', 'Park City, UT', 250.00),
-            ('Wine Country Estate', 'Elegant estate in wine country with vineyard views', 'Sonoma, CA', 400.00),
-        ]
-        
-        for i, (name, description, location, price) in enumerate(property_data):
-            host = users['hosts'][i % len(users['hosts'])]
-            property_obj = Property.objects.create(
-                host_id=host,
-                name=name,
-                description=description,
-                location=location,
-                price_per_night=Decimal(str(price))
+    def seed_properties(self, hosts, count):
+        rng = self.rng
+        properties = [
+            Property(
+                host=rng.choice(hosts),
+                name=f"{rng.choice(PROPERTY_KINDS)} {index}",
+                description="Synthetic property generated by the seed command",
+                location=rng.choice(LOCATIONS),
+                price_per_night=Decimal(rng.randrange(5000, 50000)) / 100,
             )
-            properties.append(property_obj)
-        
-        self.stdout.write(f'Created {len(properties)} properties')
+            for index in range(count)
+        ]
+        self.created("properties", self.insert(Property, properties))
         return properties
 
-    def seed_listings(self):
-        """Create sample listings"""
-        self.stdout.write('Creating listings...')
-        
-        listings = []
-        listing_data = [
-            ('Vacation Rental Package', 'Complete vacation rental with all amenities included', 299.99),
-            ('Weekend Getaway Deal', 'Perfect weekend escape with special pricing', 199.99),
-            ('Luxury Stay Experience', 'Premium accommodation with concierge services', 599.99),
-            ('Budget-Friendly Option', 'Affordable accommodation for budget-conscious travelers', 89.99),
-            ('Family Package Deal', 'Family-friendly accommodation with extra space', 349.99),
-        ]
-        
-        for title, description, price in listing_data:
-            listing = Listing.objects.create(
-                title=title,
-                description=description,
-                price=Decimal(str(price))
+    def seed_listings(self, count):
+        rng = self.rng
+        listings = [
+            Listing(
+                title=f"Listing {index}",
+                description="Synthetic listing generated by the seed command",
+                price=Decimal(rng.randrange(5000, 60000)) / 100,
             )
-            listings.append(listing)
-        
-        self.stdout.write(f'Created {len(listings)} listings')
-        return listings
+            for index in range(count)
+        ]
+        self.created("listings", self.insert(Listing, listings))
 
-    def seed_bookings(self, properties, users):
-        """Create sample bookings"""
-        self.stdout.write('Creating bookings...')
-        
-        bookings = []
-        statuses = [Booking.Status.PENDING, Booking.Status.CONFIRMED, Booking.Status.CANCELLED]
-        
-        # Create bookings for each property
-        for property_obj in properties:
-            # Create 2-4 bookings per property
-            num_bookings = random.randint(2, 4)
-            
-            for _ in range(num_bookings):
-                guest = random.choice(users['guests'])
-                status = random.choice(statuses)
-                
-                # Generate random dates
-                start_date = date.today() + timedelta(days=random.randint(1, 30))
-                duration = random.randint(1, 14)  # 1-14 nights
-                end_date = start_date + timedelta(days=duration)
-                
-                total_price = property_obj.price_per_night * duration
-                
-                booking = Booking.objects.create(
-                    property_id=property_obj,
-                    user_id=guest,
-                    start_date=start_date,
-                    end_date=end_date,
-                    total_price=total_price,
-                    status=status
-                )
-                bookings.append(booking)
-        
-        self.stdout.write(f'Created {len(bookings)} bookings')
-        return bookings
+    def seed_bookings(self, properties, guests, per_property):
+        """Lay back-to-back stays on every property, so none overlap.
 
-    def seed_reviews(self, properties, users):
-        """Create sample reviews"""
-        self.stdout.write('Creating reviews...')
-        
-        reviews = []
-        review_comments = [
-            'Excellent property with amazing views!',
-            'Perfect location and very clean accommodations.',
-            'Great host, very responsive and helpful.',
-            'Beautiful property, would definitely stay again.',
-            'Good value for money, comfortable stay.',
-            'Outstanding experience, highly recommended!',
-            'Nice property but could use some improvements.',
-            'Fantastic location, walking distance to everything.',
-            'Clean and well-maintained, great amenities.',
-            'Wonderful host, made our stay memorable.',
-        ]
-        
-        # Create reviews for properties that have bookings
-        for property_obj in properties:
-            # Create 1-3 reviews per property
-            num_reviews = random.randint(1, 3)
-            reviewed_users = set()
-            
-            for _ in range(num_reviews):
-                # Get a guest who has booked this property
-                bookings = Booking.objects.filter(property_id=property_obj)
-                if not bookings.exists():
+        Each property's history starts about ``per_property`` nights before
+        the start date. Nights, payments and reviews are written batch by
+        batch alongside the bookings they belong to.
+        """
+        rng = self.rng
+        now = connection.ops.adapt_datetimefield_value(timezone.now())
+        statuses = [status.value for status in ACTIVE_STATUSES]
+        statuses.append(Booking.Status.CANCELLED.value)
+        confirmed = Booking.Status.CONFIRMED.value
+        methods = Payment.PaymentMethod.values
+        guest_ids = [guest.pk for guest in guests]
+        counts = {"booking nights": 0, "payments": 0, "reviews": 0}
+        reviewed = set()
+
+        # random() with precomputed offsets is several times cheaper than
+        # randrange()/choice() and timedelta() calls at a million rows.
+        random = rng.random
+        days = [timedelta(days=count) for count in range(8)]
+
+        def stays():
+            for property_obj in properties:
+                price = property_obj.price_per_night
+                cursor = self.start_date - timedelta(days=per_property)
+                for _ in range(per_property):
+                    cursor += days[int(random() * 3)]
+                    length = 1 + int(random() * 4)
+                    end_date = cursor + days[length]
+                    yield (
+                        property_obj.pk,
+                        guest_ids[int(random() * len(guest_ids))],
+                        cursor,
+                        end_date,
+                        price * length,
+                        statuses[int(random() * 3)],
+                        now,
+                        now,
+                    )
+                    cursor = end_date
+
+        def dependents(batch):
+            nights, payments, reviews = [], [], []
+            for (
+                pk,
+                property_id,
+                user_id,
+                start_date,
+                end_date,
+                total,
+                status,
+                *_,
+            ) in batch:
+                if status == Booking.Status.CANCELLED:
                     continue
-                    
-                booking = random.choice(bookings)
-                guest = booking.user_id
-                
-                # Avoid duplicate reviews from same user
-                if guest in reviewed_users:
+                for offset in range((end_date - start_date).days):
+                    nights.append((property_id, pk, start_date + days[offset]))
+                if status != confirmed:
                     continue
-                reviewed_users.add(guest)
-                
-                rating = random.randint(3, 5)  # Mostly positive reviews
-                comment = random.choice(review_comments)
-                
-                review = Review.objects.create(
-                    property_id=property_obj,
-                    user_id=guest,
-                    rating=rating,
-                    comment=comment
-                )
-                reviews.append(review)
-        
-        self.stdout.write(f'Created {len(reviews)} reviews')
-        return reviews
+                payments.append((pk, total, methods[int(random() * 3)], now))
+                # At most one review per guest and property, for finished stays.
+                key = (property_id, user_id)
+                if end_date <= self.start_date and key not in reviewed:
+                    reviewed.add(key)
+                    if random() < 0.3:
+                        reviews.append(
+                            (
+                                property_id,
+                                user_id,
+                                rng.randint(3, 5),
+                                rng.choice(REVIEW_COMMENTS),
+                                now,
+                                now,
+                            )
+                        )
+            counts["booking nights"] += self.insert_rows(
+                BookingNight, ["property", "booking", "date"], nights
+            )
+            counts["payments"] += self.insert_rows(
+                Payment,
+                ["booking", "amount", "payment_method", "payment_date"],
+                payments,
+            )
+            counts["reviews"] += self.insert_rows(
+                Review,
+                [
+                    "property_id",
+                    "user",
+                    "rating",
+                    "comment",
+                    "created_at",
+                    "updated_at",
+                ],
+                reviews,
+            )
 
-    def seed_payments(self, bookings):
-        """Create sample payments"""
-        self.stdout.write('Creating payments...')
-        
-        payments = []
-        payment_methods = [Payment.PaymentMethod.CREDIT_CARD, Payment.PaymentMethod.PAYPAL, Payment.PaymentMethod.STRIPE]
-        
-        # Create payments for confirmed bookings
-        confirmed_bookings = [b for b in bookings if b.status == Booking.Status.CONFIRMED]
-        
-        for booking in confirmed_bookings:
-            # Some bookings might have multiple payments (partial payments)
-            num_payments = random.randint(1, 2)
-            
-            for _ in range(num_payments):
-                payment_method = random.choice(payment_methods)
-                # For partial payments, amount might be less than total
-                if num_payments > 1:
-                    amount = booking.total_price * Decimal('0.5')  # 50% payment
-                else:
-                    amount = booking.total_price
-                
-                payment = Payment.objects.create(
-                    booking_id=booking,
-                    amount=amount,
-                    payment_method=payment_method
-                )
-                payments.append(payment)
-        
-        self.stdout.write(f'Created {len(payments)} payments')
-        return payments
+        fields = [
+            "property",
+            "user",
+            "start_date",
+            "end_date",
+            "total_price",
+            "status",
+            "created_at",
+            "updated_at",
+        ]
+        self.created("bookings", self.insert_rows(Booking, fields, stays(), dependents))
+        for label, count in counts.items():
+            self.created(label, count)
 
-    def seed_messages(self, users):
-        """Create sample messages"""
-        self.stdout.write('Creating messages...')
-        
+    def seed_messages(self, hosts, guests):
+        """Give each guest a short thread with one host, sometimes answered."""
+        rng = self.rng
         messages = []
-        message_templates = [
-            'Hi! I am interested in booking your property. Is it available for the dates I selected?',
-            'Thank you for the quick response! I would like to proceed with the booking.',
-            'Could you provide more information about the amenities and nearby attractions?',
-            'Perfect! I have made the payment. Looking forward to our stay.',
-            'Thank you for hosting us! We had a wonderful time and would love to come back.',
-            'Is there a late check-in option available? Our flight arrives late in the evening.',
-            'The property was exactly as described. Thank you for the great experience!',
-            'Could you recommend some good restaurants in the area?',
-            'We will be arriving around 3 PM. Is early check-in possible?',
-            'Thank you for being such a wonderful host. The property exceeded our expectations!',
-        ]
-        
-        # Create messages between guests and hosts
-        for host in users['hosts']:
-            # Each host gets messages from 2-4 different guests
-            num_guests = random.randint(2, 4)
-            selected_guests = random.sample(users['guests'], min(num_guests, len(users['guests'])))
-            
-            for guest in selected_guests:
-                # Create 2-4 message exchanges between each pair
-                num_exchanges = random.randint(2, 4)
-                
-                for _ in range(num_exchanges):
-                    # Guest sends message to host
-                    guest_message = Message.objects.create(
-                        sender_id=guest,
-                        recipient_id=host,
-                        message_body=random.choice(message_templates)
+        for guest in guests:
+            host = rng.choice(hosts)
+            for _ in range(rng.randint(0, 3)):
+                messages.append(
+                    Message(
+                        sender_id=guest.pk,
+                        recipient_id=host.pk,
+                        message_body=rng.choice(MESSAGE_TEMPLATES),
                     )
-                    messages.append(guest_message)
-                    
-                    # Host replies (sometimes)
-                    if random.choice([True, False, True]):  # 66% chance of reply
-                        host_message = Message.objects.create(
-                            sender_id=host,
-                            recipient_id=guest,
-                            message_body=f"Thank you for your message! {random.choice(['I will get back to you soon.', 'The property is available.', 'Looking forward to hosting you!'])}"
+                )
+                if rng.random() < 0.66:
+                    messages.append(
+                        Message(
+                            sender_id=host.pk,
+                            recipient_id=guest.pk,
+                            message_body=rng.choice(REPLIES),
                         )
-                        messages.append(host_message)
-        
-        self.stdout.write(f'Created {len(messages)} messages')
-        return messages
\ No newline at end of file
+                    )
+        self.created("messages", self.insert(Message, messages))
+        self.created("conversations", rebuild_threads())
@@ -0,0 +1,104 @@
+"""Conversation threads and inbox rows maintained as messages are written.
+
+Sending a message threads it into the conversation of its two users,
+creating the conversation and both inbox rows on first contact, then moves
+the conversation's ``last_message`` pointer and bumps the recipient's
+unread counter. Reading an inbox is therefore a range scan over
+``ConversationMember`` whose cost depends on the page size, never on how
+many messages the user has exchanged.
+"""
+
+from django.db.models import (
+    Case,
+    F,
+    OuterRef,
+    PositiveIntegerField,
+    Q,
+    Subquery,
+    When,
+)
+from django.utils import timezone
+
+from listings.models import Conversation, ConversationMember, Message
+
+
+def participants(user_id, other_id):
+    return (user_id, other_id) if user_id <= other_id else (other_id, user_id)
+
+
+def conversation_for(sender_id, recipient_id, started_at):
+    """Return the id of the pair's conversation, creating it with its members."""
+    user_low, user_high = participants(sender_id, recipient_id)
+    conversation, created = Conversation.objects.get_or_create(
+        user_low_id=user_low, user_high_id=user_high
+    )
+    if created:
+        # A user writing to themselves gets a single row.
+        peers = {user_low: user_high, user_high: user_low}
+        ConversationMember.objects.bulk_create(
+            ConversationMember(
+                conversation=conversation,
+                user_id=user_id,
+                peer_id=peer_id,
+                last_message_at=started_at,
+            )
+            for user_id, peer_id in peers.items()
+        )
+    return conversation.pk
+
+
+def deliver(message):
+    """Make ``message`` its conversation's newest and count it as unread."""
+    Conversation.objects.filter(pk=message.conversation_id).update(last_message=message)
+    ConversationMember.objects.filter(conversation_id=message.conversation_id).update(
+        last_message_at=message.sent_at,
+        unread_count=Case(
+            When(user_id=message.recipient_id, then=F("unread_count") + 1),
+            default=F("unread_count"),
+            output_field=PositiveIntegerField(),
+        ),
+    )
+
+
+def mark_read(user, conversation_id):
+    return ConversationMember.objects.filter(
+        user=user, conversation_id=conversation_id
+    ).update(unread_count=0)
+
+
+def rebuild_threads():
+    """Thread messages written without ``save()`` (bulk inserts, old rows).
+
+    Their conversations are created as needed and every touched thread's
+    last-message pointers are recomputed. Backfilled messages count as
+    read.
+    """
+    pairs = {
+        participants(sender_id, recipient_id)
+        for sender_id, recipient_id in Message.objects.filter(conversation=None)
+        .values_list("sender_id", "recipient_id")
+        .distinct()
+    }
+    if not pairs:
+        return 0
+    touched = []
+    for user_low, user_high in sorted(pairs):
+        conversation_id = conversation_for(user_low, user_high, timezone.now())
+        Message.objects.filter(conversation=None).filter(
+            Q(sender_id=user_low, recipient_id=user_high)
+            | Q(sender_id=user_high, recipient_id=user_low)
+        ).update(conversation_id=conversation_id)
+        touched.append(conversation_id)
+
+    def newest(conversation):
+        return Message.objects.filter(conversation=conversation).order_by(
+            "-sent_at", "-id"
+        )[:1]
+
+    ConversationMember.objects.filter(conversation__in=touched).update(
+        last_message_at=Subquery(newest(OuterRef("conversation_id")).values("sent_at"))
+    )
+    Conversation.objects.filter(pk__in=touched).update(
+        last_message=Subquery(newest(OuterRef("pk")).values("pk"))
+    )
+    return len(touched)
@@ -0,0 +1,252 @@
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from listings.routers import routing_scope
+
+logger = logging.getLogger("listings.profiling")
+
+
+class QueryProfile:
+    """``execute_wrapper`` hook counting and timing every SQL statement.
+
+    A statement whose SQL text was already run in the request counts as a
+    duplicate, whatever its parameters: that is the shape of an N+1 loop,
+    and only the SQL has to be hashed.
+    """
+
+    def __init__(self, slow_query_seconds):
+        self.slow_query_seconds = slow_query_seconds
+        self.count = 0
+        self.duration = 0.0
+        self.seen = set()
+
+    @property
+    def duplicates(self):
+        return self.count - len(self.seen)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            self.seen.add(sql)
+            if elapsed >= self.slow_query_seconds:
+                logger.warning(
+                    json.dumps(
+                        {"event": "slow_query", "ms": elapsed * 1000, "sql": sql}
+                    )
+                )
+
+
+class SlowRequestLog:
+    """Thread-safe bounded buffer keeping the ``size`` slowest requests."""
+
+    def __init__(self, size):
+        self.size = size
+        self.heap = []
+        self.counter = itertools.count()
+        self.lock = threading.Lock()
+
+    def admits(self, total_ms):
+        """Whether a request this slow would be kept; read without the lock."""
+        heap = self.heap
+        try:
+            return len(heap) < self.size or total_ms > heap[0][0]
+        except IndexError:  # Cleared meanwhile.
+            return True
+
+    def add(self, record):
+        entry = (record["total_ms"], next(self.counter), record)
+        with self.lock:
+            if len(self.heap) < self.size:
+                heapq.heappush(self.heap, entry)
+            elif entry > self.heap[0]:
+                heapq.heapreplace(self.heap, entry)
+
+    def snapshot(self):
+        with self.lock:
+            entries = sorted(self.heap, reverse=True)
+        return [record for _, _, record in entries]
+
+    def clear(self):
+        with self.lock:
+            self.heap.clear()
+
+
+slow_requests = SlowRequestLog(getattr(settings, "PROFILING_SLOWEST_REQUESTS", 50))
+
+
+_current_profile = ContextVar("query_profile", default=None)
+
+
+def _profile_statement(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def _install(connection, **kwargs):
+    if _profile_statement not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_profile_statement)
+
+
+class ProfilingMiddleware:
+    """Per-request DB and timing metrics, exposed as ``Server-Timing``.
+
+    Each connection gets one permanent wrapper when it connects (or, if
+    already open, when the middleware loads), which hands its statements
+    to the request's ``QueryProfile`` through a context variable, so a
+    request wraps nothing itself. The view phase ends when
+    the response is handed back for rendering, so ``render`` is
+    serialization time for DRF responses. Slow queries log at WARNING and
+    the slowest requests are kept for the slow-requests endpoint; a record
+    for every request is logged only when the logger is at INFO. Runs
+    natively under both WSGI and ASGI. Disabled unless
+    ``PROFILING_ENABLED`` is set.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.slow_query_seconds = settings.PROFILING_SLOW_QUERY_MS / 1000
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        connection_created.connect(_install, dispatch_uid="listings.profiling")
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile = QueryProfile(self.slow_query_seconds)
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self.finish(request, response, profile, started)
+        return response
+
+    async def __acall__(self, request):
+        # Queries run in sync_to_async threads, which inherit this context
+        # and so report to the same profile.
+        profile = QueryProfile(self.slow_query_seconds)
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        self.finish(request, response, profile, started)
+        return response
+
+    def finish(self, request, response, profile, started):
+        finished = time.perf_counter()
+        view_finished = getattr(request, "_profiling_view_finished", finished)
+        db_ms = profile.duration * 1000
+        view_ms = (view_finished - started) * 1000
+        render_ms = (finished - view_finished) * 1000
+        total_ms = (finished - started) * 1000
+        duplicates = profile.duplicates
+        response["Server-Timing"] = (
+            f'db;dur={db_ms:.3f};desc="{profile.count} queries, '
+            f'{duplicates} duplicate", view;dur={view_ms:.3f}, '
+            f"render;dur={render_ms:.3f}, total;dur={total_ms:.3f}"
+        )
+        logged = logger.isEnabledFor(logging.INFO)
+        # The record is only built when it is logged or makes the slow list.
+        if not logged and not slow_requests.admits(total_ms):
+            return
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": profile.count,
+            "duplicate_queries": duplicates,
+            "db_ms": round(db_ms, 3),
+            "view_ms": round(view_ms, 3),
+            "render_ms": round(render_ms, 3),
+            "total_ms": round(total_ms, 3),
+        }
+        if logged:
+            logger.info(json.dumps({"event": "request", **record}))
+        slow_requests.add(record)
+
+    def process_template_response(self, request, response):
+        request._profiling_view_finished = time.perf_counter()
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """Read-your-writes on top of ``PrimaryReplicaRouter``.
+
+    Each request is routed in its own scope. Unsafe methods are pinned to
+    the primary from the start, and a request that wrote sets a cookie that
+    keeps the client's reads on the primary for ``REPLICA_PIN_SECONDS``,
+    long enough for the replicas to catch up. Runs natively under both
+    WSGI and ASGI. Disabled when no replica is configured.
+    """
+
+    cookie_name = "pin_primary"
+    safe_methods = ("GET", "HEAD", "OPTIONS", "TRACE")
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "DATABASE_REPLICAS", None):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = settings.REPLICA_PIN_SECONDS
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with routing_scope(pinned=self.pinned(request)) as state:
+            response = self.get_response(request)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        with routing_scope(pinned=self.pinned(request)) as state:
+            response = await self.get_response(request)
+        return self.finish(response, state)
+
+    def pinned(self, request):
+        return (
+            request.method not in self.safe_methods
+            or self.cookie_name in request.COOKIES
+        )
+
+    def finish(self, response, state):
+        if state.wrote:
+            response.set_cookie(
+                self.cookie_name,
+                "1",
+                max_age=self.pin_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
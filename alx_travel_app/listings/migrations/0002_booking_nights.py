@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:21
+
+import datetime
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_nights(apps, schema_editor):
+    Booking = apps.get_model("listings", "Booking")
+    BookingNight = apps.get_model("listings", "BookingNight")
+    active = Booking.objects.filter(status__in=["pending", "confirmed"]).order_by("id")
+    for booking in active.iterator():
+        # Overlaps that predate the constraint keep their earliest booking.
+        BookingNight.objects.bulk_create(
+            [
+                BookingNight(
+                    property_id=booking.property_id,
+                    booking_id=booking.id,
+                    date=booking.start_date + datetime.timedelta(days=offset),
+                )
+                for offset in range((booking.end_date - booking.start_date).days)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingNight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['property', 'status', 'start_date', 'end_date'], name='booking_availability_idx'),
+        ),
+        migrations.AddField(
+            model_name='bookingnight',
+            name='booking',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nights', to='listings.booking'),
+        ),
+        migrations.AddField(
+            model_name='bookingnight',
+            name='property',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booked_nights', to='listings.property'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookingnight',
+            constraint=models.UniqueConstraint(fields=('property', 'date'), name='unique_property_night'),
+        ),
+        migrations.RunPython(backfill_nights, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('listings', '0002_booking_nights'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyCalendar',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='calendar', serialize=False, to='listings.property')),
+                ('window_start', models.DateField()),
+                ('occupancy', models.BinaryField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['location', 'price_per_night'], name='property_search_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0003_property_calendar"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["created_at", "id"], name="booking_keyset_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["created_at", "id"], name="listing_keyset_idx"),
+        ),
+    ]
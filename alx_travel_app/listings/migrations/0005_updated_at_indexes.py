@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-17 06:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0004_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(fields=["updated_at"], name="booking_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="listing",
+            index=models.Index(fields=["updated_at"], name="listing_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0005_updated_at_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RateOverride",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("start_date", models.DateField()),
+                ("end_date", models.DateField()),
+                ("weekdays", models.PositiveSmallIntegerField(default=127)),
+                (
+                    "price_per_night",
+                    models.DecimalField(decimal_places=2, max_digits=10),
+                ),
+                (
+                    "property",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="rate_overrides",
+                        to="listings.property",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["property", "end_date"], name="rate_override_idx"
+                    )
+                ],
+            },
+        ),
+    ]
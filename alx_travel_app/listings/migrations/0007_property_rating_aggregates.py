@@ -0,0 +1,101 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:14
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_existing_reviews(apps, schema_editor):
+    Property = apps.get_model("listings", "Property")
+    Review = apps.get_model("listings", "Review")
+    reviews = (
+        Review.objects.filter(property_id=OuterRef("pk"))
+        .order_by()
+        .values("property_id")
+    )
+
+    def total(aggregate, **filters):
+        rows = reviews.filter(**filters).annotate(total=aggregate).values("total")
+        return Coalesce(Subquery(rows), 0)
+
+    Property.objects.update(
+        review_count=total(Count("pk")),
+        rating_sum=total(Sum("rating")),
+        **{
+            f"rating_{rating}_count": total(Count("pk"), rating=rating)
+            for rating in range(1, 6)
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0006_rate_override"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="property",
+            name="rating_1_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_2_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_3_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_4_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_5_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="property",
+            name="rating_average",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(review_count=0, then=models.Value(0.0)),
+                    default=django.db.models.expressions.CombinedExpression(
+                        django.db.models.functions.comparison.Cast(
+                            "rating_sum", models.FloatField()
+                        ),
+                        "/",
+                        models.F("review_count"),
+                    ),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+        migrations.RunPython(count_existing_reviews, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="property",
+            index=models.Index(
+                fields=["-rating_average", "-review_count", "id"],
+                name="property_rating_idx",
+            ),
+        ),
+    ]
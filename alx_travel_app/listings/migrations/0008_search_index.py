@@ -0,0 +1,80 @@
+from django.db import migrations
+
+# The search indexes as they stood at this migration, frozen here so later
+# changes to listings.search cannot rewrite history. The post_migrate
+# receiver in listings.signals keeps them current afterwards.
+SQLITE = {
+    "listings_listing": ("title", "description"),
+    "listings_property": ("name", "description", "location"),
+}
+MYSQL = {
+    "listings_listing": ("listing_fulltext_idx", "title, description"),
+    "listings_property": ("property_fulltext_idx", "name, description, location"),
+}
+
+
+def _sqlite_install(cursor):
+    for table, columns in SQLITE.items():
+        fts = f"{table}_fts"
+        names = ", ".join(columns)
+        new = ", ".join(f"new.{column}" for column in columns)
+        old = ", ".join(f"old.{column}" for column in columns)
+        insert = f"INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new});"
+        delete = (
+            f"INSERT INTO {fts}({fts}, rowid, {names}) "
+            f"VALUES ('delete', old.id, {old});"
+        )
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({names}, "
+            f"content='{table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+            f"BEGIN {insert} END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+            f"BEGIN {delete} END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {names} "
+            f"ON {table} BEGIN {delete} {insert} END"
+        )
+        cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def install(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            _sqlite_install(cursor)
+        elif connection.vendor == "mysql":
+            for table, (name, columns) in MYSQL.items():
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD FULLTEXT INDEX {name} ({columns})"
+                )
+
+
+def uninstall(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            for table in SQLITE:
+                for suffix in ("ai", "ad", "au"):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{suffix}")
+                cursor.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif connection.vendor == "mysql":
+            for table, (name, _) in MYSQL.items():
+                cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0007_property_rating_aggregates"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
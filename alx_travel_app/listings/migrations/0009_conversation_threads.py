@@ -0,0 +1,177 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+
+
+def thread_existing_messages(apps, schema_editor):
+    Conversation = apps.get_model("listings", "Conversation")
+    ConversationMember = apps.get_model("listings", "ConversationMember")
+    Message = apps.get_model("listings", "Message")
+    pairs = {
+        tuple(sorted(pair))
+        for pair in Message.objects.values_list("sender_id", "recipient_id").distinct()
+    }
+    for user_low, user_high in sorted(pairs):
+        conversation = Conversation.objects.create(
+            user_low_id=user_low, user_high_id=user_high
+        )
+        peers = {user_low: user_high, user_high: user_low}
+        ConversationMember.objects.bulk_create(
+            ConversationMember(
+                conversation=conversation,
+                user_id=user_id,
+                peer_id=peer_id,
+                last_message_at=timezone.now(),
+            )
+            for user_id, peer_id in peers.items()
+        )
+        Message.objects.filter(
+            Q(sender_id=user_low, recipient_id=user_high)
+            | Q(sender_id=user_high, recipient_id=user_low)
+        ).update(conversation=conversation)
+
+    def newest(conversation):
+        return Message.objects.filter(conversation=conversation).order_by(
+            "-sent_at", "-id"
+        )[:1]
+
+    ConversationMember.objects.update(
+        last_message_at=Subquery(newest(OuterRef("conversation_id")).values("sent_at"))
+    )
+    Conversation.objects.update(
+        last_message=Subquery(newest(OuterRef("pk")).values("pk"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0008_search_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ConversationMember",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("unread_count", models.PositiveIntegerField(default=0)),
+                ("last_message_at", models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="Conversation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "last_message",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="listings.message",
+                    ),
+                ),
+                (
+                    "user_high",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "user_low",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="conversation",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="messages",
+                to="listings.conversation",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["conversation", "-sent_at", "-id"], name="thread_messages_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="conversation",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="members",
+                to="listings.conversation",
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="peer",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddField(
+            model_name="conversationmember",
+            name="user",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="conversation_memberships",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="conversation",
+            constraint=models.UniqueConstraint(
+                fields=("user_low", "user_high"), name="unique_conversation_pair"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="conversationmember",
+            index=models.Index(
+                fields=["user", "-last_message_at", "-id"], name="inbox_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="conversationmember",
+            constraint=models.UniqueConstraint(
+                fields=("user", "conversation"), name="unique_conversation_member"
+            ),
+        ),
+        migrations.RunPython(thread_existing_messages, migrations.RunPython.noop),
+    ]
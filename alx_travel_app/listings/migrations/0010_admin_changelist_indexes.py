@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0009_conversation_threads"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="booking",
+            index=models.Index(
+                fields=["status", "created_at"], name="booking_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(fields=["sent_at"], name="message_sent_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(fields=["payment_date"], name="payment_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="payment",
+            index=models.Index(
+                fields=["payment_method", "payment_date"], name="payment_method_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.2.6 on 2026-10-17 07:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("listings", "0010_admin_changelist_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyLocationStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("location", models.CharField(max_length=100)),
+                ("date", models.DateField()),
+                ("nights_booked", models.PositiveIntegerField(default=0)),
+                ("nights_cancelled", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["date", "location"], name="location_day_date_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("location", "date"), name="unique_location_day"
+                    )
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name="DailyPropertyStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("location", models.CharField(max_length=100)),
+                ("date", models.DateField()),
+                ("nights_booked", models.PositiveIntegerField(default=0)),
+                ("nights_cancelled", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                (
+                    "property",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_stats",
+                        to="listings.property",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["location", "date"], name="property_day_location_idx"
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("property", "date"), name="unique_property_day"
+                    )
+                ],
+            },
+        ),
+    ]
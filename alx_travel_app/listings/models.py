@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.functions import Cast
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import MinValueValidator, MaxValueValidator
 import uuid
@@ -23,6 +24,12 @@ class Listing(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="listing_keyset_idx"),
+            models.Index(fields=["updated_at"], name="listing_updated_idx"),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -36,10 +43,87 @@ class Property(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Review aggregates, maintained by listings.ratings.
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_average = models.GeneratedField(
+        expression=models.Case(
+            models.When(review_count=0, then=models.Value(0.0)),
+            default=Cast("rating_sum", models.FloatField()) / models.F("review_count"),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["location", "price_per_night"], name="property_search_idx"
+            ),
+            models.Index(
+                fields=["-rating_average", "-review_count", "id"],
+                name="property_rating_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
 
+class PropertyCalendar(models.Model):
+    """Occupancy bitmap of a property over a rolling window.
+
+    Bit ``i`` (little-endian) is set when night ``window_start + i`` is held
+    by an active booking. Searches test a date range with one mask instead
+    of joining against bookings.
+    """
+
+    WINDOW_DAYS = 365
+
+    property = models.OneToOneField(
+        Property, on_delete=models.CASCADE, primary_key=True, related_name="calendar"
+    )
+    window_start = models.DateField()
+    occupancy = models.BinaryField()
+
+    def __str__(self):
+        return f"Calendar for {self.property_id} from {self.window_start}"
+
+
+class RateOverride(models.Model):
+    """Nightly price of a property over a date range, e.g. a season.
+
+    ``weekdays`` is a bitmask of the nights the override applies to (bit 0
+    is Monday), so a single row can price every weekend of a season. The
+    range is half-open like a stay. Where overrides overlap, the most
+    recently created one wins.
+    """
+
+    ALL_NIGHTS = 0b1111111
+    WEEKEND_NIGHTS = 0b0110000
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="rate_overrides"
+    )
+    start_date = models.DateField()
+    end_date = models.DateField()
+    weekdays = models.PositiveSmallIntegerField(default=ALL_NIGHTS)
+    price_per_night = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["property", "end_date"], name="rate_override_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.price_per_night} for {self.property_id} from {self.start_date}"
+
+
 class Booking(models.Model):
     class Status(models.TextChoices):
         PENDING = ("pending",)
@@ -57,8 +141,61 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["property", "status", "start_date", "end_date"],
+                name="booking_availability_idx",
+            ),
+            models.Index(fields=["created_at", "id"], name="booking_keyset_idx"),
+            models.Index(fields=["updated_at"], name="booking_updated_idx"),
+            models.Index(fields=["status", "created_at"], name="booking_status_idx"),
+        ]
+
+    # (property_id, start_date, end_date) as stored, so the rollups can
+    # refresh the days a booking moves away from.
+    _stored_stay = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        booking = super().from_db(db, field_names, values)
+        if {"property_id", "start_date", "end_date"} <= booking.__dict__.keys():
+            booking._stored_stay = (
+                booking.property_id,
+                booking.start_date,
+                booking.end_date,
+            )
+        return booking
+
     def __str__(self):
-        return f"Booking {self.booking_id} for {self.property_id}"
+        return f"Booking {self.pk} for {self.property_id}"
+
+
+class BookingNight(models.Model):
+    """One row per night held by an active booking.
+
+    The unique (property, date) constraint is what rejects overlapping
+    bookings, so the check is a single index probe per night and stays
+    correct under concurrent writers.
+    """
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="booked_nights"
+    )
+    booking = models.ForeignKey(
+        Booking, on_delete=models.CASCADE, related_name="nights"
+    )
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "date"], name="unique_property_night"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} booked on {self.date}"
 
 
 class Review(models.Model):
@@ -71,8 +208,24 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # (property, rating) this review is counted under in the aggregates.
+    _counted_as = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        if "property_id_id" in review.__dict__ and "rating" in review.__dict__:
+            review._counted_as = (review.property_id_id, review.rating)
+        return review
+
+    def save(self, *args, **kwargs):
+        # The post_save receiver updates the property's rating aggregates;
+        # running it in this transaction commits both or neither.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
     def __str__(self):
-        return f"Review {self.review_id} for {self.property_id}"
+        return f"Review {self.pk} for {self.property_id_id}"
 
 
 class Payment(models.Model):
@@ -88,8 +241,74 @@ class Payment(models.Model):
     )
     payment_date = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["payment_date"], name="payment_date_idx"),
+            models.Index(
+                fields=["payment_method", "payment_date"], name="payment_method_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Payment {self.pk} for {self.booking_id}"
+
+
+class Conversation(models.Model):
+    """The thread of messages between two users.
+
+    Participants are stored lowest id first so each pair has one row.
+    ``last_message`` points at the newest message, so an inbox row never
+    scans the thread.
+    """
+
+    user_low = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    user_high = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    last_message = models.ForeignKey(
+        "Message", on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_low", "user_high"], name="unique_conversation_pair"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Conversation between {self.user_low_id} and {self.user_high_id}"
+
+
+class ConversationMember(models.Model):
+    """One participant's inbox row for a conversation.
+
+    ``last_message_at`` copies the conversation's newest message time so a
+    user's inbox is a range scan of ``inbox_idx``; ``unread_count`` counts
+    messages received since the user last read the thread.
+    """
+
+    conversation = models.ForeignKey(
+        Conversation, on_delete=models.CASCADE, related_name="members"
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="conversation_memberships"
+    )
+    peer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    unread_count = models.PositiveIntegerField(default=0)
+    last_message_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "conversation"], name="unique_conversation_member"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "-last_message_at", "-id"], name="inbox_idx"),
+        ]
+
     def __str__(self):
-        return f"Payment {self.payment_id} for {self.booking_id}"
+        return f"{self.user_id} in conversation {self.conversation_id}"
 
 
 class Message(models.Model):
@@ -99,8 +318,84 @@ class Message(models.Model):
     recipient = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="received_messages"
     )
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="messages",
+    )
     message_body = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["conversation", "-sent_at", "-id"], name="thread_messages_idx"
+            ),
+            models.Index(fields=["sent_at"], name="message_sent_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Signal receivers thread the message and update both inbox rows;
+        # running them in this transaction commits all of it or nothing.
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Message {self.pk} from {self.sender_id} to {self.recipient_id}"
+
+
+class DailyPropertyStats(models.Model):
+    """One property's occupancy and revenue on one day.
+
+    Kept by ``listings.rollups``; only days with a booked or cancelled
+    night have a row. ``revenue`` is the payments of active bookings
+    spread evenly over their nights. ``location`` is the property's at the
+    last refresh, so a move can be taken out of the old location's totals.
+    """
+
+    property = models.ForeignKey(
+        Property, on_delete=models.CASCADE, related_name="daily_stats"
+    )
+    location = models.CharField(max_length=100)
+    date = models.DateField()
+    nights_booked = models.PositiveIntegerField(default=0)
+    nights_cancelled = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["property", "date"], name="unique_property_day"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["location", "date"], name="property_day_location_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.property_id} on {self.date}"
+
+
+class DailyLocationStats(models.Model):
+    """``DailyPropertyStats`` summed over the properties of a location."""
+
+    location = models.CharField(max_length=100)
+    date = models.DateField()
+    nights_booked = models.PositiveIntegerField(default=0)
+    nights_cancelled = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["location", "date"], name="unique_location_day"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date", "location"], name="location_day_date_idx"),
+        ]
+
     def __str__(self):
-        return f"Message {self.message_id} from {self.sender_id} to {self.recipient_id}"
+        return f"{self.location} on {self.date}"
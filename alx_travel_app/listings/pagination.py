@@ -0,0 +1,227 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination that seeks on an indexed key instead of an offset.
+
+    Each cursor stores the ordering values of the row at the page boundary,
+    so every page is a ``WHERE key < boundary ORDER BY key LIMIT n`` range
+    scan and page N costs the same as page 1. The total count is only
+    computed when the client asks for it with ``?count=true``.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page, counted = self.page_queries(queryset, request, view)
+        self.count = None if counted is None else counted.count()
+        return self.finish_page(list(page))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """``paginate_queryset`` for async views, on the async ORM API."""
+        page, counted = self.page_queries(queryset, request, view)
+        self.count = None if counted is None else await counted.acount()
+        return self.finish_page([row async for row in page])
+
+    def page_queries(self, queryset, request, view):
+        """Return the page query and, if asked for, the query to count."""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        cursor = self.decode_cursor(request, queryset.model, ordering)
+        self.cursor = cursor
+        self.reverse = bool(cursor and cursor["reverse"])
+        self.fields = [field.lstrip("-") for field in ordering]
+
+        counted = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            counted = queryset
+        if cursor:
+            queryset = queryset.filter(
+                self.seek_filter(ordering, cursor["position"], self.reverse)
+            )
+        if self.reverse:
+            ordering = [self.flip(field) for field in ordering]
+        return queryset.order_by(*ordering)[: self.page_size + 1], counted
+
+    def finish_page(self, rows):
+        has_more = len(rows) > self.page_size
+        del rows[self.page_size :]
+        if self.reverse:
+            rows.reverse()
+        self.first = self.position(rows[0]) if rows else None
+        self.last = self.position(rows[-1]) if rows else None
+        self.has_next = has_more if not self.reverse else bool(rows)
+        self.has_previous = bool(self.cursor) if not self.reverse else has_more
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        payload = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return payload
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "The pagination cursor value.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page.",
+                "schema": {"type": "integer"},
+            },
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Include the total number of results.",
+                "schema": {"type": "boolean"},
+            },
+        ]
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, "keyset_ordering", self.ordering))
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.last, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first, reverse=True)
+
+    @staticmethod
+    def flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @staticmethod
+    def seek_filter(ordering, position, reverse):
+        """Row-value comparison ``key > position`` expanded into ORs of ANDs.
+
+        The leading inclusive bound on the first field lets the database
+        start an index range scan at the boundary instead of evaluating
+        the OR for every row.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            step = Q(**{f"{name}__{'lt' if descending else 'gt'}": position[index]})
+            for previous, value in zip(ordering[:index], position):
+                step &= Q(**{previous.lstrip("-"): value})
+            condition |= step
+        first = ordering[0]
+        descending = first.startswith("-") != reverse
+        bound = Q(
+            **{f"{first.lstrip('-')}__{'lte' if descending else 'gte'}": position[0]}
+        )
+        return bound & condition
+
+    def position(self, row):
+        if isinstance(row, dict):
+            return [row[field] for field in self.fields]
+        return [getattr(row, field) for field in self.fields]
+
+    def encode_cursor(self, position, reverse):
+        values = [
+            value.isoformat() if isinstance(value, datetime) else value
+            for value in position
+        ]
+        payload = json.dumps({"p": values, "r": int(reverse)}, separators=(",", ":"))
+        token = base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request, model, ordering):
+        """Return the cursor's position, typed per ordering field, and direction.
+
+        Cursors come from clients, so every value is converted with its
+        field's ``to_python`` here; one that does not convert is a 404
+        rather than an error from the database.
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(
+                base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            )
+            values = list(payload["p"])
+            if len(values) != len(ordering):
+                raise ValueError("Cursor does not match the ordering.")
+            position = []
+            for field, value in zip(ordering, values):
+                value = self.model_field(model, field.lstrip("-")).to_python(value)
+                if value is None:
+                    raise ValueError("Cursor positions are never null.")
+                position.append(value)
+            return {"position": position, "reverse": bool(payload["r"])}
+        except (
+            binascii.Error,
+            ValueError,
+            KeyError,
+            TypeError,
+            ValidationError,
+        ):
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def model_field(model, name):
+        *path, name = name.split("__")
+        for part in path:
+            model = model._meta.get_field(part).related_model
+        return model._meta.get_field(name)
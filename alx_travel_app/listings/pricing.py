@@ -0,0 +1,199 @@
+"""Stay prices from each property's nightly-rate calendar.
+
+A property's rate for a night is its ``price_per_night`` unless a
+``RateOverride`` covers that date and weekday. Rates over the rolling
+window that starts today are precomputed into a prefix-sum array of cents
+per property and cached, so pricing a stay of any length inside the window
+is two array reads. A batch of quotes loads every uncached table with two
+queries in total; stays outside the window are priced from the overrides
+directly, per weekday between override boundaries, whatever their length.
+"""
+
+from array import array
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from listings.cache import bump_version, current_version
+from listings.models import Property, PropertyCalendar, RateOverride
+
+WINDOW_DAYS = PropertyCalendar.WINDOW_DAYS
+RATE_TIMEOUT = 24 * 60 * 60
+
+
+def cents(amount):
+    return int(amount * 100)
+
+
+def nightly_rates(base_price, overrides, start_date, days):
+    """Return the rate in cents of each of ``days`` nights from ``start_date``.
+
+    ``overrides`` are ``RateOverride`` instances in precedence order, the
+    winning one last.
+    """
+    rates = [cents(base_price)] * days
+    for override in overrides:
+        first = max((override.start_date - start_date).days, 0)
+        last = min((override.end_date - start_date).days, days)
+        price = cents(override.price_per_night)
+        for offset in range(first, last):
+            night = start_date + timedelta(days=offset)
+            if override.weekdays >> night.weekday() & 1:
+                rates[offset] = price
+    return rates
+
+
+def _weekday_counts(start_date, days):
+    """Nights per weekday, Monday first, among ``days`` nights from ``start_date``."""
+    weeks, rest = divmod(days, 7)
+    counts = [weeks] * 7
+    for offset in range(rest):
+        counts[(start_date.weekday() + offset) % 7] += 1
+    return counts
+
+
+def stay_cents(base_price, overrides, start_date, end_date):
+    """Return the cents of the nights from ``start_date`` up to ``end_date``.
+
+    Same rates as ``nightly_rates`` without a list of nights: the stay is
+    split where overrides start or end, and every piece is priced per
+    weekday from the override that wins it.
+    """
+    bounds = {start_date, end_date}
+    for override in overrides:
+        bounds.update(
+            day
+            for day in (override.start_date, override.end_date)
+            if start_date < day < end_date
+        )
+    bounds = sorted(bounds)
+    total = 0
+    for first, last in zip(bounds, bounds[1:]):
+        covering = [
+            override
+            for override in overrides
+            if override.start_date <= first and override.end_date >= last
+        ]
+        counts = _weekday_counts(first, (last - first).days)
+        for weekday, count in enumerate(counts):
+            price = cents(base_price)
+            for override in covering:
+                if override.weekdays >> weekday & 1:
+                    price = cents(override.price_per_night)
+            total += count * price
+    return total
+
+
+def rate_version_key(property_id):
+    return f"listings:rates:{property_id}:version"
+
+
+def rate_keys(property_ids, window_start):
+    """Map each property's current table key to its id, in one cache read."""
+    version_keys = {rate_version_key(pk): pk for pk in set(property_ids)}
+    versions = cache.get_many(list(version_keys))
+    keys = {}
+    for version_key, pk in version_keys.items():
+        version = versions.get(version_key) or current_version(version_key)
+        keys[f"listings:rates:{pk}:{version}:{window_start}"] = pk
+    return keys
+
+
+def invalidate_rates(property_id):
+    bump_version(rate_version_key(property_id))
+
+
+def _overrides(property_ids, start_date, end_date):
+    found = {property_id: [] for property_id in property_ids}
+    rows = RateOverride.objects.filter(
+        property__in=property_ids, start_date__lt=end_date, end_date__gt=start_date
+    ).order_by("pk")
+    for override in rows:
+        found[override.property_id].append(override)
+    return found
+
+
+def rate_tables(property_ids, window_start=None):
+    """Return ``{property_id: prefix sums}`` for the window from ``window_start``.
+
+    Index ``i`` of a table holds the cents of the window's first ``i``
+    nights. Unknown properties are left out.
+    """
+    window_start = window_start or timezone.localdate()
+    keys = rate_keys(property_ids, window_start)
+    tables = {
+        keys[key]: array("q", prefix)
+        for key, prefix in cache.get_many(list(keys)).items()
+    }
+    missing = [pk for pk in keys.values() if pk not in tables]
+    if missing:
+        window_end = window_start + timedelta(days=WINDOW_DAYS)
+        prices = dict(
+            Property.objects.filter(pk__in=missing).values_list("pk", "price_per_night")
+        )
+        overrides = _overrides(prices, window_start, window_end)
+        built = {
+            pk: array(
+                "q",
+                accumulate(
+                    nightly_rates(price, overrides[pk], window_start, WINDOW_DAYS),
+                    initial=0,
+                ),
+            )
+            for pk, price in prices.items()
+        }
+        cache.set_many(
+            {key: built[pk].tobytes() for key, pk in keys.items() if pk in built},
+            RATE_TIMEOUT,
+        )
+        tables.update(built)
+    return tables
+
+
+def quote_many(stays, window_start=None):
+    """Price ``(property_id, start_date, end_date)`` stays.
+
+    Returns one ``Decimal`` per stay, or ``None`` where the property does
+    not exist.
+    """
+    window_start = window_start or timezone.localdate()
+    tables = rate_tables([stay[0] for stay in stays], window_start)
+    totals = []
+    outside = {}
+    for index, (property_id, start_date, end_date) in enumerate(stays):
+        table = tables.get(property_id)
+        first = (start_date - window_start).days
+        last = (end_date - window_start).days
+        if table is None:
+            totals.append(None)
+        elif first >= 0 and last <= WINDOW_DAYS:
+            totals.append(Decimal(table[last] - table[first]).scaleb(-2))
+        else:
+            outside[index] = (property_id, start_date, end_date)
+            totals.append(None)
+    if outside:
+        property_ids = {stay[0] for stay in outside.values()}
+        prices = dict(
+            Property.objects.filter(pk__in=property_ids).values_list(
+                "pk", "price_per_night"
+            )
+        )
+        overrides = _overrides(
+            property_ids,
+            min(stay[1] for stay in outside.values()),
+            max(stay[2] for stay in outside.values()),
+        )
+        for index, (property_id, start_date, end_date) in outside.items():
+            total = stay_cents(
+                prices[property_id], overrides[property_id], start_date, end_date
+            )
+            totals[index] = Decimal(total).scaleb(-2)
+    return totals
+
+
+def quote(property_id, start_date, end_date):
+    """Price one stay; see ``quote_many``."""
+    return quote_many([(property_id, start_date, end_date)])[0]
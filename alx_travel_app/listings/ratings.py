@@ -0,0 +1,89 @@
+"""Review aggregates stored on ``Property``.
+
+Each property carries its review count, rating sum and a per-star
+histogram, and the database derives ``rating_average`` from them, so
+ranking properties by rating reads ``property_rating_idx`` instead of
+aggregating reviews. Saving or deleting a review adjusts its property's
+counters with ``F()`` expressions in the same transaction (see
+``listings.signals``); ``refresh_ratings`` recomputes them from the
+reviews when they have drifted, e.g. after bulk writes.
+"""
+
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from listings.models import Property, Review
+
+HISTOGRAM_FIELDS = {rating: f"rating_{rating}_count" for rating in range(1, 6)}
+AGGREGATE_FIELDS = ["review_count", "rating_sum", *HISTOGRAM_FIELDS.values()]
+
+
+def adjust_ratings(property_id, rating, sign):
+    """Add (``sign=1``) or remove (``sign=-1``) one review's rating."""
+    field = HISTOGRAM_FIELDS[rating]
+    Property.objects.filter(pk=property_id).update(
+        review_count=F("review_count") + sign,
+        rating_sum=F("rating_sum") + sign * rating,
+        **{field: F(field) + sign},
+    )
+
+
+def recounted():
+    """Return update expressions that recount a property's reviews."""
+    reviews = (
+        Review.objects.filter(property_id=OuterRef("pk"))
+        .order_by()
+        .values("property_id")
+    )
+
+    def total(aggregate, **filters):
+        rows = reviews.filter(**filters).annotate(total=aggregate).values("total")
+        return Coalesce(Subquery(rows), 0)
+
+    return {
+        "review_count": total(Count("pk")),
+        "rating_sum": total(Sum("rating")),
+        **{
+            field: total(Count("pk"), rating=rating)
+            for rating, field in HISTOGRAM_FIELDS.items()
+        },
+    }
+
+
+def drifted_properties(batch_size=5000):
+    """Yield ids of properties whose stored aggregates disagree with reviews."""
+    expected = {
+        row.pop("property_id"): row
+        for row in Review.objects.order_by()
+        .values("property_id")
+        .annotate(
+            review_count=Count("pk"),
+            rating_sum=Sum("rating"),
+            **{
+                field: Count("pk", filter=Q(rating=rating))
+                for rating, field in HISTOGRAM_FIELDS.items()
+            },
+        )
+    }
+    empty = dict.fromkeys(AGGREGATE_FIELDS, 0)
+    stored = Property.objects.values("pk", *AGGREGATE_FIELDS)
+    for row in stored.iterator(chunk_size=batch_size):
+        property_id = row.pop("pk")
+        if row != expected.get(property_id, empty):
+            yield property_id
+
+
+def refresh_ratings(property_ids=None, batch_size=5000):
+    """Recount the aggregates of ``property_ids`` (default: every property).
+
+    Each batch is one UPDATE, so a review written concurrently is either
+    counted or adjusts the recounted value afterwards; it is never lost.
+    """
+    if property_ids is None:
+        return Property.objects.update(**recounted())
+    property_ids = list(property_ids)
+    updated = 0
+    for start in range(0, len(property_ids), batch_size):
+        batch = property_ids[start : start + batch_size]
+        updated += Property.objects.filter(pk__in=batch).update(**recounted())
+    return updated
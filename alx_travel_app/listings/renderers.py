@@ -0,0 +1,69 @@
+import csv
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+class StreamingRenderer(BaseRenderer):
+    """Renderer that can also emit rows incrementally for streaming exports.
+
+    ``stream`` takes column names and an iterable of value tuples and yields
+    encoded chunks of ``batch_size`` rows, so a response never holds more
+    than one batch in memory.
+    """
+
+    charset = "utf-8"
+    batch_size = 500
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows else []
+        values = ([row.get(field) for field in fields] for row in rows)
+        return b"".join(self.stream(fields, values))
+
+    def stream(self, fields, rows):
+        batch = self.header(fields)
+        for count, row in enumerate(rows, 1):
+            batch.append(self.line(fields, row))
+            if count % self.batch_size == 0:
+                yield "".join(batch).encode(self.charset)
+                batch = []
+        if batch:
+            yield "".join(batch).encode(self.charset)
+
+    def header(self, fields):
+        return []
+
+    def line(self, fields, row):
+        raise NotImplementedError
+
+
+class NDJSONRenderer(StreamingRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+
+    def line(self, fields, row):
+        return json.dumps(dict(zip(fields, row)), default=str) + "\n"
+
+
+class CSVRenderer(StreamingRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def __init__(self):
+        self.writer = csv.writer(_Echo())
+
+    def header(self, fields):
+        return [self.writer.writerow(fields)]
+
+    def line(self, fields, row):
+        return self.writer.writerow(row)
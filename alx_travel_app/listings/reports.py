@@ -0,0 +1,226 @@
+"""Monthly booking and revenue reports computed over columns.
+
+Rows are read with ``values_list`` in chunks into one ``array("q")`` of
+integers per column: dates as ordinals, money as cents (converted by the
+database), choices as codes. No model instance or ``Decimal`` is made per
+row. With NumPy installed the group-bys are ``bincount``/``unique`` over
+zero-copy views of those arrays; without it one pass over the arrays
+does the same sums.
+
+Bookings are reported in the month their stay starts, and so is the
+revenue of their payments. Cancelled bookings count towards cancellation
+rates but not towards stay lengths or revenue.
+"""
+
+from array import array
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+
+from django.db.models import BigIntegerField, F
+from django.db.models.functions import Cast, Round
+
+from listings.availability import ACTIVE_STATUSES
+from listings.models import Booking, Payment
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+ENGINES = ("numpy", "array")
+STATUSES = Booking.Status.values
+METHODS = Payment.PaymentMethod.values
+CANCELLED = STATUSES.index(Booking.Status.CANCELLED)
+
+
+def load_columns(queryset, fields, chunk_size=20000):
+    """Read ``queryset``'s ``fields`` into one ``array("q")`` per field.
+
+    ``fields`` maps each field (or annotation) to a function turning its
+    values into integers, or to ``None`` for integer columns.
+    """
+    columns = {name: array("q") for name in fields}
+    rows = queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        for (name, convert), values in zip(fields.items(), zip(*chunk)):
+            columns[name].extend(map(convert, values) if convert else values)
+    return columns
+
+
+def _month(ordinal):
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
+
+
+def month_label(month):
+    return f"{month // 12:04d}-{month % 12 + 1:02d}"
+
+
+def _columns(start_date, end_date):
+    status_codes = {status: code for code, status in enumerate(STATUSES)}
+    method_codes = {method: code for code, method in enumerate(METHODS)}
+    bookings = load_columns(
+        Booking.objects.filter(start_date__gte=start_date, start_date__lt=end_date),
+        {
+            "start_date": date.toordinal,
+            "end_date": date.toordinal,
+            "status": status_codes.__getitem__,
+        },
+    )
+    payments = load_columns(
+        Payment.objects.filter(
+            booking__start_date__gte=start_date,
+            booking__start_date__lt=end_date,
+            booking__status__in=ACTIVE_STATUSES,
+        ).annotate(cents=Cast(Round(F("amount") * 100), BigIntegerField())),
+        {
+            "booking__property_id": None,
+            "booking__start_date": date.toordinal,
+            "payment_method": method_codes.__getitem__,
+            "cents": None,
+        },
+    )
+    return bookings, payments
+
+
+def _numpy_sums(bookings, payments):
+    def view(column):
+        return numpy.frombuffer(column, dtype=numpy.int64)
+
+    def months(ordinals):
+        # Few distinct days: convert those, then index back per row.
+        days, inverse = numpy.unique(ordinals, return_inverse=True)
+        day_months = numpy.array([_month(day) for day in days.tolist()], numpy.int64)
+        return day_months[inverse]
+
+    start = view(bookings["start_date"])
+    booking_months, codes = numpy.unique(months(start), return_inverse=True)
+    size = len(booking_months)
+    cancelled = view(bookings["status"]) == CANCELLED
+    stayed = ~cancelled
+    nights = view(bookings["end_date"]) - start
+    month_sums = zip(
+        booking_months.tolist(),
+        numpy.bincount(codes, minlength=size).tolist(),
+        numpy.bincount(codes[cancelled], minlength=size).tolist(),
+        numpy.bincount(codes[stayed], minlength=size).tolist(),
+        numpy.bincount(codes[stayed], weights=nights[stayed], minlength=size)
+        .astype(numpy.int64)
+        .tolist(),
+    )
+
+    method = view(payments["payment_method"])
+    cents = view(payments["cents"])
+    method_sums = zip(
+        range(len(METHODS)),
+        numpy.bincount(method, minlength=len(METHODS)).tolist(),
+        numpy.rint(numpy.bincount(method, weights=cents, minlength=len(METHODS)))
+        .astype(numpy.int64)
+        .tolist(),
+    )
+
+    # One int64 key per (property, month); months stay below 10**6.
+    keys = view(payments["booking__property_id"]) * 10**6 + months(
+        view(payments["booking__start_date"])
+    )
+    groups, inverse = numpy.unique(keys, return_inverse=True)
+    revenue = numpy.rint(numpy.bincount(inverse, weights=cents)).astype(numpy.int64)
+    revenue = revenue.tolist()
+    return (
+        {month: rest for month, *rest in month_sums},
+        {code: rest for code, *rest in method_sums},
+        {divmod(key, 10**6): cents for key, cents in zip(groups.tolist(), revenue)},
+    )
+
+
+def _array_sums(bookings, payments):
+    month_of = {}
+    months = {}
+    for start, end, status in zip(
+        bookings["start_date"], bookings["end_date"], bookings["status"]
+    ):
+        month = month_of.get(start)
+        if month is None:
+            month = month_of[start] = _month(start)
+        sums = months.get(month)
+        if sums is None:
+            sums = months[month] = [0, 0, 0, 0]
+        sums[0] += 1
+        if status == CANCELLED:
+            sums[1] += 1
+        else:
+            sums[2] += 1
+            sums[3] += end - start
+
+    methods = {code: [0, 0] for code in range(len(METHODS))}
+    revenue = {}
+    for property_id, start, method, cents in zip(
+        payments["booking__property_id"],
+        payments["booking__start_date"],
+        payments["payment_method"],
+        payments["cents"],
+    ):
+        month = month_of.get(start)
+        if month is None:
+            month = month_of[start] = _month(start)
+        sums = methods[method]
+        sums[0] += 1
+        sums[1] += cents
+        key = (property_id, month)
+        revenue[key] = revenue.get(key, 0) + cents
+    return months, methods, revenue
+
+
+def build_report(start_date, end_date, by_property=False, engine=None):
+    """Report on bookings starting from ``start_date`` up to ``end_date``.
+
+    Returns ``months`` (bookings, cancellations, average stay in nights
+    and revenue per month), ``payment_methods`` (payments, amount and
+    share of the revenue per method) and, with ``by_property``,
+    ``properties`` (revenue per property and month). ``engine`` forces
+    ``"numpy"`` or ``"array"``; by default NumPy is used when installed.
+    """
+    engine = engine or ("numpy" if numpy else "array")
+    if engine == "numpy" and numpy is None:
+        raise ValueError("The numpy engine needs NumPy installed.")
+    bookings, payments = _columns(start_date, end_date)
+    sums = _numpy_sums if engine == "numpy" else _array_sums
+    months, methods, revenue = sums(bookings, payments)
+
+    monthly_revenue = {}
+    for (_, month), cents in revenue.items():
+        monthly_revenue[month] = monthly_revenue.get(month, 0) + cents
+    total = sum(cents for _, cents in methods.values())
+    report = {
+        "months": [
+            {
+                "month": month_label(month),
+                "bookings": count,
+                "cancelled": cancelled,
+                "cancellation_rate": round(cancelled / count, 4),
+                "average_stay": round(nights / stays, 2) if stays else 0.0,
+                "revenue": Decimal(monthly_revenue.get(month, 0)).scaleb(-2),
+            }
+            for month, (count, cancelled, stays, nights) in sorted(months.items())
+        ],
+        "payment_methods": [
+            {
+                "method": METHODS[code],
+                "payments": count,
+                "amount": Decimal(cents).scaleb(-2),
+                "share": round(cents / total, 4) if total else 0.0,
+            }
+            for code, (count, cents) in sorted(methods.items())
+        ],
+    }
+    if by_property:
+        report["properties"] = [
+            {
+                "property": property_id,
+                "month": month_label(month),
+                "revenue": Decimal(cents).scaleb(-2),
+            }
+            for (property_id, month), cents in sorted(revenue.items())
+        ]
+    return report
@@ -0,0 +1,279 @@
+"""Daily occupancy and revenue rollups.
+
+``DailyPropertyStats`` holds each property's booked nights, cancelled
+nights and revenue per day, and ``DailyLocationStats`` sums them per
+location, so a report over a date range reads a row per location and day
+instead of expanding every booking into nights.
+
+Booking and payment changes queue ``refresh`` for the days they touch
+(see ``listings.tasks``). A refresh recomputes those property days from
+the night index, cancelled bookings and payments, then adds the
+difference to the location rows it locks. ``rebuild`` recomputes both
+tables from scratch.
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from listings.availability import ACTIVE_STATUSES, nights
+from listings.models import (
+    Booking,
+    BookingNight,
+    DailyLocationStats,
+    DailyPropertyStats,
+    Payment,
+    Property,
+)
+from listings.pricing import cents
+
+FACTS = ("nights_booked", "nights_cancelled", "revenue")
+GROUPS = ("location", "date", "property")
+
+
+def _spread(amount, start_date, end_date):
+    """Split ``amount`` into cents per night, odd cents to the first nights."""
+    stay = list(nights(start_date, end_date))
+    if not stay:
+        return
+    share, extra = divmod(cents(amount), len(stay))
+    for index, night in enumerate(stay):
+        yield night, share + (index < extra)
+
+
+def day_facts(property_ids, start_date=None, end_date=None):
+    """Return ``{(property_id, date): [booked, cancelled, revenue in cents]}``.
+
+    Covers the days from ``start_date`` up to ``end_date``; a missing
+    bound leaves that side open. Three queries however many properties.
+    """
+    held = BookingNight.objects.filter(property_id__in=property_ids)
+    stays = Booking.objects.filter(property_id__in=property_ids)
+    if start_date:
+        held = held.filter(date__gte=start_date)
+        stays = stays.filter(end_date__gt=start_date)
+    if end_date:
+        held = held.filter(date__lt=end_date)
+        stays = stays.filter(start_date__lt=end_date)
+
+    def within(day):
+        return (not start_date or day >= start_date) and (
+            not end_date or day < end_date
+        )
+
+    facts = defaultdict(lambda: [0, 0, 0])
+    for key in held.values_list("property_id", "date").iterator(chunk_size=5000):
+        facts[key][0] += 1
+    cancelled = stays.filter(status=Booking.Status.CANCELLED).values_list(
+        "property_id", "start_date", "end_date"
+    )
+    for property_id, first, last in cancelled.iterator(chunk_size=5000):
+        for night in nights(first, last):
+            if within(night):
+                facts[property_id, night][1] += 1
+    paid = Payment.objects.filter(
+        booking__in=stays.filter(status__in=ACTIVE_STATUSES)
+    ).values_list(
+        "booking__property_id", "booking__start_date", "booking__end_date", "amount"
+    )
+    for property_id, first, last, amount in paid.iterator(chunk_size=5000):
+        for night, share in _spread(amount, first, last):
+            if within(night):
+                facts[property_id, night][2] += share
+    return facts
+
+
+def _stats(model, facts, **fields):
+    booked, cancelled, revenue = facts
+    return model(
+        nights_booked=booked,
+        nights_cancelled=cancelled,
+        revenue=Decimal(revenue).scaleb(-2),
+        **fields,
+    )
+
+
+def _add_to_locations(changes):
+    """Add ``{(location, date): [booked, cancelled, cents]}`` to location rows."""
+    changes = {key: change for key, change in changes.items() if any(change)}
+    if not changes:
+        return
+    days = [day for _, day in changes]
+    rows = {
+        (row.location, row.date): row
+        for row in DailyLocationStats.objects.select_for_update().filter(
+            location__in={location for location, _ in changes},
+            date__gte=min(days),
+            date__lte=max(days),
+        )
+    }
+    created, changed, emptied = [], [], []
+    for (location, day), (booked, cancelled, revenue) in changes.items():
+        row = rows.get((location, day))
+        if row is None:
+            created.append(
+                _stats(
+                    DailyLocationStats,
+                    (booked, cancelled, revenue),
+                    location=location,
+                    date=day,
+                )
+            )
+            continue
+        row.nights_booked += booked
+        row.nights_cancelled += cancelled
+        row.revenue += Decimal(revenue).scaleb(-2)
+        if row.nights_booked or row.nights_cancelled or row.revenue:
+            changed.append(row)
+        else:
+            emptied.append(row.pk)
+    DailyLocationStats.objects.bulk_create(created, batch_size=5000)
+    DailyLocationStats.objects.bulk_update(changed, FACTS, batch_size=5000)
+    DailyLocationStats.objects.filter(pk__in=emptied).delete()
+
+
+def _subtract(changes, rows):
+    for location, day, booked, cancelled, revenue in rows.values_list(
+        "location", "date", *FACTS
+    ):
+        change = changes[location, day]
+        change[0] -= booked
+        change[1] -= cancelled
+        change[2] -= cents(revenue)
+
+
+def refresh(property_ids, start_date=None, end_date=None):
+    """Recompute the properties' days in range and update their locations."""
+    with transaction.atomic():
+        locations = dict(
+            Property.objects.filter(pk__in=property_ids).values_list("pk", "location")
+        )
+        facts = day_facts(list(locations), start_date, end_date)
+        stale = DailyPropertyStats.objects.filter(property_id__in=property_ids)
+        if start_date:
+            stale = stale.filter(date__gte=start_date)
+        if end_date:
+            stale = stale.filter(date__lt=end_date)
+        changes = defaultdict(lambda: [0, 0, 0])
+        _subtract(changes, stale)
+        for (property_id, day), fact in facts.items():
+            change = changes[locations[property_id], day]
+            for index, value in enumerate(fact):
+                change[index] += value
+        stale.delete()
+        DailyPropertyStats.objects.bulk_create(
+            (
+                _stats(
+                    DailyPropertyStats,
+                    fact,
+                    property_id=property_id,
+                    location=locations[property_id],
+                    date=day,
+                )
+                for (property_id, day), fact in facts.items()
+            ),
+            batch_size=5000,
+        )
+        _add_to_locations(changes)
+
+
+def retire(property_id):
+    """Take a property about to be deleted out of its locations' totals."""
+    changes = defaultdict(lambda: [0, 0, 0])
+    _subtract(changes, DailyPropertyStats.objects.filter(property_id=property_id))
+    _add_to_locations(changes)
+
+
+def rebuild(batch_size=1000):
+    """Recompute both tables; return the number of property days written."""
+    properties = iter(Property.objects.order_by("pk").values_list("pk", "location"))
+    totals = defaultdict(lambda: [0, 0, 0])
+    written = 0
+    with transaction.atomic():
+        DailyPropertyStats.objects.all().delete()
+        DailyLocationStats.objects.all().delete()
+        while batch := dict(islice(properties, batch_size)):
+            facts = day_facts(list(batch))
+            DailyPropertyStats.objects.bulk_create(
+                (
+                    _stats(
+                        DailyPropertyStats,
+                        fact,
+                        property_id=property_id,
+                        location=batch[property_id],
+                        date=day,
+                    )
+                    for (property_id, day), fact in facts.items()
+                ),
+                batch_size=5000,
+            )
+            written += len(facts)
+            for (property_id, day), fact in facts.items():
+                total = totals[batch[property_id], day]
+                for index, value in enumerate(fact):
+                    total[index] += value
+        DailyLocationStats.objects.bulk_create(
+            (
+                _stats(DailyLocationStats, total, location=location, date=day)
+                for (location, day), total in totals.items()
+            ),
+            batch_size=5000,
+        )
+    return written
+
+
+def occupancy(start_date, end_date, location=None, group_by="location"):
+    """Occupancy and revenue from ``start_date`` up to ``end_date``.
+
+    Returns one dict per location, day or property of ``location`` (which
+    grouping by property requires), in key order. Available nights count
+    today's properties for every day of the range. Two queries.
+    """
+    properties = Property.objects.all()
+    stats = DailyLocationStats.objects.filter(date__gte=start_date, date__lt=end_date)
+    if location:
+        properties = properties.filter(location=location)
+        stats = stats.filter(location=location)
+    days = (end_date - start_date).days
+    if group_by == "location":
+        sizes = {
+            key: count * days
+            for key, count in properties.values_list("location")
+            .annotate(count=Count("pk"))
+            .order_by()
+        }
+        key = "location"
+    elif group_by == "date":
+        count = properties.count()
+        sizes = {start_date + timedelta(days=offset): count for offset in range(days)}
+        key = "date"
+    else:
+        sizes = {pk: days for pk in properties.values_list("pk", flat=True)}
+        stats = DailyPropertyStats.objects.filter(
+            location=location, date__gte=start_date, date__lt=end_date
+        )
+        key = "property_id"
+    totals = {
+        row[key]: row
+        for row in stats.values(key).annotate(**{name: Sum(name) for name in FACTS})
+    }
+    results = []
+    for group in sorted(sizes.keys() | totals.keys()):
+        row = totals.get(group, {})
+        booked = row.get("nights_booked") or 0
+        available = sizes.get(group, 0)
+        results.append(
+            {
+                key.removesuffix("_id"): group,
+                "nights_booked": booked,
+                "nights_available": available,
+                "occupancy_rate": round(booked / available, 4) if available else 0.0,
+                "nights_cancelled": row.get("nights_cancelled") or 0,
+                "revenue": row.get("revenue") or Decimal("0.00"),
+            }
+        )
+    return results
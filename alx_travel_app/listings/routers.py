@@ -0,0 +1,70 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = "default"
+
+
+class RoutingState:
+    """Per-request routing flags; ``wrote`` is set by the first write."""
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state = ContextVar("replica_routing")
+
+
+@contextmanager
+def routing_scope(pinned=False):
+    """Route the enclosed queries with fresh state, optionally pinned.
+
+    ``ReplicaPinningMiddleware`` opens one scope per request. Outside any
+    scope a write pins the rest of the current context to the primary.
+    """
+    token = _state.set(RoutingState(pinned))
+    try:
+        yield _state.get()
+    finally:
+        _state.reset(token)
+
+
+def reads_pinned():
+    """True when this context's reads go to the primary despite replicas."""
+    state = _state.get(None)
+    replicas = getattr(settings, "DATABASE_REPLICAS", ())
+    return bool(replicas and state and state.pinned)
+
+
+class PrimaryReplicaRouter:
+    """Send reads to ``DATABASE_REPLICAS`` and everything else to the primary.
+
+    Reads stay on the primary when no replica is configured, once the
+    current request (or context) has written, and when the request was
+    pinned because the client wrote within ``REPLICA_PIN_SECONDS``.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", ())
+        if not replicas or reads_pinned():
+            return PRIMARY
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get(None)
+        if state is None:
+            state = RoutingState()
+            _state.set(state)
+        state.pinned = state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from replication, never from migrate.
+        return db not in getattr(settings, "DATABASE_REPLICAS", ())
@@ -0,0 +1,164 @@
+"""The OpenAPI schema, generated once and served as a static artifact.
+
+``manage.py generate_schema`` renders the schema with drf-yasg into
+``OPENAPI_SCHEMA_DIR`` as JSON and YAML, each with a gzipped copy, next to
+a manifest holding the fingerprint of the URLconf it describes: every
+route, its view and actions, and the fields of the view's serializer.
+
+A process loads the artifact on the first schema request and compares
+that fingerprint with its own URLconf. A missing or stale artifact is
+logged and replaced by a schema generated in memory, once per process,
+so the endpoint stays correct until the command is run again.
+``SchemaView`` then answers from memory with an ETag and, for clients
+that accept it, the gzipped body.
+"""
+
+import functools
+import gzip
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+
+import drf_yasg
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.views import View
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+from drf_yasg.generators import OpenAPISchemaGenerator
+
+logger = logging.getLogger("listings.schema")
+
+API_INFO = openapi.Info(
+    title="ALX Travel API",
+    default_version="v1",
+    description="API documentation for ALX Travel App",
+)
+FORMATS = {
+    "json": (OpenAPICodecJson, "application/json"),
+    "yaml": (OpenAPICodecYaml, "application/yaml"),
+}
+MANIFEST = "manifest.json"
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+
+def _describe(patterns, prefix=""):
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from _describe(pattern.url_patterns, route)
+            continue
+        if not isinstance(pattern, URLPattern):
+            continue
+        callback = pattern.callback
+        view = getattr(callback, "cls", None) or getattr(callback, "view_class", None)
+        view = view or callback
+        fields = {}
+        serializer_class = getattr(view, "serializer_class", None)
+        if serializer_class is not None:
+            fields = {
+                name: type(field).__name__
+                for name, field in serializer_class().get_fields().items()
+            }
+        yield [
+            route,
+            f"{view.__module__}.{view.__qualname__}",
+            getattr(callback, "actions", None),
+            fields,
+        ]
+
+
+def url_fingerprint(urlconf=None):
+    """Hash of what the schema of ``urlconf`` is generated from."""
+    description = [drf_yasg.__version__, *_describe(get_resolver(urlconf).url_patterns)]
+    encoded = json.dumps(description, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def render_schema():
+    """Return ``{format: body}`` for the current URLconf's schema."""
+    schema = OpenAPISchemaGenerator(API_INFO).get_schema(request=None, public=True)
+    return {
+        name: codec(validators=[]).encode(schema)
+        for name, (codec, _) in FORMATS.items()
+    }
+
+
+def write_schema(directory):
+    """Render the schema into ``directory``; return its fingerprint."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, body in render_schema().items():
+        (directory / f"openapi.{name}").write_bytes(body)
+        (directory / f"openapi.{name}.gz").write_bytes(
+            gzip.compress(body, compresslevel=9, mtime=0)
+        )
+    fingerprint = url_fingerprint()
+    # Written last: a manifest only ever describes complete files.
+    (directory / MANIFEST).write_text(json.dumps({"fingerprint": fingerprint}))
+    return fingerprint
+
+
+def _read(directory):
+    directory = Path(directory)
+    try:
+        manifest = json.loads((directory / MANIFEST).read_text())
+    except FileNotFoundError:
+        logger.warning("No OpenAPI schema in %s; generating it in memory", directory)
+        return None
+    if manifest["fingerprint"] != url_fingerprint():
+        logger.warning("Stale OpenAPI schema in %s; generating it in memory", directory)
+        return None
+    return {
+        name: (
+            (directory / f"openapi.{name}").read_bytes(),
+            (directory / f"openapi.{name}.gz").read_bytes(),
+        )
+        for name in FORMATS
+    }
+
+
+@functools.cache
+def load_schema():
+    """Return ``{format: (body, gzipped body, etag)}`` for this process."""
+    bodies = _read(settings.OPENAPI_SCHEMA_DIR)
+    if bodies is None:
+        bodies = {
+            name: (body, gzip.compress(body, mtime=0))
+            for name, body in render_schema().items()
+        }
+    return {
+        name: (body, gzipped, f'W/"{hashlib.md5(body).hexdigest()}"')
+        for name, (body, gzipped) in bodies.items()
+    }
+
+
+class SchemaView(View):
+    """Serves the loaded schema; clients revalidate with ``If-None-Match``."""
+
+    http_method_names = ["get", "head", "options"]
+
+    def get(self, request, format):
+        try:
+            body, gzipped, etag = load_schema()[format]
+        except KeyError:
+            raise Http404(f"No {format} schema.")
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            if ACCEPTS_GZIP.search(request.headers.get("Accept-Encoding", "")):
+                response = HttpResponse(gzipped, content_type=FORMATS[format][1])
+                response["Content-Encoding"] = "gzip"
+            else:
+                response = HttpResponse(body, content_type=FORMATS[format][1])
+        response["ETag"] = etag
+        patch_vary_headers(response, ["Accept-Encoding"])
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
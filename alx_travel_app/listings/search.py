@@ -0,0 +1,207 @@
+"""Ranked full-text search over listings and properties.
+
+On SQLite each model has an external-content FTS5 table: the index stores
+no copy of the text, and triggers on the model's table keep it in step
+with every write, bulk and raw ones included. On MySQL the same columns
+carry FULLTEXT indexes queried in boolean mode. Any other backend falls
+back to an unranked ``icontains`` scan.
+
+Every word of the query must match, and the last characters typed need
+not be a whole word: ``"bea hou"`` finds "Beach House".
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from listings.models import Listing, Property
+
+MAX_TERMS = 10
+
+
+class Index:
+    """One searched model: its table, indexed columns and their weights."""
+
+    def __init__(self, kind, model, title, columns, weights):
+        self.kind = kind
+        self.model = model
+        self.title = title
+        self.columns = columns
+        self.weights = weights
+        self.table = model._meta.db_table
+        self.fts_table = f"{self.table}_fts"
+
+
+INDEXES = (
+    Index("listing", Listing, "title", ("title", "description"), (10.0, 1.0)),
+    Index(
+        "property",
+        Property,
+        "name",
+        ("name", "description", "location"),
+        (10.0, 1.0, 5.0),
+    ),
+)
+KINDS = {index.kind: index for index in INDEXES}
+
+
+def _sqlite_triggers(index):
+    columns = ", ".join(index.columns)
+    new = ", ".join(f"new.{column}" for column in index.columns)
+    old = ", ".join(f"old.{column}" for column in index.columns)
+    insert = f"INSERT INTO {index.fts_table}(rowid, {columns}) VALUES (new.id, {new});"
+    delete = (
+        f"INSERT INTO {index.fts_table}({index.fts_table}, rowid, {columns}) "
+        f"VALUES ('delete', old.id, {old});"
+    )
+    return {
+        f"{index.fts_table}_ai": f"AFTER INSERT ON {index.table} BEGIN {insert} END",
+        f"{index.fts_table}_ad": f"AFTER DELETE ON {index.table} BEGIN {delete} END",
+        f"{index.fts_table}_au": (
+            f"AFTER UPDATE OF {columns} ON {index.table} "
+            f"BEGIN {delete} {insert} END"
+        ),
+    }
+
+
+def install(connection=connection):
+    """Create the search indexes for ``connection``'s backend.
+
+    Safe to repeat. On SQLite a missing trigger (rebuilding a table in a
+    migration drops its triggers) is recreated and the index rebuilt from
+    the table.
+    """
+    tables = set(connection.introspection.table_names())
+    if not all(index.table in tables for index in INDEXES):
+        return
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            existing = {
+                name
+                for (name,) in cursor.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+                )
+            }
+            for index in INDEXES:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {index.fts_table} "
+                    f"USING fts5({', '.join(index.columns)}, "
+                    f"content='{index.table}', content_rowid='id', "
+                    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+                triggers = _sqlite_triggers(index)
+                if triggers.keys() <= existing:
+                    continue
+                for name, body in triggers.items():
+                    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+                cursor.execute(
+                    f"INSERT INTO {index.fts_table}({index.fts_table}) "
+                    f"VALUES ('rebuild')"
+                )
+        elif connection.vendor == "mysql":
+            for index in INDEXES:
+                cursor.execute(
+                    "SELECT 1 FROM information_schema.statistics "
+                    "WHERE table_schema = DATABASE() AND table_name = %s "
+                    "AND index_name = %s",
+                    [index.table, f"{index.kind}_fulltext_idx"],
+                )
+                if cursor.fetchone() is None:
+                    cursor.execute(
+                        f"ALTER TABLE {index.table} ADD FULLTEXT INDEX "
+                        f"{index.kind}_fulltext_idx ({', '.join(index.columns)})"
+                    )
+
+
+def uninstall(connection=connection):
+    with connection.cursor() as cursor:
+        for index in INDEXES:
+            if connection.vendor == "sqlite":
+                for name in _sqlite_triggers(index):
+                    cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+                cursor.execute(f"DROP TABLE IF EXISTS {index.fts_table}")
+            elif connection.vendor == "mysql":
+                cursor.execute(
+                    f"ALTER TABLE {index.table} DROP INDEX {index.kind}_fulltext_idx"
+                )
+
+
+def terms(query):
+    """Split a query into at most ``MAX_TERMS`` lowercase words."""
+    return re.findall(r"\w+", query.lower())[:MAX_TERMS]
+
+
+def _sqlite_matches(words, limit):
+    match = " ".join(f'"{word}"*' for word in words)
+    selects = [
+        f"SELECT '{index.kind}', rowid, "
+        f"-bm25({index.fts_table}, {', '.join(map(str, index.weights))}) AS score "
+        f"FROM {index.fts_table} WHERE {index.fts_table} MATCH %s"
+        for index in INDEXES
+    ]
+    sql = " UNION ALL ".join(selects) + " ORDER BY score DESC LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match] * len(INDEXES) + [limit])
+        return cursor.fetchall()
+
+
+def _mysql_matches(words, limit):
+    match = " ".join(f"+{word}*" for word in words)
+    selects = []
+    for index in INDEXES:
+        against = f"MATCH({', '.join(index.columns)}) AGAINST (%s IN BOOLEAN MODE)"
+        selects.append(
+            f"(SELECT '{index.kind}', id, {against} AS score "
+            f"FROM {index.table} WHERE {against})"
+        )
+    sql = " UNION ALL ".join(selects) + " ORDER BY score DESC LIMIT %s"
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [match] * 2 * len(INDEXES) + [limit])
+        return cursor.fetchall()
+
+
+def _scanned_matches(words, limit):
+    rows = []
+    for index in INDEXES:
+        found = index.model.objects.order_by("pk")
+        for word in words:
+            found = found.filter(
+                Q.create(
+                    [(f"{column}__icontains", word) for column in index.columns],
+                    connector=Q.OR,
+                )
+            )
+        rows += [
+            (index.kind, pk, 0.0) for pk in found.values_list("pk", flat=True)[:limit]
+        ]
+    return rows[:limit]
+
+
+def search(query, limit=20):
+    """Return the best ``limit`` matches for ``query``, best first.
+
+    Each match is a dict with the object's ``type``, ``id`` and ``title``
+    and its ``score``; higher scores rank better.
+    """
+    words = terms(query)
+    if not words:
+        return []
+    if connection.vendor == "sqlite":
+        rows = _sqlite_matches(words, limit)
+    elif connection.vendor == "mysql":
+        rows = _mysql_matches(words, limit)
+    else:
+        rows = _scanned_matches(words, limit)
+    titles = {}
+    for kind, index in KINDS.items():
+        ids = [pk for row_kind, pk, _ in rows if row_kind == kind]
+        if ids:
+            titles[kind] = dict(
+                index.model.objects.filter(pk__in=ids).values_list("pk", index.title)
+            )
+    return [
+        {"type": kind, "id": pk, "title": titles[kind][pk], "score": round(score, 4)}
+        for kind, pk, score in rows
+        if pk in titles[kind]
+    ]
@@ -1,5 +1,16 @@
 from rest_framework import serializers
-from .models import User, Property, Booking, Review, Payment, Message, Listing
+from listings import pricing, rollups
+from .models import (
+    User,
+    Property,
+    Booking,
+    Review,
+    Payment,
+    Message,
+    Listing,
+    ConversationMember,
+    PropertyCalendar,
+)
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -14,12 +25,152 @@ class PropertySerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
-class BookingSerializer(serializers.ModelSerializer):
-    user = serializers.ReadOnlyField(source="user.id")
+class UserSummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ["id", "username", "first_name", "last_name"]
+
+
+class PropertySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Property
+        fields = ["id", "name", "location", "price_per_night"]
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves ids from ``context["related"][field_name]`` when present.
+
+    Bulk writes load every referenced row with one query up front instead
+    of one lookup per item.
+    """
+
+    def to_internal_value(self, data):
+        related = self.context.get("related", {}).get(self.field_name)
+        if related is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return related[int(data)]
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+
+class DateRangeMixin:
+    """Checks that ``end_date`` falls after ``start_date``.
+
+    A bound missing from a partial update is read from the instance.
+    ``max_range_days``, when set, caps the length of the range.
+    """
+
+    max_range_days = None
+
+    def validate(self, attrs):
+        start_date = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        if start_date and end_date:
+            days = (end_date - start_date).days
+            if days <= 0:
+                raise serializers.ValidationError(
+                    {"end_date": "End date must be after start date."}
+                )
+            if self.max_range_days and days > self.max_range_days:
+                raise serializers.ValidationError(
+                    {
+                        "end_date": "The range can span at most "
+                        f"{self.max_range_days} days."
+                    }
+                )
+        return super().validate(attrs)
+
+
+class BookingSerializer(DateRangeMixin, serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+    # user_id is the local column; "user.id" would load the related User.
+    user = serializers.ReadOnlyField(source="user_id")
 
     class Meta:
         model = Booking
         fields = "__all__"
+        read_only_fields = ["total_price"]
+
+    stay_fields = {"property", "start_date", "end_date"}
+    # One calendar window, so one request cannot hold a property for years.
+    max_range_days = PropertyCalendar.WINDOW_DAYS
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        start_date = attrs.get("start_date", getattr(self.instance, "start_date", None))
+        end_date = attrs.get("end_date", getattr(self.instance, "end_date", None))
+        # The price is quoted from the rate calendar, and only re-quoted when
+        # the stay itself changes so a status change keeps the agreed price.
+        # Bulk writes quote the whole batch at once instead.
+        if self.context.get("defer_pricing"):
+            return attrs
+        if self.instance is None or self.stay_fields & attrs.keys():
+            property_obj = attrs.get("property") or self.instance.property
+            attrs["total_price"] = pricing.quote(property_obj.pk, start_date, end_date)
+        return attrs
+
+
+class BookingDetailSerializer(BookingSerializer):
+    property_summary = PropertySummarySerializer(source="property", read_only=True)
+    user_summary = UserSummarySerializer(source="user", read_only=True)
+
+
+class AvailabilitySerializer(DateRangeMixin, serializers.Serializer):
+    property = serializers.PrimaryKeyRelatedField(queryset=Property.objects.all())
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField()
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class TopRatedSerializer(serializers.Serializer):
+    min_reviews = serializers.IntegerField(min_value=1, default=1)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+
+class OccupancyQuerySerializer(DateRangeMixin, serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    location = serializers.CharField(required=False)
+    group_by = serializers.ChoiceField(choices=rollups.GROUPS, default="location")
+
+    max_range_days = 366
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if attrs["group_by"] == "property" and "location" not in attrs:
+            raise serializers.ValidationError(
+                {"location": "Required when grouping by property."}
+            )
+        return attrs
+
+
+class ReportQuerySerializer(DateRangeMixin, serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    by_property = serializers.BooleanField(default=False)
+
+
+class StaySerializer(DateRangeMixin, serializers.Serializer):
+    property = serializers.IntegerField()
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    max_range_days = PropertyCalendar.WINDOW_DAYS
+
+
+class QuoteSerializer(serializers.Serializer):
+    stays = serializers.ListField(
+        child=StaySerializer(), allow_empty=False, max_length=500
+    )
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -40,7 +191,29 @@ class MessageSerializer(serializers.ModelSerializer):
         fields = "__all__"
 
 
+class ThreadSerializer(serializers.ModelSerializer):
+    """A user's inbox row; ``id`` is the conversation's."""
+
+    id = serializers.ReadOnlyField(source="conversation_id")
+    peer = UserSummarySerializer(read_only=True)
+    last_message = MessageSerializer(source="conversation.last_message", read_only=True)
+
+    class Meta:
+        model = ConversationMember
+        fields = ["id", "peer", "unread_count", "last_message_at", "last_message"]
+
+
 class ListingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Listing
         fields = "__all__"
+
+
+class PropertySearchSerializer(DateRangeMixin, serializers.Serializer):
+    location = serializers.CharField(required=False)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    max_price = serializers.DecimalField(
+        max_digits=10, decimal_places=2, required=False
+    )
+    limit = serializers.IntegerField(min_value=1, max_value=500, default=50)
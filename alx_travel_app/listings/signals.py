@@ -0,0 +1,165 @@
+from django.db import connections
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    post_delete,
+    post_migrate,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from listings import messaging, rollups, search
+from listings.availability import WINDOW_BYTES, refresh_calendar
+from listings.cache import invalidate_listing
+from listings.models import (
+    Booking,
+    DailyPropertyStats,
+    Listing,
+    Message,
+    Payment,
+    Property,
+    PropertyCalendar,
+    RateOverride,
+    Review,
+)
+from listings.pricing import invalidate_rates
+from listings.ratings import adjust_ratings, refresh_ratings
+from listings.tasks import schedule_rollups
+
+
+@receiver(post_save, sender=Property)
+def create_empty_calendar(sender, instance, created, raw=False, **kwargs):
+    """A new property has no bookings, so its calendar starts out empty."""
+    if created and not raw:
+        PropertyCalendar.objects.get_or_create(
+            property=instance,
+            defaults={
+                "window_start": timezone.localdate(),
+                "occupancy": bytes(WINDOW_BYTES),
+            },
+        )
+
+
+@receiver(post_delete, sender=Booking)
+def release_booking_nights(sender, instance, origin=None, **kwargs):
+    """A deleted booking's night rows go with it; clear them from the bitmap."""
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    # Deleting the property takes its calendar along.
+    if origin_model is not Property:
+        refresh_calendar(instance.property_id)
+
+
+@receiver(post_save, sender=Listing)
+@receiver(post_delete, sender=Listing)
+def invalidate_listing_cache(sender, instance, **kwargs):
+    invalidate_listing(instance.pk)
+
+
+@receiver(post_save, sender=Property)
+def invalidate_property_rates(sender, instance, **kwargs):
+    invalidate_rates(instance.pk)
+
+
+@receiver(post_save, sender=RateOverride)
+@receiver(post_delete, sender=RateOverride)
+def invalidate_override_rates(sender, instance, **kwargs):
+    invalidate_rates(instance.property_id)
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, raw=False, **kwargs):
+    """Move the review's rating into its property's aggregates."""
+    if raw:
+        return
+    current = (instance.property_id_id, instance.rating)
+    if created:
+        adjust_ratings(*current, 1)
+    elif instance._counted_as is None:
+        # Saved without being loaded, so what it replaced is unknown.
+        refresh_ratings([instance.property_id_id])
+    elif instance._counted_as != current:
+        adjust_ratings(*instance._counted_as, -1)
+        adjust_ratings(*current, 1)
+    instance._counted_as = current
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    counted = instance._counted_as or (instance.property_id_id, instance.rating)
+    adjust_ratings(*counted, -1)
+    instance._counted_as = None
+
+
+@receiver(post_migrate)
+def install_search_index(sender, using, **kwargs):
+    """Restore search triggers that rebuilding a table in a migration drops."""
+    if sender.name == "listings":
+        search.install(connections[using])
+
+
+@receiver(pre_save, sender=Message)
+def thread_message(sender, instance, raw=False, **kwargs):
+    if not raw and instance.conversation_id is None:
+        instance.conversation_id = messaging.conversation_for(
+            instance.sender_id, instance.recipient_id, timezone.now()
+        )
+
+
+@receiver(post_save, sender=Message)
+def deliver_message(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        messaging.deliver(instance)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def refresh_booking_days(sender, instance, raw=False, **kwargs):
+    """Queue a rollup refresh of the days the booking covers and covered."""
+    if raw:
+        return
+    stay = (instance.property_id, instance.start_date, instance.end_date)
+    stays = [stay]
+    if instance._stored_stay:
+        stays.append(instance._stored_stay)
+    elif not kwargs.get("created", True):
+        # Saved without being loaded, so the days it left are unknown.
+        stays.append((instance.property_id, None, None))
+    schedule_rollups(stays)
+    instance._stored_stay = stay
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def refresh_payment_days(sender, instance, raw=False, **kwargs):
+    """Queue a rollup refresh of the nights the payment is spread over."""
+    if raw:
+        return
+    stay = (
+        Booking.objects.filter(pk=instance.booking_id)
+        .values_list("property_id", "start_date", "end_date")
+        .first()
+    )
+    # A booking deleted with its payments refreshes its own days.
+    if stay:
+        schedule_rollups([stay])
+
+
+@receiver(post_save, sender=Property)
+def relocate_property_days(sender, instance, created, raw=False, **kwargs):
+    """Move a relocated property's rollups to its new location."""
+    if created or raw:
+        return
+    moved = (
+        DailyPropertyStats.objects.filter(property=instance)
+        .exclude(location=instance.location)
+        .exists()
+    )
+    if moved:
+        schedule_rollups([(instance.pk, None, None)])
+
+
+@receiver(pre_delete, sender=Property)
+def retire_property_days(sender, instance, **kwargs):
+    rollups.retire(instance.pk)
@@ -0,0 +1,116 @@
+"""Booking work that runs on a Celery worker instead of in the request.
+
+Creating a booking only stores it as pending and reserves its nights;
+``confirm_booking`` is queued once that transaction commits and does the
+rest. It may run more than once for the same booking (retries, redelivery
+after a lost worker, a duplicate enqueue), so every run first claims the
+pending booking and does all of its writes in the claiming transaction:
+either a run prices, pays for, confirms and announces the booking, or it
+changes nothing and a later run finds the booking no longer pending.
+
+Refreshes of the occupancy rollups are queued the same way once a booking
+or payment change commits.
+
+Tasks are queued the moment the primary commits, before a replica may
+have caught up, so every task reads and writes on the primary.
+"""
+
+from datetime import date
+
+from celery import Task, shared_task
+from django.db import IntegrityError, OperationalError, transaction
+from django.utils import timezone
+
+from listings import pricing, rollups
+from listings.models import Booking, Message, Payment
+from listings.routers import routing_scope
+
+
+class PrimaryTask(Task):
+    """Runs each call in its own routing scope, pinned to the primary."""
+
+    def __call__(self, *args, **kwargs):
+        with routing_scope(pinned=True):
+            return super().__call__(*args, **kwargs)
+
+
+@shared_task(
+    base=PrimaryTask,
+    autoretry_for=(OperationalError,),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": 5},
+)
+def confirm_booking(booking_id):
+    """Confirm a pending booking; return its id, or None if nothing was done."""
+    with transaction.atomic():
+        pending = Booking.objects.filter(pk=booking_id, status=Booking.Status.PENDING)
+        booking = (
+            pending.select_related("property").select_for_update(of=("self",)).first()
+        )
+        if booking is None:
+            return None
+        total = pricing.quote(booking.property_id, booking.start_date, booking.end_date)
+        claimed = pending.update(
+            status=Booking.Status.CONFIRMED,
+            total_price=total,
+            updated_at=timezone.now(),
+        )
+        if not claimed:
+            return None
+        Payment.objects.create(booking_id=booking.pk, amount=total)
+        Message.objects.create(
+            sender_id=booking.property.host_id,
+            recipient_id=booking.user_id,
+            message_body=(
+                f"Your booking at {booking.property.name} from {booking.start_date} "
+                f"to {booking.end_date} is confirmed. Total: {total}."
+            ),
+        )
+    return booking_id
+
+
+@shared_task(
+    base=PrimaryTask,
+    autoretry_for=(OperationalError, IntegrityError),
+    retry_backoff=True,
+    retry_kwargs={"max_retries": 5},
+)
+def refresh_rollups(property_id, start_date=None, end_date=None):
+    """Recompute a property's rollup days between two ISO dates.
+
+    A missing date leaves the range open on that side. Concurrent
+    refreshes of one location can collide creating its rows; the loser
+    rolls back and is retried.
+    """
+    rollups.refresh(
+        [property_id],
+        start_date and date.fromisoformat(start_date),
+        end_date and date.fromisoformat(end_date),
+    )
+
+
+def schedule_rollups(stays):
+    """Queue one ``refresh_rollups`` per property once the transaction commits.
+
+    ``stays`` are ``(property_id, start_date, end_date)`` tuples; ``None``
+    dates refresh the property's whole history.
+    """
+    spans = {}
+    for property_id, start_date, end_date in stays:
+        if property_id in spans:
+            first, last = spans[property_id]
+            start_date = start_date and first and min(first, start_date)
+            end_date = end_date and last and max(last, end_date)
+        spans[property_id] = (start_date, end_date)
+    for property_id, (start_date, end_date) in spans.items():
+        args = (
+            property_id,
+            start_date and start_date.isoformat(),
+            end_date and end_date.isoformat(),
+        )
+        transaction.on_commit(
+            lambda args=args: refresh_rollups.apply_async(
+                args, retry=False, ignore_result=True
+            ),
+            robust=True,
+        )
@@ -1,3 +1,2049 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.utils import load_backend
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from listings import availability, messaging, pricing, reports, rollups, search
+from listings.admin import EstimatedCountPaginator
+from listings.fastpath import compile_plan
+from listings.middleware import QueryProfile, slow_requests
+from listings.models import (
+    User,
+    Listing,
+    Property,
+    PropertyCalendar,
+    Booking,
+    BookingNight,
+    Conversation,
+    ConversationMember,
+    DailyLocationStats,
+    DailyPropertyStats,
+    Message,
+    Payment,
+    RateOverride,
+    Review,
+)
+from listings.routers import PrimaryReplicaRouter, routing_scope
+from listings.schema import load_schema, url_fingerprint
+from listings.serializers import ListingSerializer, BookingSerializer, UserSerializer
+from listings.tasks import confirm_booking, refresh_rollups
+from listings.throttling import CostThrottle
+from listings.views import ListingViewSet
+
+# Tasks run inline, so the suite never needs a running broker.
+eager_tasks = override_settings(CELERY_TASK_ALWAYS_EAGER=True)
+
+
+def setUpModule():
+    eager_tasks.enable()
+
+
+def tearDownModule():
+    eager_tasks.disable()
+
+
+def make_user(username="guest", **kwargs):
+    return User.objects.create_user(
+        username=username, email=f"{username}@example.com", password=None, **kwargs
+    )
+
+
+def make_property(host, **kwargs):
+    fields = {
+        "name": "Beach House",
+        "description": "By the sea",
+        "location": "Miami, FL",
+        "price_per_night": Decimal("100.00"),
+    }
+    fields.update(kwargs)
+    return Property.objects.create(host=host, **fields)
+
+
+def booking_payload(property_obj, start_date, end_date):
+    return {
+        "property": property_obj.pk,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "total_price": "300.00",
+    }
+
+
+class BookingAvailabilityTests(TestCase):
+    def setUp(self):
+        self.guest = make_user()
+        self.property = make_property(make_user("host", role=User.Role.HOST))
+        self.client = APIClient()
+        self.client.force_authenticate(self.guest)
+
+    def book(self, start_date, end_date):
+        return self.client.post(
+            "/api/bookings/",
+            booking_payload(self.property, start_date, end_date),
+            format="json",
+        )
+
+    def test_overlapping_booking_is_rejected(self):
+        self.assertEqual(self.book(date(2030, 1, 1), date(2030, 1, 4)).status_code, 201)
+        response = self.book(date(2030, 1, 3), date(2030, 1, 6))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(BookingNight.objects.count(), 3)
+
+    def test_back_to_back_bookings_are_allowed(self):
+        self.assertEqual(self.book(date(2030, 1, 1), date(2030, 1, 4)).status_code, 201)
+        self.assertEqual(self.book(date(2030, 1, 4), date(2030, 1, 6)).status_code, 201)
+
+    def test_date_range_is_checked_against_the_stored_dates(self):
+        booking_id = self.book(date(2030, 1, 5), date(2030, 1, 8)).data["id"]
+        response = self.client.patch(
+            f"/api/bookings/{booking_id}/", {"end_date": "2030-01-05"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data["end_date"], ["End date must be after start date."]
+        )
+
+    def test_stays_are_capped_at_the_calendar_window(self):
+        response = self.book(date(2030, 1, 1), date(2031, 1, 2))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("at most 365 days", response.data["end_date"][0])
+        response = self.client.post(
+            "/api/bookings/bulk/",
+            [booking_payload(self.property, date(2030, 1, 1), date(2130, 1, 1))],
+            format="json",
+        )
+        self.assertEqual(response.data["results"][0]["status"], 400)
+        self.assertFalse(BookingNight.objects.exists())
+        self.assertEqual(self.book(date(2030, 1, 1), date(2031, 1, 1)).status_code, 201)
+
+    def test_cancelling_releases_nights(self):
+        booking_id = self.book(date(2030, 1, 1), date(2030, 1, 4)).data["id"]
+        response = self.client.patch(
+            f"/api/bookings/{booking_id}/",
+            {"status": Booking.Status.CANCELLED},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(
+            availability.is_available(
+                self.property.pk, date(2030, 1, 1), date(2030, 1, 4)
+            )
+        )
+        self.assertEqual(self.book(date(2030, 1, 2), date(2030, 1, 3)).status_code, 201)
+
+    def test_end_date_must_follow_start_date(self):
+        response = self.book(date(2030, 1, 4), date(2030, 1, 4))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("end_date", response.data)
+
+    def test_availability_endpoint(self):
+        self.book(date(2030, 1, 1), date(2030, 1, 4))
+        url = "/api/bookings/availability/"
+        params = {"property": self.property.pk, "start_date": "2030-01-03"}
+        busy = self.client.get(url, {**params, "end_date": "2030-01-05"})
+        free = self.client.get(
+            url, {**params, "start_date": "2030-01-04", "end_date": "2030-01-05"}
+        )
+        self.assertFalse(busy.data["available"])
+        self.assertTrue(free.data["available"])
+
+
+class BookingConfirmationTests(TestCase):
+    def setUp(self):
+        self.guest = make_user()
+        self.host = make_user("host", role=User.Role.HOST)
+        self.property = make_property(self.host, price_per_night=Decimal("120.00"))
+        self.client = APIClient()
+        self.client.force_authenticate(self.guest)
+
+    def book(self):
+        return self.client.post(
+            "/api/bookings/",
+            booking_payload(self.property, date(2030, 1, 1), date(2030, 1, 4)),
+            format="json",
+        )
+
+    def test_booking_is_answered_pending_and_confirmed_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.book()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["status"], Booking.Status.PENDING)
+        self.assertFalse(Payment.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        booking = Booking.objects.get(pk=response.data["id"])
+        self.assertEqual(booking.status, Booking.Status.CONFIRMED)
+        self.assertEqual(booking.total_price, Decimal("360.00"))
+        payment = Payment.objects.get(booking=booking)
+        self.assertEqual(payment.amount, Decimal("360.00"))
+        message = Message.objects.get()
+        self.assertEqual((message.sender, message.recipient), (self.host, self.guest))
+        self.assertIn("2030-01-01", message.message_body)
+
+    def test_unreachable_broker_does_not_fail_the_booking(self):
+        with mock.patch.object(
+            confirm_booking, "apply_async", side_effect=OSError("unreachable")
+        ) as publish:
+            with self.assertLogs("django", "ERROR") as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.book()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["status"], Booking.Status.PENDING)
+        self.assertEqual(publish.call_args.kwargs["retry"], False)
+        self.assertIn("unreachable", logs.output[0])
+
+    def test_confirmation_is_idempotent(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            booking_id = self.book().data["id"]
+        self.assertIsNone(confirm_booking.delay(booking_id).get())
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(Message.objects.count(), 1)
+
+    def test_cancelled_or_missing_bookings_are_left_alone(self):
+        booking_id = self.book().data["id"]
+        Booking.objects.filter(pk=booking_id).update(status=Booking.Status.CANCELLED)
+        self.assertIsNone(confirm_booking.delay(booking_id).get())
+        self.assertIsNone(confirm_booking.delay(booking_id + 1).get())
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(
+            Booking.objects.get(pk=booking_id).status, Booking.Status.CANCELLED
+        )
+
+
+class PricingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.property = make_property(make_user("host", role=User.Role.HOST))
+        today = timezone.localdate()
+        self.monday = today + timedelta(days=7 - today.weekday())
+        season = {
+            "property": self.property,
+            "start_date": self.monday,
+            "end_date": self.monday + timedelta(days=28),
+        }
+        RateOverride.objects.create(**season, price_per_night=Decimal("150.00"))
+        RateOverride.objects.create(
+            **season,
+            weekdays=RateOverride.WEEKEND_NIGHTS,
+            price_per_night=Decimal("200.00"),
+        )
+        self.client = APIClient()
+
+    def stay(self):
+        # Sunday before the season, Monday-Thursday, Friday-Saturday, Sunday.
+        return self.monday - timedelta(days=1), self.monday + timedelta(days=7)
+
+    def test_overrides_price_seasons_and_weekends(self):
+        expected = Decimal("100.00") + 4 * 150 + 2 * 200 + 150
+        self.assertEqual(pricing.quote(self.property.pk, *self.stay()), expected)
+        outside_window = pricing.quote_many(
+            [(self.property.pk, *self.stay())], window_start=self.monday
+        )
+        self.assertEqual(outside_window, [expected])
+
+    def test_stay_totals_match_the_nightly_rates(self):
+        rng = random.Random(7)
+        overrides = [
+            RateOverride(
+                start_date=self.monday + timedelta(days=rng.randrange(-30, 60)),
+                end_date=self.monday + timedelta(days=rng.randrange(60, 120)),
+                weekdays=rng.randrange(1, 128),
+                price_per_night=Decimal(rng.randrange(50, 300)),
+            )
+            for _ in range(6)
+        ]
+        for _ in range(50):
+            start_date = self.monday + timedelta(days=rng.randrange(-60, 150))
+            days = rng.randrange(1, 200)
+            rates = pricing.nightly_rates(Decimal("99.99"), overrides, start_date, days)
+            self.assertEqual(
+                pricing.stay_cents(
+                    Decimal("99.99"),
+                    overrides,
+                    start_date,
+                    start_date + timedelta(days=days),
+                ),
+                sum(rates),
+            )
+
+    def test_quoted_stays_are_capped_at_the_calendar_window(self):
+        stay = {
+            "property": self.property.pk,
+            "start_date": "0001-01-01",
+            "end_date": "9999-12-31",
+        }
+        response = self.client.post(
+            "/api/properties/quote/", {"stays": [stay] * 500}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_saving_an_override_invalidates_the_cached_calendar(self):
+        before = pricing.quote(self.property.pk, *self.stay())
+        RateOverride.objects.create(
+            property=self.property,
+            start_date=self.monday - timedelta(days=1),
+            end_date=self.monday,
+            price_per_night=Decimal("90.00"),
+        )
+        self.assertEqual(pricing.quote(self.property.pk, *self.stay()), before - 10)
+
+    def test_quote_endpoint_prices_a_batch_with_two_queries(self):
+        other = make_property(self.property.host, price_per_night=Decimal("80.00"))
+        stays = [
+            {
+                "property": property_obj.pk,
+                "start_date": (self.monday + timedelta(days=offset)).isoformat(),
+                "end_date": (self.monday + timedelta(days=offset + 3)).isoformat(),
+            }
+            for offset in range(100)
+            for property_obj in (self.property, other)
+        ]
+        with self.assertNumQueries(2):
+            response = self.client.post(
+                "/api/properties/quote/", {"stays": stays}, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 200)
+        self.assertEqual(
+            response.data[:2],
+            [
+                {**stays[0], "nights": 3, "total_price": "450.00"},
+                {**stays[1], "nights": 3, "total_price": "240.00"},
+            ],
+        )
+        with self.assertNumQueries(0):
+            self.client.post("/api/properties/quote/", {"stays": stays}, format="json")
+
+    def test_quote_endpoint_rejects_unknown_properties(self):
+        start_date, end_date = self.stay()
+        stay = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+        response = self.client.post(
+            "/api/properties/quote/",
+            {"stays": [{**stay, "property": self.property.pk + 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stays", response.data)
+
+    def test_booking_total_price_is_quoted_by_the_server(self):
+        client = APIClient()
+        client.force_authenticate(make_user())
+        payload = booking_payload(self.property, *self.stay())
+        response = client.post("/api/bookings/", payload, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["total_price"], "1250.00")
+        response = client.patch(
+            f"/api/bookings/{response.data['id']}/",
+            {"end_date": (self.monday + timedelta(days=1)).isoformat()},
+            format="json",
+        )
+        self.assertEqual(response.data["total_price"], "250.00")
+
+
+class RatingAggregateTests(TestCase):
+    def setUp(self):
+        self.guest = make_user()
+        host = make_user("host", role=User.Role.HOST)
+        self.property = make_property(host)
+        self.other = make_property(host, name="Cabin")
+
+    def review(self, rating, property_obj=None):
+        return Review.objects.create(
+            property_id=property_obj or self.property,
+            user=self.guest,
+            rating=rating,
+            comment="",
+        )
+
+    def aggregates(self, property_obj):
+        return Property.objects.values(
+            "review_count", "rating_sum", "rating_2_count", "rating_4_count"
+        ).get(pk=property_obj.pk)
+
+    def test_saves_and_deletes_adjust_aggregates(self):
+        for rating in (5, 4, 4):
+            self.review(rating)
+        edited = Review.objects.filter(rating=4).first()
+        edited.rating = 2
+        edited.save()
+        moved = Review.objects.get(rating=5)
+        moved.property_id = self.other
+        moved.save()
+        self.review(4, self.other).delete()
+        self.assertEqual(
+            self.aggregates(self.property),
+            {
+                "review_count": 2,
+                "rating_sum": 6,
+                "rating_2_count": 1,
+                "rating_4_count": 1,
+            },
+        )
+        self.assertEqual(self.aggregates(self.other)["rating_sum"], 5)
+        self.assertEqual(Property.objects.get(pk=self.property.pk).rating_average, 3.0)
+
+    def test_rebuild_command_reports_and_repairs_drift(self):
+        self.review(5)
+        Review.objects.bulk_create(
+            [Review(property_id=self.other, user=self.guest, rating=3, comment="")]
+        )
+        with self.assertRaisesMessage(CommandError, f"[{self.other.pk}]"):
+            call_command("rebuild_ratings", "--check", stdout=StringIO())
+        call_command("rebuild_ratings", stdout=StringIO())
+        call_command("rebuild_ratings", "--check", stdout=StringIO())
+        self.assertEqual(self.aggregates(self.other)["rating_sum"], 3)
+
+    def test_top_rated_reads_the_rating_index(self):
+        self.review(3)
+        self.review(5, self.other)
+        response = APIClient().get("/api/properties/top-rated/")
+        self.assertEqual(
+            [row["id"] for row in response.data], [self.other.pk, self.property.pk]
+        )
+        self.assertEqual(response.data[0]["rating_average"], 5.0)
+        ranked = Property.objects.order_by("-rating_average", "-review_count", "id")
+        self.assertIn("property_rating_idx", ranked[:10].explain())
+
+
+class FullTextSearchTests(TestCase):
+    def setUp(self):
+        self.cottage = Listing.objects.create(
+            title="Seaside cottage",
+            description="A quiet cottage near the harbour",
+            price=Decimal("80.00"),
+        )
+        self.loft = Listing.objects.create(
+            title="City loft",
+            description="Walk to the seaside in ten minutes",
+            price=Decimal("120.00"),
+        )
+        self.villa = make_property(
+            make_user("host", role=User.Role.HOST),
+            name="Villa Marina",
+            description="Pool and garden",
+            location="Seaside Heights",
+        )
+
+    def found(self, query):
+        return [(row["type"], row["id"]) for row in search.search(query)]
+
+    def test_results_are_ranked_and_match_prefixes(self):
+        results = self.found("seasid")
+        self.assertEqual(results[0], ("listing", self.cottage.pk))
+        self.assertCountEqual(
+            results,
+            [
+                ("listing", self.cottage.pk),
+                ("listing", self.loft.pk),
+                ("property", self.villa.pk),
+            ],
+        )
+        self.assertEqual(self.found("seaside harb"), [("listing", self.cottage.pk)])
+        self.assertEqual(self.found("Mar"), [("property", self.villa.pk)])
+        self.assertEqual(self.found("!!"), [])
+
+    def test_index_follows_updates_deletes_and_bulk_writes(self):
+        self.loft.description = "Walk to the park"
+        self.loft.save()
+        self.cottage.delete()
+        Listing.objects.bulk_create(
+            [Listing(title="Seaside flat", description="", price=Decimal("60.00"))]
+        )
+        Listing.objects.filter(pk=self.loft.pk).update(title="Parkside loft")
+        flat = Listing.objects.get(title="Seaside flat")
+        self.assertCountEqual(
+            self.found("seaside"),
+            [("listing", flat.pk), ("property", self.villa.pk)],
+        )
+        self.assertEqual(self.found("parkside"), [("listing", self.loft.pk)])
+
+    def test_search_endpoint(self):
+        client = APIClient()
+        response = client.get("/api/search/", {"q": "cottage"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(row["type"], row["id"], row["title"]) for row in response.data],
+            [("listing", self.cottage.pk, "Seaside cottage")],
+        )
+        self.assertEqual(client.get("/api/search/").status_code, 400)
+
+
+class MessageThreadTests(TestCase):
+    def setUp(self):
+        self.alice = make_user("alice")
+        self.bob = make_user("bob")
+        self.carol = make_user("carol")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def send(self, sender, recipient, body="Hi"):
+        return Message.objects.create(
+            sender=sender, recipient=recipient, message_body=body
+        )
+
+    def test_messages_are_threaded_with_unread_counters(self):
+        self.send(self.alice, self.bob)
+        self.send(self.bob, self.alice)
+        latest = self.send(self.bob, self.alice, "See you")
+        self.send(self.carol, self.alice)
+        response = self.client.get("/api/messages/threads/")
+        self.assertEqual(
+            [row["peer"]["username"] for row in response.data["results"]],
+            ["carol", "bob"],
+        )
+        thread = response.data["results"][1]
+        self.assertEqual(thread["id"], latest.conversation_id)
+        self.assertEqual(thread["unread_count"], 2)
+        self.assertEqual(thread["last_message"]["message_body"], "See you")
+        self.assertEqual(ConversationMember.objects.get(user=self.bob).unread_count, 1)
+
+    def test_thread_list_is_one_query_whatever_the_history(self):
+        for _ in range(30):
+            self.send(self.bob, self.alice)
+        self.send(self.carol, self.alice)
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/messages/threads/", {"page_size": 1})
+        self.assertIsNotNone(response.data["next"])
+
+    def test_thread_messages_and_read(self):
+        for body in ("one", "two", "three"):
+            conversation_id = self.send(self.bob, self.alice, body).conversation_id
+        url = f"/api/messages/threads/{conversation_id}/"
+        page = self.client.get(f"{url}messages/", {"page_size": 2}).data
+        self.assertEqual(
+            [row["message_body"] for row in page["results"]], ["three", "two"]
+        )
+        self.assertEqual(self.client.post(f"{url}read/").status_code, 204)
+        self.assertEqual(
+            ConversationMember.objects.get(user=self.alice).unread_count, 0
+        )
+        self.client.force_authenticate(self.carol)
+        self.assertEqual(self.client.get(f"{url}messages/").status_code, 404)
+
+    def test_rebuild_threads_backfills_bulk_inserts(self):
+        Message.objects.bulk_create(
+            [
+                Message(sender=self.alice, recipient=self.bob, message_body="a"),
+                Message(sender=self.bob, recipient=self.alice, message_body="b"),
+            ]
+        )
+        self.assertEqual(messaging.rebuild_threads(), 1)
+        conversation = Conversation.objects.get()
+        self.assertEqual(conversation.messages.count(), 2)
+        self.assertEqual(conversation.last_message.message_body, "b")
+        self.assertEqual(conversation.members.filter(unread_count=0).count(), 2)
+
+
+class BulkWriteTests(TestCase):
+    def setUp(self):
+        self.guest = make_user()
+        self.property = make_property(make_user("host", role=User.Role.HOST))
+        self.client = APIClient()
+        self.client.force_authenticate(self.guest)
+
+    def bulk(self, method, url, items):
+        return getattr(self.client, method)(url, items, format="json")
+
+    def test_bookings_are_created_with_per_item_results(self):
+        Booking.objects.create(
+            property=self.property,
+            user=self.guest,
+            start_date=date(2030, 1, 1),
+            end_date=date(2030, 1, 3),
+            total_price=Decimal("200.00"),
+        )
+        availability.sync_nights(Booking.objects.get())
+        items = [
+            booking_payload(self.property, date(2030, 1, 3), date(2030, 1, 6)),
+            booking_payload(self.property, date(2030, 1, 2), date(2030, 1, 4)),
+            booking_payload(self.property, date(2030, 1, 5), date(2030, 1, 7)),
+            booking_payload(self.property, date(2030, 1, 8), date(2030, 1, 8)),
+            {**booking_payload(self.property, date(2030, 2, 1), date(2030, 2, 2))}
+            | {"property": self.property.pk + 100},
+        ]
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.bulk("post", "/api/bookings/bulk/", items)
+        self.assertEqual(response.status_code, 200)
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [201, 400, 400, 400, 400])
+        created = response.data["results"][0]["data"]
+        self.assertEqual(created["user"], self.guest.pk)
+        self.assertEqual(created["total_price"], "300.00")
+        self.assertIn("end_date", response.data["results"][3]["errors"])
+        self.assertIn("property", response.data["results"][4]["errors"])
+        self.assertEqual(Booking.objects.count(), 2)
+        self.assertEqual(BookingNight.objects.count(), 5)
+        # One confirmation and the property's rollup refresh.
+        self.assertEqual(len(callbacks), 2)
+
+    def test_validation_queries_do_not_grow_with_the_batch(self):
+        def create(count, first):
+            items = [
+                booking_payload(
+                    self.property,
+                    first + timedelta(days=2 * i),
+                    first + timedelta(days=2 * i + 1),
+                )
+                for i in range(count)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.bulk("post", "/api/bookings/bulk/", items)
+            self.assertEqual(
+                {result["status"] for result in response.data["results"]}, {201}
+            )
+            return len(queries)
+
+        pricing.rate_tables([self.property.pk])
+        self.assertEqual(create(3, date(2030, 1, 1)), create(30, date(2030, 3, 1)))
+
+    def test_bookings_are_updated_and_deleted_in_bulk(self):
+        items = [
+            booking_payload(self.property, date(2030, 1, 1), date(2030, 1, 3)),
+            booking_payload(self.property, date(2030, 1, 5), date(2030, 1, 7)),
+        ]
+        first, second = (
+            result["data"]["id"]
+            for result in self.bulk("post", "/api/bookings/bulk/", items).data[
+                "results"
+            ]
+        )
+        response = self.bulk(
+            "patch",
+            "/api/bookings/bulk/",
+            [
+                {"id": first, "status": Booking.Status.CANCELLED},
+                {"id": second, "start_date": "2030-01-01"},
+                {"id": second + 100, "status": Booking.Status.CANCELLED},
+            ],
+        )
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [200, 200, 404])
+        moved = Booking.objects.get(pk=second)
+        self.assertEqual(moved.start_date, date(2030, 1, 1))
+        self.assertEqual(moved.total_price, Decimal("600.00"))
+        self.assertEqual(BookingNight.objects.count(), 6)
+
+        response = self.bulk("delete", "/api/bookings/bulk/", [first, second, "x"])
+        statuses = [result["status"] for result in response.data["results"]]
+        self.assertEqual(statuses, [204, 204, 404])
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(BookingNight.objects.exists())
+
+    def test_listings_bulk_writes_retire_cached_pages(self):
+        self.assertEqual(self.client.get("/api/listings/").data["results"], [])
+        items = [
+            {"title": f"Listing {i}", "description": "Nice", "price": "10.00"}
+            for i in range(3)
+        ]
+        response = self.bulk("post", "/api/listings/bulk/", items)
+        ids = [result["data"]["id"] for result in response.data["results"]]
+        self.assertEqual(len(self.client.get("/api/listings/").data["results"]), 3)
+
+        self.client.get(f"/api/listings/{ids[0]}/")
+        self.bulk("patch", "/api/listings/bulk/", [{"id": ids[0], "title": "Renamed"}])
+        detail = self.client.get(f"/api/listings/{ids[0]}/")
+        self.assertEqual(detail.data["title"], "Renamed")
+
+        self.bulk("delete", "/api/listings/bulk/", ids)
+        self.assertEqual(self.client.get("/api/listings/").data["results"], [])
+
+    def test_body_must_be_a_bounded_list(self):
+        for body in ({}, [], [{}] * 1001):
+            with self.subTest(size=len(body)):
+                response = self.bulk("post", "/api/listings/bulk/", body)
+                self.assertEqual(response.status_code, 400)
+
+
+class OccupancyRollupTests(TestCase):
+    def setUp(self):
+        self.guest = make_user()
+        host = make_user("host", role=User.Role.HOST)
+        self.beach = make_property(host)
+        self.loft = make_property(host, name="Loft")
+        self.cabin = make_property(host, name="Cabin", location="Aspen, CO")
+        self.client = APIClient()
+        self.client.force_authenticate(self.guest)
+        self.staff = APIClient()
+        self.staff.force_authenticate(make_user("staff", is_staff=True))
+
+    def book(self, property_obj, start_date, end_date):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                "/api/bookings/",
+                booking_payload(property_obj, start_date, end_date),
+                format="json",
+            )
+        self.assertEqual(response.status_code, 201)
+        return response.data["id"]
+
+    def patch(self, booking_id, **changes):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/bookings/{booking_id}/", changes, format="json"
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def days(self, model=DailyPropertyStats, **filters):
+        rows = model.objects.filter(**filters).order_by("date")
+        return list(rows.values_list("date", *rollups.FACTS))
+
+    def snapshot(self):
+        return (
+            set(
+                DailyPropertyStats.objects.values_list(
+                    "property_id", "location", "date", *rollups.FACTS
+                )
+            ),
+            set(
+                DailyLocationStats.objects.values_list(
+                    "location", "date", *rollups.FACTS
+                )
+            ),
+        )
+
+    def test_confirmed_booking_is_rolled_up_with_its_payment(self):
+        self.book(self.beach, date(2030, 1, 1), date(2030, 1, 4))
+        self.book(self.loft, date(2030, 1, 2), date(2030, 1, 3))
+        hundred = Decimal("100.00")
+        self.assertEqual(
+            self.days(property=self.beach),
+            [(date(2030, 1, day), 1, 0, hundred) for day in (1, 2, 3)],
+        )
+        self.assertEqual(
+            self.days(DailyLocationStats, location="Miami, FL"),
+            [
+                (date(2030, 1, 1), 1, 0, hundred),
+                (date(2030, 1, 2), 2, 0, 2 * hundred),
+                (date(2030, 1, 3), 1, 0, hundred),
+            ],
+        )
+
+    def test_cancelling_and_moving_refresh_old_and_new_days(self):
+        cancelled = self.book(self.beach, date(2030, 1, 1), date(2030, 1, 3))
+        moved = self.book(self.loft, date(2030, 1, 1), date(2030, 1, 2))
+        self.patch(cancelled, status=Booking.Status.CANCELLED)
+        self.patch(moved, start_date="2030-02-01", end_date="2030-02-02")
+        self.assertEqual(
+            self.days(property=self.beach),
+            [(date(2030, 1, day), 0, 1, Decimal("0.00")) for day in (1, 2)],
+        )
+        self.assertEqual(
+            self.days(property=self.loft),
+            [(date(2030, 2, 1), 1, 0, Decimal("100.00"))],
+        )
+        self.assertEqual(
+            self.days(DailyLocationStats, location="Miami, FL", date__month=1),
+            [(date(2030, 1, day), 0, 1, Decimal("0.00")) for day in (1, 2)],
+        )
+
+    def test_incremental_refresh_matches_a_rebuild(self):
+        first = self.book(self.beach, date(2030, 1, 1), date(2030, 1, 5))
+        self.book(self.cabin, date(2030, 1, 3), date(2030, 1, 6))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                "/api/bookings/bulk/",
+                [
+                    booking_payload(self.loft, date(2030, 1, 1), date(2030, 1, 3)),
+                    booking_payload(self.cabin, date(2030, 1, 6), date(2030, 1, 8)),
+                ],
+                format="json",
+            )
+        self.patch(first, end_date="2030-01-03")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.loft.location = "Aspen, CO"
+            self.loft.save()
+        incremental = self.snapshot()
+        self.assertTrue(incremental[1])
+        call_command("rebuild_rollups", stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_deleted_property_leaves_its_location(self):
+        self.book(self.beach, date(2030, 1, 1), date(2030, 1, 2))
+        self.book(self.loft, date(2030, 1, 1), date(2030, 1, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.beach.delete()
+        self.assertEqual(
+            self.days(DailyLocationStats, location="Miami, FL"),
+            [(date(2030, 1, 1), 1, 0, Decimal("100.00"))],
+        )
+
+    def test_occupancy_endpoint(self):
+        self.book(self.beach, date(2030, 1, 1), date(2030, 1, 4))
+        self.book(self.cabin, date(2030, 1, 2), date(2030, 1, 3))
+        url = "/api/analytics/occupancy/"
+        params = {"start_date": "2030-01-01", "end_date": "2030-01-11"}
+        self.assertEqual(self.client.get(url, params).status_code, 403)
+
+        with self.assertNumQueries(2):
+            by_location = self.staff.get(url, params).data
+        self.assertEqual(
+            by_location,
+            [
+                {
+                    "location": "Aspen, CO",
+                    "nights_booked": 1,
+                    "nights_available": 10,
+                    "occupancy_rate": 0.1,
+                    "nights_cancelled": 0,
+                    "revenue": Decimal("100.00"),
+                },
+                {
+                    "location": "Miami, FL",
+                    "nights_booked": 3,
+                    "nights_available": 20,
+                    "occupancy_rate": 0.15,
+                    "nights_cancelled": 0,
+                    "revenue": Decimal("300.00"),
+                },
+            ],
+        )
+        by_date = self.staff.get(
+            url, {**params, "group_by": "date", "location": "Miami, FL"}
+        ).data
+        self.assertEqual(len(by_date), 10)
+        self.assertEqual(by_date[0]["date"], date(2030, 1, 1))
+        self.assertEqual(by_date[0]["occupancy_rate"], 0.5)
+        by_property = self.staff.get(
+            url, {**params, "group_by": "property", "location": "Miami, FL"}
+        ).data
+        self.assertEqual(
+            [(row["property"], row["nights_booked"]) for row in by_property],
+            [(self.beach.pk, 3), (self.loft.pk, 0)],
+        )
+        invalid = self.staff.get(url, {**params, "group_by": "property"})
+        self.assertEqual(invalid.status_code, 400)
+
+
+class BookingReportTests(TestCase):
+    def setUp(self):
+        guest = make_user()
+        host = make_user("host", role=User.Role.HOST)
+        self.beach = make_property(host)
+        self.loft = make_property(host, name="Loft")
+        stays = [
+            (self.beach, date(2030, 1, 1), 3, Booking.Status.CONFIRMED, "100.10"),
+            (self.loft, date(2030, 1, 20), 2, Booking.Status.CONFIRMED, "50.00"),
+            (self.beach, date(2030, 1, 25), 4, Booking.Status.CANCELLED, "80.00"),
+            (self.beach, date(2030, 2, 3), 1, Booking.Status.PENDING, None),
+            (self.loft, date(2030, 3, 1), 1, Booking.Status.CONFIRMED, "10.00"),
+        ]
+        for property_obj, start_date, nights, status, paid in stays:
+            booking = Booking.objects.create(
+                property=property_obj,
+                user=guest,
+                start_date=start_date,
+                end_date=start_date + timedelta(days=nights),
+                total_price=Decimal("1.00"),
+                status=status,
+            )
+            if paid:
+                Payment.objects.create(
+                    booking=booking,
+                    amount=Decimal(paid),
+                    payment_method=(
+                        Payment.PaymentMethod.PAYPAL
+                        if property_obj == self.loft
+                        else Payment.PaymentMethod.CREDIT_CARD
+                    ),
+                )
+
+    def report(self, **kwargs):
+        return reports.build_report(date(2030, 1, 1), date(2030, 3, 1), **kwargs)
+
+    def test_months_and_payment_methods(self):
+        report = self.report(engine="array")
+        self.assertEqual(
+            report["months"],
+            [
+                {
+                    "month": "2030-01",
+                    "bookings": 3,
+                    "cancelled": 1,
+                    "cancellation_rate": 0.3333,
+                    "average_stay": 2.5,
+                    "revenue": Decimal("150.10"),
+                },
+                {
+                    "month": "2030-02",
+                    "bookings": 1,
+                    "cancelled": 0,
+                    "cancellation_rate": 0.0,
+                    "average_stay": 1.0,
+                    "revenue": Decimal("0.00"),
+                },
+            ],
+        )
+        methods = {row["method"]: row for row in report["payment_methods"]}
+        self.assertEqual(methods["credit_card"]["amount"], Decimal("100.10"))
+        self.assertEqual(methods["paypal"]["payments"], 1)
+        self.assertEqual(methods["paypal"]["share"], 0.3331)
+        self.assertEqual(methods["stripe"]["payments"], 0)
+        self.assertNotIn("properties", report)
+
+    def test_revenue_by_property_and_month(self):
+        report = self.report(by_property=True, engine="array")
+        self.assertEqual(
+            report["properties"],
+            [
+                {
+                    "property": self.beach.pk,
+                    "month": "2030-01",
+                    "revenue": Decimal("100.10"),
+                },
+                {
+                    "property": self.loft.pk,
+                    "month": "2030-01",
+                    "revenue": Decimal("50.00"),
+                },
+            ],
+        )
+
+    @skipUnless(reports.numpy, "NumPy is not installed")
+    def test_numpy_and_array_engines_agree(self):
+        self.assertEqual(
+            self.report(by_property=True, engine="numpy"),
+            self.report(by_property=True, engine="array"),
+        )
+
+    def test_two_queries_however_many_rows(self):
+        with self.assertNumQueries(2):
+            self.report(by_property=True)
+
+    def test_endpoint_and_command(self):
+        client = APIClient()
+        url = "/api/reports/bookings/"
+        params = {"start_date": "2030-01-01", "end_date": "2030-03-01"}
+        client.force_authenticate(make_user("someone"))
+        self.assertEqual(client.get(url, params).status_code, 403)
+        client.force_authenticate(make_user("finance", is_staff=True))
+        response = client.get(url, {**params, "by_property": "true"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["properties"]), 2)
+
+        out = StringIO()
+        call_command("booking_report", "2030-01-01", "2030-03-01", stdout=out)
+        printed = json.loads(out.getvalue())
+        self.assertEqual(printed["months"][0]["revenue"], "150.10")
+
+
+class PropertySearchTests(TestCase):
+    def setUp(self):
+        host = make_user("host", role=User.Role.HOST)
+        self.guest = make_user()
+        self.cheap = make_property(host, name="Cheap", price_per_night=Decimal("80"))
+        self.pricey = make_property(host, name="Pricey", price_per_night=Decimal("300"))
+        self.booked = make_property(host, name="Booked", price_per_night=Decimal("90"))
+        make_property(host, name="Elsewhere", location="Boston, MA")
+        self.start = timezone.localdate() + timedelta(days=10)
+        self.client = APIClient()
+        self.client.force_authenticate(self.guest)
+        self.client.post(
+            "/api/bookings/",
+            booking_payload(self.booked, self.start, self.start + timedelta(days=3)),
+            format="json",
+        )
+
+    def search(self, **params):
+        params.setdefault("location", "Miami, FL")
+        params.setdefault("start_date", self.start + timedelta(days=1))
+        params.setdefault("end_date", self.start + timedelta(days=2))
+        response = self.client.get("/api/properties/search/", params)
+        self.assertEqual(response.status_code, 200)
+        return [item["name"] for item in response.data]
+
+    def test_booking_updates_calendar(self):
+        calendar = PropertyCalendar.objects.get(property=self.booked)
+        self.assertEqual(calendar.window_start, timezone.localdate())
+        self.assertEqual(int.from_bytes(calendar.occupancy, "little"), 0b111 << 10)
+
+    def test_search_filters_location_price_and_occupancy(self):
+        self.assertEqual(self.search(), ["Cheap", "Pricey"])
+        self.assertEqual(self.search(max_price="100"), ["Cheap"])
+        after = self.start + timedelta(days=3)
+        self.assertEqual(
+            self.search(start_date=after, end_date=after + timedelta(days=1)),
+            ["Cheap", "Booked", "Pricey"],
+        )
+
+    def test_search_outside_window_falls_back_to_night_index(self):
+        PropertyCalendar.objects.all().delete()
+        self.assertEqual(self.search(), ["Cheap", "Pricey"])
+        far = self.start + timedelta(days=400)
+        self.assertEqual(
+            self.search(start_date=far, end_date=far + timedelta(days=2)),
+            ["Cheap", "Booked", "Pricey"],
+        )
+
+    def test_deleted_booking_frees_its_nights(self):
+        booking = Booking.objects.get(property=self.booked)
+        response = self.client.delete(f"/api/bookings/{booking.pk}/")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.search(), ["Cheap", "Booked", "Pricey"])
+        calendar = PropertyCalendar.objects.get(property=self.booked)
+        self.assertEqual(int.from_bytes(calendar.occupancy, "little"), 0)
+
+    def test_search_is_a_constant_number_of_queries(self):
+        with self.assertNumQueries(2):
+            self.search()
+
+    def test_rebuild_matches_incremental_calendars(self):
+        before = dict(PropertyCalendar.objects.values_list("pk", "occupancy"))
+        availability.rebuild_calendars()
+        after = dict(PropertyCalendar.objects.values_list("pk", "occupancy"))
+        self.assertEqual(bytes(after[self.booked.pk]), bytes(before[self.booked.pk]))
+        self.assertEqual(len(after), Property.objects.count())
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.listings = [
+            Listing.objects.create(
+                title=f"Listing {index}", description="", price=Decimal("10.00")
+            )
+            for index in range(7)
+        ]
+        # Ties on created_at must still page deterministically by id.
+        Listing.objects.filter(pk__in=[item.pk for item in self.listings[2:5]]).update(
+            created_at=self.listings[2].created_at
+        )
+        self.client = APIClient()
+
+    def walk(self, url):
+        titles = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            titles.extend(item["title"] for item in response.data["results"])
+            url = response.data["next"]
+        return titles
+
+    def test_pages_cover_every_row_newest_first(self):
+        titles = self.walk("/api/listings/?page_size=3")
+        expected = [
+            item.title
+            for item in sorted(
+                Listing.objects.all(), key=lambda item: (item.created_at, item.pk)
+            )
+        ]
+        self.assertEqual(titles, expected[::-1])
+
+    def test_previous_link_returns_to_earlier_page(self):
+        first = self.client.get("/api/listings/?page_size=3").data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertIsNone(first["previous"])
+        self.assertEqual(back["results"], first["results"])
+
+    def test_count_is_opt_in(self):
+        self.assertNotIn("count", self.client.get("/api/listings/").data)
+        response = self.client.get("/api/listings/?count=true&page_size=2")
+        self.assertEqual(response.data["count"], 7)
+
+    def test_deep_page_costs_the_same_as_the_first(self):
+        with CaptureQueriesContext(connection) as first_page:
+            url = self.client.get("/api/listings/?page_size=2").data["next"]
+        first_page_queries = len(first_page)
+        url = self.client.get(url).data["next"]
+        with self.assertNumQueries(first_page_queries):
+            self.client.get(url)
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get("/api/listings/?cursor=garbage")
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor_is_not_found(self):
+        for position in (["garbage", 1], [None, None], [[1], [2]], [1]):
+            payload = json.dumps({"p": position, "r": 0}).encode()
+            token = base64.urlsafe_b64encode(payload).decode()
+            for url in ("/api/listings/", "/api/bookings/"):
+                response = self.client.get(url, {"cursor": token})
+                self.assertEqual(response.status_code, 404, (url, position))
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        guest = make_user()
+        property_obj = make_property(make_user("host", role=User.Role.HOST))
+        self.bookings = [
+            Booking.objects.create(
+                property=property_obj,
+                user=guest,
+                start_date=date(2030, 1, day),
+                end_date=date(2030, 1, day + 1),
+                total_price=Decimal("100.00"),
+            )
+            for day in range(1, 6)
+        ]
+        Payment.objects.create(booking=self.bookings[0], amount=Decimal("100.00"))
+        self.client = APIClient()
+        self.client.force_authenticate(make_user("finance", is_staff=True))
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_bookings_export_as_ndjson(self):
+        lines = self.export("/api/bookings/export/").splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["id"] for row in rows], [b.pk for b in self.bookings])
+        self.assertEqual(rows[0]["total_price"], "100.00")
+        self.assertEqual(rows[0]["start_date"], "2030-01-01")
+        self.assertTrue(rows[0]["created_at"].endswith("Z"))
+
+    def test_payments_export_as_csv(self):
+        rows = list(
+            csv.reader(self.export("/api/payments/export/?format=csv").splitlines())
+        )
+        self.assertEqual(
+            rows[0], ["id", "booking_id", "amount", "payment_method", "payment_date"]
+        )
+        self.assertEqual(
+            rows[1][1:4], [str(self.bookings[0].pk), "100.00", "credit_card"]
+        )
+
+    def test_export_is_staff_only(self):
+        self.client.force_authenticate(make_user("someone"))
+        self.assertEqual(self.client.get("/api/bookings/export/").status_code, 403)
+
+
+class FastPathSerializationTests(TestCase):
+    def setUp(self):
+        guest = make_user()
+        property_obj = make_property(make_user("host", role=User.Role.HOST))
+        for index in range(3):
+            Listing.objects.create(
+                title=f"Listing {index}",
+                description='Ünïcode "quoted" text',
+                price=Decimal("19.9") + index,
+            )
+            Booking.objects.create(
+                property=property_obj,
+                user=guest,
+                start_date=date(2030, 1, 1 + index),
+                end_date=date(2030, 1, 2 + index),
+                total_price=Decimal("1234567.5"),
+            )
+        self.client = APIClient()
+
+    def assertIdenticalJSON(self, serializer_class, queryset):
+        plan = compile_plan(serializer_class)
+        fast = JSONRenderer().render(plan.serialize(queryset.values(*plan.columns)))
+        slow = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(fast, slow)
+
+    def test_listing_rows_match_model_serializer(self):
+        self.assertIdenticalJSON(ListingSerializer, Listing.objects.order_by("pk"))
+
+    def test_booking_rows_match_model_serializer(self):
+        self.assertIdenticalJSON(BookingSerializer, Booking.objects.order_by("pk"))
+
+    def test_list_endpoint_matches_model_serializer(self):
+        response = self.client.get("/api/bookings/")
+        bookings = Booking.objects.order_by("-created_at", "-id")
+        expected = JSONRenderer().render(BookingSerializer(bookings, many=True).data)
+        self.assertEqual(JSONRenderer().render(response.data["results"]), expected)
+
+    def test_unsupported_serializer_has_no_plan(self):
+        self.assertIsNone(compile_plan(UserSerializer))
+
+
+class QueryBudgetTests(TestCase):
+    """Fixed query counts per endpoint; a new N+1 shows up as a failure here.
+
+    Listing and booking reads spend one query on conditional-GET validators
+    before the page itself: the page's keys and timestamps, read with the
+    page query's own cursor and ``LIMIT``.
+    """
+
+    budgets = [
+        ("/api/listings/", 2),
+        ("/api/listings/{listing}/", 2),
+        ("/api/bookings/", 2),
+        ("/api/bookings/?expand=true", 2),
+        ("/api/bookings/{booking}/", 2),
+        ("/api/properties/", 1),
+        ("/api/payments/", 1),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(make_user("staff", is_staff=True))
+        self.add_rows(3)
+
+    def add_rows(self, count):
+        offset = Booking.objects.count()
+        for index in range(offset, offset + count):
+            user = make_user(f"guest{index}")
+            property_obj = make_property(make_user(f"host{index}"))
+            booking = Booking.objects.create(
+                property=property_obj,
+                user=user,
+                start_date=date(2030, 1, 1),
+                end_date=date(2030, 1, 3),
+                total_price=Decimal("200.00"),
+            )
+            Payment.objects.create(booking=booking, amount=Decimal("200.00"))
+            listing = Listing.objects.create(
+                title=f"Listing {index}", description="", price=Decimal("1.00")
+            )
+        self.ids = {"listing": listing.pk, "booking": booking.pk}
+
+    def assertBudgets(self):
+        for url, budget in self.budgets:
+            with self.subTest(url=url), self.assertNumQueries(budget):
+                response = self.client.get(url.format(**self.ids))
+                self.assertEqual(response.status_code, 200)
+
+    def test_query_counts(self):
+        self.assertBudgets()
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        self.add_rows(10)
+        self.assertBudgets()
+
+    def test_expanded_bookings_include_summaries(self):
+        response = self.client.get("/api/bookings/?expand=true")
+        booking = response.data["results"][0]
+        self.assertEqual(booking["user_summary"]["username"], "guest2")
+        self.assertEqual(booking["property_summary"]["name"], "Beach House")
+        self.assertEqual(booking["user"], booking["user_summary"]["id"])
+
+
+class AdminChangelistTests(TestCase):
+    """Fixed query counts per changelist, filtered or not, at any row count."""
+
+    changelists = [
+        "/admin/listings/listing/",
+        "/admin/listings/property/",
+        "/admin/listings/booking/",
+        "/admin/listings/booking/?status__exact=pending",
+        "/admin/listings/booking/?created_at__year=2030",
+        "/admin/listings/review/",
+        "/admin/listings/payment/",
+        "/admin/listings/payment/?payment_method__exact=paypal",
+        "/admin/listings/message/",
+    ]
+
+    def setUp(self):
+        self.client.force_login(make_user("admin", is_staff=True, is_superuser=True))
+        self.add_rows(2)
+
+    def add_rows(self, count):
+        offset = Booking.objects.count()
+        for index in range(offset, offset + count):
+            guest = make_user(f"guest{index}")
+            host = make_user(f"host{index}")
+            property_obj = make_property(host)
+            booking = Booking.objects.create(
+                property=property_obj,
+                user=guest,
+                start_date=date(2030, 1, 1),
+                end_date=date(2030, 1, 3),
+                total_price=Decimal("200.00"),
+            )
+            Payment.objects.create(booking=booking, amount=Decimal("200.00"))
+            Review.objects.create(
+                property_id=property_obj, user=guest, rating=5, comment="Great"
+            )
+            Message.objects.create(sender=guest, recipient=host, message_body="Hi")
+            Listing.objects.create(
+                title=f"Listing {index}", description="", price=Decimal("1.00")
+            )
+
+    def query_counts(self):
+        counts = {}
+        for url in self.changelists:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            counts[url] = len(queries)
+        return counts
+
+    def test_query_counts_do_not_grow_with_rows(self):
+        before = self.query_counts()
+        self.add_rows(10)
+        self.assertEqual(self.query_counts(), before)
+
+    def test_changelists_never_count_the_whole_table(self):
+        for url in self.changelists:
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+            counts = [
+                query["sql"]
+                for query in queries
+                if "COUNT(*)" in query["sql"] and "LIMIT" not in query["sql"]
+            ]
+            self.assertEqual(counts, [], url)
+
+    def test_large_tables_show_an_estimated_count(self):
+        self.add_rows(3)
+        paginator = EstimatedCountPaginator(Booking.objects.order_by("-pk"), 2)
+        paginator.count_limit = 2
+        first = Booking.objects.order_by("pk").first().pk
+        Booking.objects.filter(pk=first + 1).delete()
+        self.assertEqual(paginator.count, 5)
+        filtered = EstimatedCountPaginator(
+            Booking.objects.filter(status=Booking.Status.PENDING).order_by("-pk"), 2
+        )
+        filtered.count_limit = 2
+        self.assertEqual(filtered.count, 3)
+
+    def test_str_uses_local_columns(self):
+        booking = Booking.objects.first()
+        payment = Payment.objects.first()
+        review = Review.objects.first()
+        message = Message.objects.first()
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                str(booking), f"Booking {booking.pk} for {booking.property_id}"
+            )
+            self.assertEqual(
+                str(payment), f"Payment {payment.pk} for {payment.booking_id}"
+            )
+            self.assertEqual(
+                str(review), f"Review {review.pk} for {review.property_id_id}"
+            )
+            self.assertIn(f"Message {message.pk} from", str(message))
+
+
+class BookingAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(make_user("admin", is_staff=True, is_superuser=True))
+        self.guest = make_user()
+        self.property = make_property(make_user("host", role=User.Role.HOST))
+        self.start = timezone.localdate() + timedelta(days=1)
+
+    def form(self, start_date, end_date, status=Booking.Status.PENDING):
+        return {
+            "property": self.property.pk,
+            "user": self.guest.pk,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "total_price": "200.00",
+            "status": status,
+        }
+
+    def add(self, start_date, end_date):
+        return self.client.post(
+            "/admin/listings/booking/add/", self.form(start_date, end_date)
+        )
+
+    def occupancy(self):
+        calendar = PropertyCalendar.objects.get(property=self.property)
+        return int.from_bytes(calendar.occupancy, "little")
+
+    def test_added_booking_holds_its_nights(self):
+        response = self.add(self.start, self.start + timedelta(days=2))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(BookingNight.objects.count(), 2)
+        self.assertEqual(self.occupancy(), 0b110)
+
+    def test_conflict_is_a_form_error(self):
+        self.add(self.start, self.start + timedelta(days=2))
+        response = self.add(
+            self.start + timedelta(days=1), self.start + timedelta(days=3)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "is not available")
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(BookingNight.objects.count(), 2)
+
+    def test_cancelling_releases_the_nights(self):
+        self.add(self.start, self.start + timedelta(days=2))
+        booking = Booking.objects.get()
+        response = self.client.post(
+            f"/admin/listings/booking/{booking.pk}/change/",
+            self.form(
+                self.start, self.start + timedelta(days=2), Booking.Status.CANCELLED
+            ),
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(BookingNight.objects.exists())
+        self.assertEqual(self.occupancy(), 0)
+
+    def test_deletes_refresh_the_calendar(self):
+        for offset in (0, 3, 6):
+            self.add(
+                self.start + timedelta(days=offset),
+                self.start + timedelta(days=offset + 1),
+            )
+        first, *rest = Booking.objects.order_by("start_date")
+        self.client.post(f"/admin/listings/booking/{first.pk}/delete/", {"post": "yes"})
+        self.assertEqual(self.occupancy(), 0b10010000)
+        self.client.post(
+            "/admin/listings/booking/",
+            {
+                "action": "delete_selected",
+                "_selected_action": [booking.pk for booking in rest],
+                "post": "yes",
+            },
+        )
+        self.assertFalse(Booking.objects.exists())
+        self.assertEqual(self.occupancy(), 0)
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        slow_requests.clear()
+        Listing.objects.create(title="Listing", description="", price=Decimal("1"))
+        self.client = APIClient()
+
+    def test_server_timing_and_structured_log(self):
+        with self.assertLogs("listings.profiling", "INFO") as logs:
+            response = self.client.get("/api/listings/")
+        timing = response["Server-Timing"]
+        self.assertIn("db;dur=", timing)
+        self.assertIn('desc="2 queries, 0 duplicate"', timing)
+        self.assertIn("render;dur=", timing)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["path"], "/api/listings/")
+        self.assertEqual(record["queries"], 2)
+
+    async def test_server_timing_under_asgi(self):
+        with self.assertLogs("listings.profiling", "INFO"):
+            response = await self.async_client.get("/api/async/listings/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('desc="1 queries, 0 duplicate"', response["Server-Timing"])
+
+    def test_repeated_statements_are_counted_as_duplicates(self):
+        profile = QueryProfile(slow_query_seconds=60)
+        with connection.execute_wrapper(profile):
+            list(Listing.objects.filter(pk=1))
+            list(Listing.objects.filter(pk=2))
+            list(Listing.objects.filter(title="x"))
+        self.assertEqual((profile.count, profile.duplicates), (3, 1))
+
+    def test_slow_requests_endpoint_is_staff_only_and_sorted(self):
+        url = "/api/profiling/slow-requests/"
+        with self.assertLogs("listings.profiling", "INFO"):
+            for _ in range(3):
+                self.client.get("/api/listings/")
+            self.assertEqual(self.client.get(url).status_code, 403)
+            self.client.force_authenticate(make_user("staff", is_staff=True))
+            records = self.client.get(url).data
+        self.assertGreaterEqual(len(records), 3)
+        totals = [record["total_ms"] for record in records]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled_by_default(self):
+        self.assertNotIn("Server-Timing", APIClient().get("/api/listings/"))
+
+
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Listing.objects.create(
+            title="Cached", description="", price=Decimal("10.00")
+        )
+        self.client = APIClient()
+
+    def test_list_and_detail_are_served_from_cache(self):
+        for url in ("/api/listings/", f"/api/listings/{self.listing.pk}/"):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.data, first.data)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def test_matching_etag_is_not_modified_without_queries(self):
+        etag = self.client.get("/api/listings/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_save_invalidates_list_and_detail(self):
+        detail = f"/api/listings/{self.listing.pk}/"
+        etag = self.client.get("/api/listings/")["ETag"]
+        self.client.get(detail)
+        self.listing.title = "Renamed"
+        self.listing.save()
+        response = self.client.get("/api/listings/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["title"], "Renamed")
+        self.assertEqual(self.client.get(detail).data["title"], "Renamed")
+
+    def test_save_leaves_other_details_cached(self):
+        other = Listing.objects.create(title="Other", description="", price=1)
+        self.client.get(f"/api/listings/{other.pk}/")
+        self.listing.save()
+        with self.assertNumQueries(0):
+            self.client.get(f"/api/listings/{other.pk}/")
+
+    def test_delete_invalidates_detail(self):
+        detail = f"/api/listings/{self.listing.pk}/"
+        self.client.get(detail)
+        self.listing.delete()
+        self.assertEqual(self.client.get(detail).status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.booking = Booking.objects.create(
+            property=make_property(make_user("host")),
+            user=make_user(),
+            start_date=date(2030, 1, 1),
+            end_date=date(2030, 1, 3),
+            total_price=Decimal("200.00"),
+        )
+        self.client = APIClient()
+
+    def test_unchanged_detail_is_not_modified_before_serialization(self):
+        url = f"/api/bookings/{self.booking.pk}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_flat_list_honours_if_modified_since(self):
+        first = self.client.get("/api/bookings/")
+        self.assertIn("Last-Modified", first)
+        modified_since = self.client.get(
+            "/api/bookings/", HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(modified_since.status_code, 304)
+
+    def test_malformed_ids_are_not_found(self):
+        for url in ("/api/bookings/abc/", "/api/listings/abc/"):
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_update_changes_detail_validators(self):
+        url = f"/api/bookings/{self.booking.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.booking.status = Booking.Status.CONFIRMED
+        self.booking.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_nested_detail_tracks_property_changes(self):
+        url = f"/api/bookings/{self.booking.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.booking.property.name = "Renamed"
+        self.booking.property.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_nested_responses_track_user_renames(self):
+        for url in (f"/api/bookings/{self.booking.pk}/", "/api/bookings/?expand=true"):
+            response = self.client.get(url)
+            self.assertNotIn("Last-Modified", response)
+            User.objects.filter(pk=self.booking.user_id).update(
+                first_name=f"Renamed {url}"
+            )
+            self.assertEqual(
+                self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code,
+                200,
+            )
+
+    def test_list_validators_follow_inserts_and_deletes(self):
+        etag = self.client.get("/api/bookings/")["ETag"]
+        with self.assertNumQueries(1):
+            unchanged = self.client.get("/api/bookings/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(unchanged.status_code, 304)
+        self.booking.delete()
+        self.assertEqual(
+            self.client.get("/api/bookings/", HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
+
+    def test_list_validators_come_from_the_page(self):
+        for month in (2, 3):
+            newest = Booking.objects.create(
+                property=self.booking.property,
+                user=self.booking.user,
+                start_date=date(2030, month, 1),
+                end_date=date(2030, month, 3),
+                total_price=Decimal("200.00"),
+            )
+        url = "/api/bookings/?page_size=1"
+        etag = self.client.get(url)["ETag"]
+        # The oldest booking is past the page and its lookahead row.
+        self.booking.status = Booking.Status.CONFIRMED
+        self.booking.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        newest.status = Booking.Status.CONFIRMED
+        newest.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_listing_cache_serves_the_same_validators(self):
+        listing = Listing.objects.create(title="A", description="", price=1)
+        url = f"/api/listings/{listing.pk}/"
+        etag = self.client.get(url)["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        cache.clear()
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class AsyncReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        host = make_user("host", role=User.Role.HOST)
+        guest = make_user()
+        property_obj = make_property(host)
+        for index in range(5):
+            Listing.objects.create(
+                title=f"Listing {index}", description="", price=Decimal("9.99")
+            )
+            Booking.objects.create(
+                property=property_obj,
+                user=guest,
+                start_date=date(2030, 1, 1) + timedelta(days=index * 3),
+                end_date=date(2030, 1, 3) + timedelta(days=index * 3),
+                total_price=Decimal("200.00"),
+            )
+        self.client = APIClient()
+
+    async def test_lists_match_sync_endpoints(self):
+        for path in ("listings/", "bookings/", "bookings/?expand=true"):
+            response = await self.async_client.get(f"/api/async/{path}")
+            self.assertEqual(response.status_code, 200)
+            expected = await sync_to_async(self.client.get)(f"/api/{path}")
+            self.assertEqual(
+                json.loads(response.content)["results"],
+                json.loads(expected.content)["results"],
+            )
+
+    async def test_details_match_sync_endpoints(self):
+        listing = await Listing.objects.afirst()
+        booking = await Booking.objects.afirst()
+        for path in (f"listings/{listing.pk}/", f"bookings/{booking.pk}/"):
+            response = await self.async_client.get(f"/api/async/{path}")
+            expected = await sync_to_async(self.client.get)(f"/api/{path}")
+            self.assertEqual(response.content, expected.content)
+
+    async def test_pages_cover_every_row(self):
+        url, titles = "/api/async/listings/?page_size=2&count=true", []
+        while url:
+            payload = json.loads((await self.async_client.get(url)).content)
+            self.assertEqual(payload["count"], 5)
+            titles.extend(item["title"] for item in payload["results"])
+            url = payload["next"]
+        self.assertEqual(titles, [f"Listing {index}" for index in range(4, -1, -1)])
+
+    async def test_missing_row_and_bad_cursor_are_not_found(self):
+        for url in ("/api/async/bookings/0/", "/api/async/listings/?cursor=bad"):
+            response = await self.async_client.get(url)
+            self.assertEqual(response.status_code, 404)
+            self.assertIn("detail", json.loads(response.content))
+
+
+@override_settings(
+    REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        "DEFAULT_THROTTLE_RATES": {"anon": "10/min", "user": "20/min"},
+    }
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.listing = Listing.objects.create(title="A", description="", price=1)
+        self.url = f"/api/listings/{self.listing.pk}/"
+        # Pinned to the start of a one-minute window.
+        patcher = mock.patch.object(CostThrottle, "timer", return_value=600)
+        self.timer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def burst(self, url, count, **extra):
+        return [self.client.get(url, **extra).status_code for _ in range(count)]
+
+    def test_burst_is_cut_at_the_budget_with_retry_after(self):
+        self.assertEqual(self.burst(self.url, 12), [200] * 10 + [429] * 2)
+        response = self.client.get(self.url)
+        # The window ends in 60s, and the spend carried into the next one
+        # decays enough for one more read 6s later.
+        self.assertEqual(response["Retry-After"], "66")
+
+        self.timer.return_value = 665
+        self.assertEqual(self.burst(self.url, 1), [429])
+        self.timer.return_value = 666
+        self.assertEqual(self.burst(self.url, 2), [200, 429])
+
+    def test_lists_cost_more_than_details(self):
+        self.assertEqual(self.burst("/api/listings/", 3), [200, 200, 429])
+        self.assertEqual(self.burst(self.url, 1), [429])
+
+    def test_list_cost_scales_with_page_size(self):
+        self.assertEqual(set(self.burst("/api/listings/?page_size=5", 10)), {200})
+        self.assertEqual(self.burst("/api/listings/?page_size=5", 1), [429])
+        cache.clear()
+        self.assertEqual(self.burst("/api/listings/?page_size=100", 2), [200, 429])
+
+    def test_search_and_quote_cost_as_much_as_bulk_writes(self):
+        self.client.force_login(make_user())
+        self.assertEqual(self.burst("/api/properties/search/", 2), [400, 429])
+        cache.clear()
+        quotes = [
+            self.client.post("/api/properties/quote/", {}).status_code for _ in range(2)
+        ]
+        self.assertEqual(quotes, [400, 429])
+        self.assertEqual(self.burst("/api/search/?q=beach", 2), [200, 429])
+
+    def test_budgets_are_per_client_and_endpoint(self):
+        self.burst(self.url, 10)
+        self.assertEqual(self.burst(self.url, 1), [429])
+        self.assertEqual(self.burst(self.url, 1, REMOTE_ADDR="10.0.0.2"), [200])
+        self.assertEqual(self.burst("/api/properties/", 1), [200])
+        self.client.force_login(make_user())
+        self.assertEqual(self.burst(self.url, 21), [200] * 20 + [429])
+
+    def test_async_reads_share_the_budget(self):
+        self.burst(self.url, 10)
+        response = self.client.get(f"/api/async/listings/{self.listing.pk}/")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "66")
+
+    def test_concurrent_burst_spends_the_budget_once(self):
+        view = ListingViewSet(action="retrieve", basename="listing")
+        request = Request(RequestFactory().get(self.url))
+
+        def attempt(_):
+            return CostThrottle().allow_request(request, view)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            allowed = list(pool.map(attempt, range(50)))
+        self.assertEqual(allowed.count(True), 10)
+
+    @override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": {"anon": None, "user": None},
+        }
+    )
+    def test_empty_rate_turns_throttling_off(self):
+        self.assertEqual(set(self.burst(self.url, 15)), {200})
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SeedCommandTests(TestCase):
+    def seed(self, *args):
+        call_command(
+            "seed",
+            "--users=20",
+            "--properties=15",
+            "--bookings-per-property=12",
+            "--start-date=2030-06-01",
+            *args,
+            stdout=StringIO(),
+        )
+        return list(
+            Booking.objects.order_by("pk").values_list(
+                "property_id", "user_id", "start_date", "end_date", "status"
+            )
+        )
+
+    def test_generates_requested_scale_without_overlaps(self):
+        self.seed()
+        self.assertEqual(Booking.objects.count(), 15 * 12)
+        self.assertEqual(User.objects.filter(role=User.Role.HOST).count(), 4)
+        self.assertEqual(User.objects.filter(role=User.Role.GUEST).count(), 16)
+        active = Booking.objects.filter(status__in=availability.ACTIVE_STATUSES)
+        self.assertEqual(
+            BookingNight.objects.count(),
+            sum((b.end_date - b.start_date).days for b in active),
+        )
+        self.assertEqual(
+            Payment.objects.count(),
+            Booking.objects.filter(status=Booking.Status.CONFIRMED).count(),
+        )
+        self.assertEqual(PropertyCalendar.objects.count(), 15)
+
+    def test_same_seed_reproduces_the_dataset(self):
+        first = self.seed()
+        self.assertEqual(self.seed("--clear"), first)
+        self.assertNotEqual(self.seed("--clear", "--seed=7"), first)
+
+    def test_rows_created_afterwards_get_fresh_keys(self):
+        self.seed()
+        booking = Booking.objects.first()
+        booking.pk = None
+        booking.start_date = booking.end_date = date(2031, 1, 1)
+        booking.save()
+        self.assertEqual(booking.pk, Booking.objects.count())
+
+    def test_rollups_can_be_left_for_later(self):
+        self.seed("--skip-rollups")
+        self.assertFalse(DailyPropertyStats.objects.exists())
+        self.seed("--clear")
+        self.assertTrue(DailyPropertyStats.objects.exists())
+
+    def test_refuses_to_seed_twice_without_clear(self):
+        self.seed()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    attempts = 200
+
+    def test_simultaneous_creates_yield_a_single_booking(self):
+        guest = make_user()
+        property_obj = make_property(make_user("host", role=User.Role.HOST))
+        payload = booking_payload(property_obj, date(2030, 1, 1), date(2030, 1, 8))
+        barrier = threading.Barrier(20)
+
+        def attempt(index):
+            client = APIClient()
+            client.force_authenticate(guest)
+            if index < barrier.parties:
+                barrier.wait()
+            try:
+                return client.post("/api/bookings/", payload, format="json").status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=barrier.parties) as pool:
+            statuses = list(pool.map(attempt, range(self.attempts)))
+
+        self.assertEqual(statuses.count(201), 1)
+        self.assertEqual(statuses.count(400), self.attempts - 1)
+        self.assertEqual(Booking.objects.count(), 1)
+        self.assertEqual(BookingNight.objects.count(), 7)
+
+
+class PersistentConnectionTests(TransactionTestCase):
+    def cycle_request(self):
+        request_started.send(sender=self.__class__)
+        Listing.objects.exists()
+        request_finished.send(sender=self.__class__)
+
+    def test_connection_is_reused_across_requests(self):
+        self.assertGreater(connection.settings_dict["CONN_MAX_AGE"], 0)
+        self.assertTrue(connection.settings_dict["CONN_HEALTH_CHECKS"])
+        self.cycle_request()
+        handle = connection.connection
+        self.cycle_request()
+        self.assertIs(connection.connection, handle)
+
+    def test_zero_max_age_closes_after_each_request(self):
+        max_age = connection.settings_dict["CONN_MAX_AGE"]
+        connection.close()
+        connection.settings_dict["CONN_MAX_AGE"] = 0
+        try:
+            self.cycle_request()
+            self.assertIsNone(connection.connection)
+        finally:
+            connection.settings_dict["CONN_MAX_AGE"] = max_age
+
+
+class SchemaArtifactTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        setting = override_settings(OPENAPI_SCHEMA_DIR=self.directory)
+        setting.enable()
+        self.addCleanup(setting.disable)
+        load_schema.cache_clear()
+        self.addCleanup(load_schema.cache_clear)
+        call_command("generate_schema", stdout=StringIO())
+
+    def read(self, name):
+        with open(os.path.join(self.directory, name), "rb") as file:
+            return file.read()
+
+    def test_serves_generated_files_with_gzip_and_etag(self):
+        with mock.patch("listings.schema.render_schema") as render:
+            plain = self.client.get("/swagger.json/")
+            zipped = self.client.get("/swagger.json/", HTTP_ACCEPT_ENCODING="gzip")
+        render.assert_not_called()
+        self.assertEqual(plain.content, self.read("openapi.json"))
+        self.assertEqual(json.loads(plain.content)["info"]["title"], "ALX Travel API")
+        self.assertNotIn("Content-Encoding", plain)
+        self.assertEqual(zipped["Content-Encoding"], "gzip")
+        self.assertEqual(zipped.content, self.read("openapi.json.gz"))
+        self.assertEqual(plain["ETag"], zipped["ETag"])
+        self.assertIn("Accept-Encoding", plain["Vary"])
+
+        response = self.client.get("/swagger.json/", HTTP_IF_NONE_MATCH=plain["ETag"])
+        self.assertEqual(response.status_code, 304)
+        yaml = self.client.get("/swagger.yaml/")
+        self.assertEqual(yaml["Content-Type"], "application/yaml")
+        self.assertEqual(self.client.get("/swagger.xml/").status_code, 404)
+
+    def test_stale_artifact_is_replaced_in_memory(self):
+        with open(os.path.join(self.directory, "manifest.json"), "w") as file:
+            json.dump({"fingerprint": "old"}, file)
+        with open(os.path.join(self.directory, "openapi.json"), "wb") as file:
+            file.write(b"{}")
+        with self.assertLogs("listings.schema", "WARNING"):
+            response = self.client.get("/swagger.json/")
+        self.assertIn("paths", json.loads(response.content))
+
+    def test_fingerprint_follows_the_urlconf(self):
+        self.assertEqual(
+            json.loads(self.read("manifest.json"))["fingerprint"], url_fingerprint()
+        )
+        self.assertNotEqual(url_fingerprint("listings.urls"), url_fingerprint())
+
+    def test_ui_reads_the_served_schema(self):
+        response = self.client.get("/swagger/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"/swagger.json/", response.content)
+
+
+class SQLiteTuningTests(SimpleTestCase):
+    def test_tuned_profile_applies_pragmas_and_immediate_transactions(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections["tuned"] = tuned = load_backend(
+            "django.db.backends.sqlite3"
+        ).DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                "NAME": os.path.join(directory.name, "tuned.sqlite3"),
+                "OPTIONS": settings.SQLITE_TUNED_OPTIONS,
+            },
+            "tuned",
+        )
+        self.addCleanup(connections.__delitem__, "tuned")
+        self.addCleanup(tuned.close)
+        with tuned.cursor() as cursor:
+            pragmas = {
+                name: cursor.execute(f"PRAGMA {name}").fetchone()[0]
+                for name in ("journal_mode", "synchronous", "busy_timeout")
+            }
+        self.assertEqual(
+            pragmas, {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 5000}
+        )
+        with CaptureQueriesContext(tuned) as queries, transaction.atomic(using="tuned"):
+            pass
+        self.assertEqual(queries[0]["sql"], "BEGIN IMMEDIATE")
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Replicas are snapshot copies of the test database file, so they lag
+    behind the primary until ``replicate`` copies it again."""
+
+    replicas = ["replica1", "replica2"]
+
+    def setUp(self):
+        cache.clear()
+        Listing.objects.create(title="Before", description="", price=1)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        backend = load_backend(connection.settings_dict["ENGINE"])
+        for alias in self.replicas:
+            name = os.path.join(directory.name, f"{alias}.sqlite3")
+            connections[alias] = backend.DatabaseWrapper(
+                {**connection.settings_dict, "NAME": name}, alias
+            )
+            self.addCleanup(connections.__delitem__, alias)
+            self.addCleanup(connections[alias].close)
+        self.replicate()
+        replicas = override_settings(DATABASE_REPLICAS=self.replicas)
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+    def replicate(self):
+        for alias in self.replicas:
+            connections[alias].close()
+            shutil.copyfile(
+                connection.settings_dict["NAME"],
+                connections[alias].settings_dict["NAME"],
+            )
+
+    def titles(self, client):
+        response = client.get("/api/listings/")
+        return [item["title"] for item in response.data["results"]]
+
+    def test_reads_are_spread_over_replicas(self):
+        router = PrimaryReplicaRouter()
+        with routing_scope():
+            used = {router.db_for_read(Listing) for _ in range(50)}
+        self.assertEqual(used, set(self.replicas))
+        self.assertEqual(router.db_for_write(Listing), "default")
+
+    def test_reads_see_replica_until_it_catches_up(self):
+        with routing_scope():
+            Listing.objects.create(title="After", description="", price=1)
+        self.assertEqual(self.titles(APIClient()), ["Before"])
+        self.replicate()
+        self.assertEqual(self.titles(APIClient()), ["After", "Before"])
+
+    def test_client_reads_its_own_writes(self):
+        client = APIClient()
+        response = client.post(
+            "/api/listings/",
+            {"title": "Mine", "description": "Mine", "price": "5.00"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.cookies["pin_primary"]["max-age"], 5)
+        self.assertEqual(self.titles(APIClient()), ["Before"])
+        self.assertEqual(self.titles(client), ["Mine", "Before"])
+
+    async def test_asgi_client_reads_its_own_writes(self):
+        response = await self.async_client.post(
+            "/api/listings/",
+            {"title": "Mine", "description": "Mine", "price": "5.00"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("pin_primary", response.cookies)
+        response = await self.async_client.get("/api/async/listings/")
+        titles = [item["title"] for item in json.loads(response.content)["results"]]
+        self.assertEqual(titles, ["Mine", "Before"])
+
+    def test_tasks_read_from_the_primary(self):
+        used = []
+        with mock.patch.object(
+            rollups,
+            "refresh",
+            side_effect=lambda *args: used.append(
+                PrimaryReplicaRouter().db_for_read(Booking)
+            ),
+        ), routing_scope():
+            # A fresh, unpinned scope, as on a worker that has not written.
+            refresh_rollups.delay(1)
+        self.assertEqual(used, ["default"])
+
+    def test_without_replicas_everything_uses_the_primary(self):
+        with routing_scope():
+            Listing.objects.create(title="After", description="", price=1)
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.titles(APIClient()), ["After", "Before"])
+            response = APIClient().post(
+                "/api/listings/",
+                {"title": "Mine", "description": "Mine", "price": "5.00"},
+                format="json",
+            )
+        self.assertNotIn("pin_primary", response.cookies)
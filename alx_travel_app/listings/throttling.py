@@ -0,0 +1,112 @@
+"""Cost-weighted request throttling with counters shared in the cache.
+
+Every client (a user, or an IP address when anonymous) has a budget per
+endpoint of ``DEFAULT_THROTTLE_RATES["user"]`` (or ``["anon"]``) cost
+units per period, e.g. ``"3000/min"``. A request spends the cost of its
+action, so a list page spends more than a detail read and a bulk write
+or an export more than either; views adjust theirs in ``throttle_costs``,
+keyed by action or, on a plain ``APIView``, by lowercase HTTP method. A
+list's cost scales with the page size it asks for.
+
+Spending is counted with cache ``add`` and ``incr`` only, which are
+atomic on Redis and memcached, so all workers draw on the same budget
+without locks or read-modify-write races. A budget refills continuously:
+the previous period's spend still counts for the part of it that lies
+within the last ``period`` seconds. Refused requests get a 429 with a
+``Retry-After`` of when the request would fit again.
+"""
+
+import math
+import time
+from contextlib import suppress
+
+from django.core.cache import cache
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+COSTS = {"list": 5, "bulk": 20, "export": 50}
+
+
+def parse_rate(rate):
+    """Return ``(units, seconds)`` for a rate like ``"600/min"``.
+
+    An empty rate returns ``(None, None)``: no throttling.
+    """
+    if not rate:
+        return None, None
+    units, period = rate.split("/")
+    return int(units), DURATIONS[period[0]]
+
+
+class CostThrottle(BaseThrottle):
+    cache = cache
+    timer = time.time
+    cache_format = "throttle:{scope}:{endpoint}:{ident}:{window}"
+
+    def get_scope(self, request):
+        user = request.user
+        return "user" if user and user.is_authenticated else "anon"
+
+    def get_cost(self, request, view):
+        action = getattr(view, "action", None) or request.method.lower()
+        cost = {**COSTS, **getattr(view, "throttle_costs", {})}.get(action, 1)
+        pagination_class = getattr(view, "pagination_class", None)
+        if action == "list" and hasattr(pagination_class, "get_page_size"):
+            paginator = pagination_class()
+            # Priced per default-sized page, rounded up to a whole unit.
+            requested = paginator.get_page_size(request)
+            cost = math.ceil(cost * requested / paginator.page_size)
+        return cost
+
+    def get_cache_key(self, request, view, scope, window):
+        ident = request.user.pk if scope == "user" else self.get_ident(request)
+        endpoint = getattr(view, "basename", None) or type(view).__name__
+        return self.cache_format.format(
+            scope=scope, endpoint=endpoint, ident=ident, window=window
+        )
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request)
+        units, duration = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(scope))
+        if units is None:
+            return True
+        cost = min(self.get_cost(request, view), units)
+        window, offset = divmod(int(self.timer()), duration)
+        key = self.get_cache_key(request, view, scope, window)
+        previous = self.cache.get(
+            self.get_cache_key(request, view, scope, window - 1), 0
+        )
+        # Spend first, then check: concurrent requests each see the total
+        # including everyone else's spend, so at most the budget gets in.
+        if self.cache.add(key, cost, duration * 2):
+            spent = cost
+        else:
+            try:
+                spent = self.cache.incr(key, cost)
+            except ValueError:
+                # Evicted since the add; the window starts over.
+                self.cache.set(key, cost, duration * 2)
+                spent = cost
+        if previous * (duration - offset) / duration + spent <= units:
+            return True
+        with suppress(ValueError):
+            self.cache.decr(key, cost)
+        self.retry_after = self.time_to_fit(
+            units, duration, offset, previous, spent - cost, cost
+        )
+        return False
+
+    def time_to_fit(self, units, duration, offset, previous, spent, cost):
+        """Seconds until ``cost`` fits, if nobody else spends meanwhile."""
+        excess = previous * (duration - offset) / duration + spent + cost - units
+        if previous and excess <= previous * (duration - offset) / duration:
+            return excess / previous * duration
+        # Past this window the current spend is the one that decays.
+        remaining = duration - offset
+        if spent + cost <= units:
+            return remaining
+        return remaining + (spent + cost - units) / spent * duration
+
+    def wait(self):
+        return getattr(self, "retry_after", None)
@@ -1,13 +1,55 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from listings.views import ListingViewSet, BookingViewSet
+from listings.async_views import AsyncBookingView, AsyncListingView
+from listings.views import (
+    ListingViewSet,
+    BookingViewSet,
+    BookingReportView,
+    OccupancyView,
+    PropertyViewSet,
+    PaymentViewSet,
+    SearchView,
+    SlowRequestsView,
+    ThreadViewSet,
+)
 
 
 router = DefaultRouter()
 router.register(r"listings", ListingViewSet, basename="listing")
 router.register(r"bookings", BookingViewSet, basename="booking")
+router.register(r"properties", PropertyViewSet, basename="property")
+router.register(r"payments", PaymentViewSet, basename="payment")
+router.register(r"messages/threads", ThreadViewSet, basename="thread")
 
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("search/", SearchView.as_view(), name="search"),
+    path(
+        "analytics/occupancy/",
+        OccupancyView.as_view(),
+        name="analytics-occupancy",
+    ),
+    path(
+        "reports/bookings/",
+        BookingReportView.as_view(),
+        name="reports-bookings",
+    ),
+    path(
+        "profiling/slow-requests/",
+        SlowRequestsView.as_view(),
+        name="profiling-slow-requests",
+    ),
+    path("async/listings/", AsyncListingView.as_view(), name="async-listing-list"),
+    path(
+        "async/listings/<int:pk>/",
+        AsyncListingView.as_view(),
+        name="async-listing-detail",
+    ),
+    path("async/bookings/", AsyncBookingView.as_view(), name="async-booking-list"),
+    path(
+        "async/bookings/<int:pk>/",
+        AsyncBookingView.as_view(),
+        name="async-booking-detail",
+    ),
 ]
@@ -1,18 +1,464 @@
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
-from rest_framework import viewsets
-from listings.models import Listing, Booking
-from listings.serializers import ListingSerializer, BookingSerializer
+from rest_framework import mixins, permissions, serializers, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from listings import availability, messaging, pricing, reports, rollups, search
+from listings.bulk import BulkWriteMixin
+from listings.cache import (
+    LIST_VERSION_KEY,
+    CachedReadMixin,
+    bump_version,
+    detail_version_key,
+)
+from listings.conditional import ConditionalGetMixin
+from listings.exports import export_rows
+from listings.fastpath import compile_plan
+from listings.middleware import slow_requests
+from listings.models import (
+    Listing,
+    Booking,
+    Property,
+    Payment,
+    ConversationMember,
+    Message,
+)
+from listings.renderers import NDJSONRenderer, CSVRenderer
+from listings.tasks import confirm_booking, schedule_rollups
+from listings.serializers import (
+    ListingSerializer,
+    BookingSerializer,
+    BookingDetailSerializer,
+    PropertySerializer,
+    PaymentSerializer,
+    MessageSerializer,
+    OccupancyQuerySerializer,
+    ThreadSerializer,
+    AvailabilitySerializer,
+    PropertySearchSerializer,
+    QuoteSerializer,
+    ReportQuerySerializer,
+    SearchQuerySerializer,
+    TopRatedSerializer,
+)
+from listings.throttling import COSTS
+
+
+class ExportMixin:
+    """Adds a staff-only ``export`` action streaming ``export_fields`` rows.
+
+    Clients pick the format with ``?format=ndjson`` (default) or
+    ``?format=csv``; rows are encoded batch by batch as they are read.
+    """
+
+    export_fields = ()
+    export_chunk_size = 2000
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+        permission_classes=[permissions.IsAdminUser],
+        pagination_class=None,
+    )
+    def export(self, request):
+        renderer = request.accepted_renderer
+        rows = export_rows(
+            self.filter_queryset(self.get_queryset()),
+            self.export_fields,
+            chunk_size=self.export_chunk_size,
+        )
+        response = StreamingHttpResponse(
+            renderer.stream(self.export_fields, rows),
+            content_type=f"{renderer.media_type}; charset={renderer.charset}",
+        )
+        filename = f"{self.basename}s.{renderer.format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class FastListMixin:
+    """Serves ``list`` from ``.values()`` rows through a precompiled plan.
+
+    The JSON is identical to the serializer's; viewsets whose serializer
+    cannot be compiled keep the regular ``list``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = compile_plan(self.get_serializer_class())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        columns = list(plan.columns)
+        if hasattr(self.paginator, "get_ordering"):
+            columns += [
+                field.lstrip("-") for field in self.paginator.get_ordering(self)
+            ]
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.values(*dict.fromkeys(columns))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(queryset))
 
 
 # Create your views here.
-class ListingViewSet(viewsets.ModelViewSet):
+class ListingViewSet(
+    CachedReadMixin,
+    ConditionalGetMixin,
+    FastListMixin,
+    BulkWriteMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Listing.objects.all()
     serializer_class = ListingSerializer
 
+    def bulk_write(self, instances, fields=None):
+        # Bulk writes skip post_save, so the cached payloads are retired
+        # here; deletes still send post_delete per listing.
+        super().bulk_write(instances, fields)
+        if fields is not None:
+            for listing in instances:
+                bump_version(detail_version_key(listing.pk))
+        bump_version(LIST_VERSION_KEY)
+
+
+class BookingViewSet(
+    ConditionalGetMixin,
+    FastListMixin,
+    ExportMixin,
+    BulkWriteMixin,
+    viewsets.ModelViewSet,
+):
+    """Bookings, with the query plan chosen per action.
+
+    Lists are flat ``.values()`` rows unless ``?expand=true`` asks for the
+    nested property/user summaries, which retrieve always includes. Nested
+    responses join both relations and load only the summarized columns, so
+    every page costs one query.
+    """
 
-class BookingViewSet(viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
+    summary_fields = [
+        *(field.name for field in Booking._meta.concrete_fields),
+        "property__name",
+        "property__location",
+        "property__price_per_night",
+        "user__username",
+        "user__first_name",
+        "user__last_name",
+    ]
+    export_fields = (
+        "id",
+        "property_id",
+        "user_id",
+        "start_date",
+        "end_date",
+        "total_price",
+        "status",
+        "created_at",
+        "updated_at",
+    )
+
+    @property
+    def nested(self):
+        if self.action == "retrieve":
+            return True
+        expand = self.request.query_params.get("expand") if self.request else None
+        return self.action == "list" and expand in ("1", "true")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.nested:
+            queryset = queryset.select_related("property", "user").only(
+                *self.summary_fields
+            )
+        return queryset
+
+    def get_conditional_fields(self):
+        if self.nested:
+            # The user summary has no timestamp, so its columns are hashed.
+            return (
+                "updated_at",
+                "property__updated_at",
+                "user__username",
+                "user__first_name",
+                "user__last_name",
+            )
+        return super().get_conditional_fields()
+
+    def get_serializer_class(self):
+        if self.nested:
+            return BookingDetailSerializer
+        return super().get_serializer_class()
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        booking = self._save_and_reserve(serializer, user=self.request.user)
+        # Pricing, payment, confirmation and the guest's notification happen
+        # on a worker; the booking is answered as pending. A broker outage
+        # must not fail a booking that is already stored.
+        transaction.on_commit(
+            lambda: confirm_booking.apply_async(
+                (booking.pk,), retry=False, ignore_result=True
+            ),
+            robust=True,
+        )
+
+    def perform_update(self, serializer):
+        self._save_and_reserve(serializer)
+
+    def _save_and_reserve(self, serializer, **kwargs):
+        try:
+            with transaction.atomic():
+                booking = serializer.save(**kwargs)
+                availability.sync_nights(booking)
+        except availability.BookingConflict as exc:
+            raise serializers.ValidationError({"non_field_errors": [str(exc)]})
+        return booking
+
+    def get_bulk_context(self, items):
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item["property"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+        return {
+            "related": {"property": Property.objects.in_bulk(ids)},
+            "defer_pricing": True,
+        }
+
+    def get_bulk_create_kwargs(self):
+        if not self.request.user.is_authenticated:
+            raise NotAuthenticated()
+        return {"user": self.request.user}
+
+    def validate_batch(self, validated):
+        # Availability of the whole batch is one query, checked in request
+        # order so the first of two overlapping items wins; prices are
+        # quoted together for every new or moved stay.
+        active, moved = {}, {}
+        for index, (booking, attrs) in validated.items():
+            property_obj, start_date, end_date = (
+                attrs.get(name, getattr(booking, name, None))
+                for name in ("property", "start_date", "end_date")
+            )
+            stay = (property_obj.pk, start_date, end_date)
+            default = booking.status if booking else Booking.Status.PENDING
+            if attrs.get("status", default) in availability.ACTIVE_STATUSES:
+                active[index] = stay
+            if booking is None or BookingSerializer.stay_fields & attrs.keys():
+                moved[index] = stay
+        rewritten = [booking.pk for booking, _ in validated.values() if booking]
+        order = list(active)
+        conflicts = availability.batch_conflicts(
+            [active[index] for index in order], exclude=rewritten
+        )
+        errors = {}
+        for position in conflicts:
+            property_id, start_date, end_date = active[order[position]]
+            errors[order[position]] = {
+                "non_field_errors": [
+                    f"Property {property_id} is not available "
+                    f"from {start_date} to {end_date}."
+                ]
+            }
+        prices = pricing.quote_many(list(moved.values()))
+        for index, price in zip(moved, prices):
+            validated[index][1]["total_price"] = price
+        return errors
+
+    def bulk_write(self, instances, fields=None):
+        super().bulk_write(instances, fields)
+        try:
+            availability.sync_batch_nights(instances)
+        except availability.BookingConflict as exc:
+            raise serializers.ValidationError({"non_field_errors": [str(exc)]})
+        # Bulk writes send no post_save, so the rollups are queued here.
+        schedule_rollups(
+            [
+                stay
+                for booking in instances
+                for stay in (
+                    (booking.property_id, booking.start_date, booking.end_date),
+                    booking._stored_stay,
+                )
+                if stay
+            ]
+        )
+        if fields is None:
+            for booking in instances:
+                transaction.on_commit(
+                    lambda pk=booking.pk: confirm_booking.apply_async(
+                        (pk,), retry=False, ignore_result=True
+                    ),
+                    robust=True,
+                )
+
+    @action(detail=False, methods=["get"])
+    def availability(self, request):
+        query = AvailabilitySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        available = availability.is_available(
+            data["property"].pk, data["start_date"], data["end_date"]
+        )
+        return Response({"available": available})
+
+
+class PropertyViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Property.objects.all()
+    serializer_class = PropertySerializer
+    # A search scans calendars and a quote prices up to 500 stays.
+    throttle_costs = {"search": COSTS["bulk"], "quote": COSTS["bulk"]}
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        query = PropertySearchSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        candidates = Property.objects.order_by("price_per_night", "pk")
+        if "location" in data:
+            candidates = candidates.filter(location=data["location"])
+        if "max_price" in data:
+            candidates = candidates.filter(price_per_night__lte=data["max_price"])
+        ids = availability.available_properties(
+            candidates, data["start_date"], data["end_date"], limit=data["limit"]
+        )
+        found = Property.objects.in_bulk(ids)
+        serializer = self.get_serializer([found[pk] for pk in ids], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="top-rated")
+    def top_rated(self, request):
+        """Best average rating first, read in ``property_rating_idx`` order."""
+        query = TopRatedSerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        ranked = Property.objects.filter(
+            review_count__gte=data["min_reviews"]
+        ).order_by("-rating_average", "-review_count", "id")
+        serializer = self.get_serializer(ranked[: data["limit"]], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=["post"])
+    def quote(self, request):
+        """Price up to 500 candidate stays, in request order."""
+        query = QuoteSerializer(data=request.data)
+        query.is_valid(raise_exception=True)
+        stays = query.validated_data["stays"]
+        totals = pricing.quote_many(
+            [(stay["property"], stay["start_date"], stay["end_date"]) for stay in stays]
+        )
+        unknown = sorted(
+            {stay["property"] for stay, total in zip(stays, totals) if total is None}
+        )
+        if unknown:
+            raise serializers.ValidationError(
+                {"stays": [f"Unknown property ids: {unknown}."]}
+            )
+        return Response(
+            [
+                {
+                    **data,
+                    "nights": (stay["end_date"] - stay["start_date"]).days,
+                    "total_price": str(total),
+                }
+                for data, stay, total in zip(query.data["stays"], stays, totals)
+            ]
+        )
+
+
+class PaymentViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Payment.objects.all()
+    serializer_class = PaymentSerializer
+    permission_classes = [permissions.IsAdminUser]
+    keyset_ordering = ("-payment_date", "-id")
+    export_fields = ("id", "booking_id", "amount", "payment_method", "payment_date")
+
+
+class ThreadViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """The signed-in user's conversations, most recently active first.
+
+    A page of threads reads the user's inbox rows with their peer and last
+    message joined in, so it costs one query however long the user's
+    message history is. ``messages`` pages through one thread, newest
+    first; ``read`` clears its unread counter.
+    """
+
+    serializer_class = ThreadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    lookup_field = "conversation_id"
+    lookup_url_kwarg = "pk"
+
+    @property
+    def keyset_ordering(self):
+        if self.action == "messages":
+            return ("-sent_at", "-id")
+        return ("-last_message_at", "-id")
+
+    def get_queryset(self):
+        if getattr(self, "swagger_fake_view", False):
+            # Schema generation runs without a signed-in user.
+            return ConversationMember.objects.none()
+        return ConversationMember.objects.filter(user=self.request.user).select_related(
+            "peer", "conversation__last_message"
+        )
+
+    @action(detail=True, methods=["get"], serializer_class=MessageSerializer)
+    def messages(self, request, pk=None):
+        member = self.get_object()
+        thread = Message.objects.filter(conversation_id=member.conversation_id)
+        page = self.paginate_queryset(thread)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=True, methods=["post"])
+    def read(self, request, pk=None):
+        messaging.mark_read(request.user, self.get_object().conversation_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class SlowRequestsView(APIView):
+    """Slowest requests recorded by the profiling middleware, slowest first."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(slow_requests.snapshot())
+
+
+class SearchView(APIView):
+    """Listings and properties matching ``?q=``, best match first."""
+
+    throttle_costs = {"get": COSTS["bulk"]}
+
+    def get(self, request):
+        query = SearchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        data = query.validated_data
+        return Response(search.search(data["q"], limit=data["limit"]))
+
+
+class OccupancyView(APIView):
+    """Staff-only occupancy and revenue between two dates, from the rollups."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        query = OccupancyQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(rollups.occupancy(**query.validated_data))
+
+
+class BookingReportView(APIView):
+    """Staff-only monthly booking and revenue report; see ``listings.reports``."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        query = ReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(reports.build_report(**query.validated_data))